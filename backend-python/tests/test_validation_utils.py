@@ -0,0 +1,40 @@
+"""
+Bulk validation tests
+"""
+
+from utils.validation_utils import ValidationManager
+
+
+RULES = {
+    'name': {'required': True, 'max_length': 10},
+    'score': {'type': 'integer', 'min_value': 0, 'max_value': 100},
+    'status': {'choices': ['new', 'contacted']},
+}
+
+RECORDS = [
+    {'name': 'Alice', 'score': '50', 'status': 'new'},
+    {'name': '', 'score': '150', 'status': 'new'},
+    {'name': 'A very long name', 'score': 'abc', 'status': 'closed'},
+    {'name': 'Bob', 'score': '7', 'status': 'contacted'},
+    {'name': None, 'score': '150', 'status': 'closed'},
+]
+
+
+def test_column_mode_matches_record_mode():
+    """Column mode reports the same counts and error summary as per-record validation"""
+    manager = ValidationManager()
+    by_record = manager.validate_bulk_data(RECORDS, RULES)
+    by_column = manager.validate_bulk_data(RECORDS, RULES, vectorized=True)
+
+    assert by_column['valid_records'] == by_record['valid_records']
+    assert by_column['invalid_records'] == by_record['invalid_records']
+    assert by_column['error_summary'] == by_record['error_summary']
+
+
+def test_column_mode_omits_rules_that_never_fail():
+    """Rules no record breaks do not appear in the error summary"""
+    manager = ValidationManager()
+    result = manager.validate_bulk_data(RECORDS[:1], RULES, vectorized=True)
+
+    assert result['valid']
+    assert result['error_summary'] == {}
@@ -7,6 +7,8 @@ import json
 from typing import Dict, List, Optional, Any, Union, Callable
 from datetime import datetime, date
 from decimal import Decimal, InvalidOperation
+import numpy as np
+import pandas as pd
 import phonenumbers
 from email_validator import validate_email, EmailNotValidError
 
@@ -15,6 +17,52 @@ from utils.logging_config import get_logger
 logger = get_logger(__name__)
 
 
+# Column-mode fast paths - values they accept are accepted by the scalar checks too
+NUMBER_RE = re.compile(r'[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?')
+INTEGER_RE = re.compile(r'[+-]?[0-9]+')
+ISO_DATE_RE = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}')
+EMAIL_RE = re.compile(
+    r"(?=.{1,254}$)(?=[^@]{1,64}@)"
+    r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*"
+    r"@(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}"
+)
+NANP_PHONE_RE = re.compile(r'(?:\+?1)?[2-9](?:1[02-9]|[02-9][0-9])[2-9](?:1[02-9]|[02-9][0-9])[0-9]{4}')
+PHONE_PUNCTUATION_RE = re.compile(r'[\s().-]')
+BOOLEAN_VALUES = {'true', '1', 'yes', 'on', 'false', '0', 'no', 'off'}
+
+
+class CompiledFieldRules:
+    """One field's rules with patterns resolved and compiled."""
+    
+    def __init__(self, field_name: str, rules: Dict[str, Any], patterns: Dict[str, str]):
+        self.field_name = field_name
+        self.rules = rules
+        self.required = rules.get('required', False)
+        self.type = rules.get('type')
+        self.min_length = rules.get('min_length')
+        self.max_length = rules.get('max_length')
+        self.min_value = rules.get('min_value')
+        self.max_value = rules.get('max_value')
+        self.has_range = 'min_value' in rules or 'max_value' in rules
+        self.pattern = None
+        if 'pattern' in rules:
+            self.pattern = re.compile(patterns.get(rules['pattern'], rules['pattern']))
+        self.format = rules.get('format')
+        self.custom = rules.get('custom')
+        self.choices = rules.get('choices')
+
+
+class CompiledRuleSet:
+    """Validation rules compiled once and reused for every column-mode validation."""
+    
+    def __init__(self, rules: Dict[str, Dict[str, Any]], patterns: Dict[str, str]):
+        self.rules = rules
+        self.fields = [
+            CompiledFieldRules(field_name, field_rules, patterns)
+            for field_name, field_rules in rules.items()
+        ]
+
+
 class ValidationManager:
     """Comprehensive validation manager for DroneStrike system."""
     
@@ -394,9 +442,22 @@ class ValidationManager:
         
         return result
     
+    def compile_rules(self, rules: Dict[str, Dict[str, Any]]) -> CompiledRuleSet:
+        """
+        Compile validation rules for column-mode bulk validation.
+        
+        Args:
+            rules: Validation rules for each field
+            
+        Returns:
+            Compiled rule set, reusable across validations
+        """
+        return CompiledRuleSet(rules, self.PATTERNS)
+    
     def validate_bulk_data(self, data_list: List[Dict[str, Any]], 
                           rules: Dict[str, Dict[str, Any]],
-                          max_errors: int = 100) -> Dict[str, Any]:
+                          max_errors: int = 100,
+                          vectorized: bool = False) -> Dict[str, Any]:
         """
         Validate bulk data with error limiting.
         
@@ -404,10 +465,14 @@ class ValidationManager:
             data_list: List of data dictionaries to validate
             rules: Validation rules
             max_errors: Maximum number of errors to collect
+            vectorized: Validate whole columns at once (see validate_bulk_columns)
             
         Returns:
             Bulk validation result
         """
+        if vectorized:
+            return self.validate_bulk_columns(data_list, rules, max_errors)
+        
         result = {
             'valid': True,
             'total_records': len(data_list),
@@ -473,4 +538,258 @@ class ValidationManager:
             result['errors'].append(f"Bulk validation error: {str(e)}")
             logger.error(f"Bulk validation failed: {e}")
         
-        return result
\ No newline at end of file
+        return result
+    
+    def validate_bulk_columns(self, data: Union[List[Dict[str, Any]], pd.DataFrame],
+                              rules: Union[Dict[str, Dict[str, Any]], CompiledRuleSet],
+                              max_errors: int = 100) -> Dict[str, Any]:
+        """
+        Validate bulk data column by column.
+        
+        Each column is factorized and every rule runs once per distinct value;
+        the resulting masks are broadcast back to the records. Values the fast
+        checks cannot accept go through the per-record validators, so error
+        messages match validate_data. Every record is validated - max_errors
+        only limits the error details returned. Emails are checked for syntax
+        only (no deliverability lookup) and US phone numbers by NANP rules.
+        
+        Args:
+            data: List of data dictionaries, or a DataFrame
+            rules: Validation rules, or a rule set from compile_rules
+            max_errors: Maximum number of errors to collect
+            
+        Returns:
+            Bulk validation result (same structure as validate_bulk_data)
+        """
+        rule_set = rules if isinstance(rules, CompiledRuleSet) else self.compile_rules(rules)
+        total = len(data)
+        result = {
+            'valid': True,
+            'total_records': total,
+            'valid_records': 0,
+            'invalid_records': 0,
+            'errors': [],
+            'warnings': [],
+            'error_summary': {},
+            'sample_valid_data': []
+        }
+        
+        try:
+            columns = {}
+            field_checks = []
+            invalid = np.zeros(total, dtype=bool)
+            
+            for field in rule_set.fields:
+                if isinstance(data, pd.DataFrame):
+                    if field.field_name in data.columns:
+                        column = data[field.field_name].astype(object).reset_index(drop=True)
+                    else:
+                        column = pd.Series([None] * total, dtype=object)
+                else:
+                    column = pd.Series([record.get(field.field_name) for record in data], dtype=object)
+                columns[field.field_name] = column
+                
+                codes, values = self._factorize_column(column)
+                value_counts = np.bincount(codes, minlength=len(values))
+                checks = self._column_checks(values, field)
+                field_checks.append((field.field_name, codes, checks))
+                
+                failed_values = np.zeros(len(values), dtype=bool)
+                for mask, message in checks:
+                    failed_values |= mask
+                    if isinstance(message, str):
+                        counts = {message: int(value_counts[mask].sum())}
+                    else:
+                        counts = pd.Series(value_counts[mask]).groupby(message[mask], sort=False).sum().to_dict()
+                    for error, count in counts.items():
+                        if not count:
+                            # Per-record validation only reports errors that occur
+                            continue
+                        key = f"{field.field_name}: {error}"
+                        result['error_summary'][key] = result['error_summary'].get(key, 0) + int(count)
+                invalid |= failed_values[codes]
+            
+            result['invalid_records'] = int(invalid.sum())
+            result['valid_records'] = total - result['invalid_records']
+            result['valid'] = result['invalid_records'] == 0
+            
+            # Error details in record order, then rule order
+            error_count = 0
+            for index in np.flatnonzero(invalid):
+                if error_count >= max_errors:
+                    result['warnings'].append(f"Error details limited to {max_errors} errors")
+                    break
+                for field_name, codes, checks in field_checks:
+                    code = codes[index]
+                    for mask, message in checks:
+                        if mask[code] and error_count < max_errors:
+                            result['errors'].append({
+                                'record_index': int(index),
+                                'field': field_name,
+                                'error': message if isinstance(message, str) else message[code],
+                                'value': columns[field_name].iat[index]
+                            })
+                            error_count += 1
+            
+            # Cleaned values for the sample only (emails are not altered by cleaning)
+            sample_rules = {
+                field.field_name: {key: value for key, value in field.rules.items() if key != 'format' or value != 'email'}
+                for field in rule_set.fields
+            }
+            for index in np.flatnonzero(~invalid)[:5]:
+                result['sample_valid_data'].append({
+                    'index': int(index),
+                    'data': {
+                        field_name: self._validate_field(columns[field_name].iat[index], field_rules, field_name)['cleaned_value']
+                        for field_name, field_rules in sample_rules.items()
+                    }
+                })
+            
+            if total > 0:
+                result['success_rate'] = (result['valid_records'] / total) * 100
+            else:
+                result['success_rate'] = 0
+            
+            logger.info(f"Bulk column validation completed", extra={
+                'total_records': result['total_records'],
+                'valid_records': result['valid_records'],
+                'success_rate': result['success_rate']
+            })
+            
+        except Exception as e:
+            result['valid'] = False
+            result['errors'].append(f"Bulk validation error: {str(e)}")
+            logger.error(f"Bulk column validation failed: {e}")
+        
+        return result
+    
+    @staticmethod
+    def _factorize_column(column: pd.Series) -> tuple:
+        """
+        Distinct stripped values of a column and each record's code into them.
+        
+        Missing values (None/NaN) map to a trailing '' entry.
+        """
+        codes, uniques = pd.factorize(column)
+        values = pd.Series([str(value).strip() for value in uniques] + [''], dtype=object)
+        codes = np.where(codes < 0, len(uniques), codes)
+        return codes, values
+    
+    def _column_checks(self, values: pd.Series, field: CompiledFieldRules) -> List[tuple]:
+        """
+        Apply one field's rules to its distinct values, in validate_data's rule order.
+        
+        Returns (mask, message) pairs over the distinct values; message is a
+        string, or an object array of per-value messages.
+        """
+        checks = []
+        name = field.field_name
+        present = (values != '').to_numpy()
+        
+        if field.required:
+            checks.append((~present, f"{name} is required"))
+        if not present.any():
+            return checks
+        
+        if field.type:
+            checks.append(self._type_check(values, present, field.type))
+        
+        if field.min_length is not None or field.max_length is not None:
+            lengths = values.str.len().to_numpy()
+            if field.min_length is not None:
+                checks.append((present & (lengths < field.min_length),
+                               f"{name} must be at least {field.min_length} characters"))
+            if field.max_length is not None:
+                checks.append((present & (lengths > field.max_length),
+                               f"{name} must be no more than {field.max_length} characters"))
+        
+        if field.has_range:
+            numbers, parsed = self._parse_floats(values, present)
+            if field.min_value is not None:
+                checks.append((present & parsed & (numbers < field.min_value),
+                               f"{name} must be at least {field.min_value}"))
+            if field.max_value is not None:
+                checks.append((present & parsed & (numbers > field.max_value),
+                               f"{name} must be no more than {field.max_value}"))
+            checks.append((present & ~parsed, f"{name} must be a valid number for range validation"))
+        
+        if field.pattern is not None:
+            matched = values.str.match(field.pattern, na=False).to_numpy(dtype=bool)
+            checks.append((present & ~matched, f"{name} format is invalid"))
+        
+        if field.format == 'email':
+            accepted = values.str.fullmatch(EMAIL_RE, na=False).to_numpy(dtype=bool)
+            checks.append(self._value_check(
+                values, present & ~accepted,
+                lambda value: (self._validate_email(value)['errors'] or [None])[0]
+            ))
+        
+        if field.format == 'phone':
+            digits = values.str.replace(PHONE_PUNCTUATION_RE, '', regex=True)
+            accepted = digits.str.fullmatch(NANP_PHONE_RE, na=False).to_numpy(dtype=bool)
+            checks.append(self._value_check(
+                values, present & ~accepted,
+                lambda value: (self._validate_phone(value)['errors'] or [None])[0]
+            ))
+        
+        if field.custom and field.custom in self.custom_validators:
+            validator_func = self.custom_validators[field.custom]
+            
+            def custom_error(value):
+                try:
+                    is_valid, error_msg = validator_func(value)
+                    return None if is_valid else error_msg
+                except Exception as e:
+                    return f"Custom validation error: {str(e)}"
+            
+            checks.append(self._value_check(values, present, custom_error))
+        
+        if field.choices is not None:
+            allowed = values.isin(field.choices).to_numpy()
+            checks.append((present & ~allowed, f"{name} must be one of: {', '.join(field.choices)}"))
+        
+        return checks
+    
+    def _type_check(self, values: pd.Series, present: np.ndarray, expected_type: str) -> tuple:
+        """Type check: values the fast path rejects go through _validate_type."""
+        if expected_type == 'integer':
+            accepted = values.str.fullmatch(INTEGER_RE, na=False).to_numpy(dtype=bool)
+        elif expected_type in ('float', 'decimal'):
+            accepted = values.str.fullmatch(NUMBER_RE, na=False).to_numpy(dtype=bool)
+        elif expected_type == 'boolean':
+            accepted = values.str.lower().isin(BOOLEAN_VALUES).to_numpy()
+        elif expected_type == 'date':
+            accepted = values.str.fullmatch(ISO_DATE_RE, na=False).to_numpy(dtype=bool)
+            if accepted.any():
+                dates = pd.to_datetime(values.where(accepted), format='%Y-%m-%d', errors='coerce')
+                accepted = accepted & dates.notna().to_numpy()
+        elif expected_type == 'string':
+            accepted = np.ones(len(values), dtype=bool)
+        else:
+            accepted = np.zeros(len(values), dtype=bool)
+        
+        return self._value_check(
+            values, present & ~accepted,
+            lambda value: (self._validate_type(value, expected_type)['errors'] or [None])[0]
+        )
+    
+    @staticmethod
+    def _value_check(values: pd.Series, candidates: np.ndarray, error_for: Callable) -> tuple:
+        """Run a per-value check on the candidate values; (mask, messages)."""
+        messages = np.full(len(values), None, dtype=object)
+        for position in np.flatnonzero(candidates):
+            messages[position] = error_for(values.iat[position])
+        return pd.notna(messages), messages
+    
+    @staticmethod
+    def _parse_floats(values: pd.Series, present: np.ndarray) -> tuple:
+        """float() of each present value; (numbers, parsed mask)."""
+        numbers = np.full(len(values), np.nan)
+        parsed = np.zeros(len(values), dtype=bool)
+        for position in np.flatnonzero(present):
+            try:
+                numbers[position] = float(values.iat[position])
+                parsed[position] = True
+            except ValueError:
+                pass
+        return numbers, parsed
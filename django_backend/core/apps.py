@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        # Register Lead/Property signal handlers for materialized filter
+        # results, facet cache versions, the lead search index and triggered
+        # campaigns, and the Communication handlers that keep campaign
+        # rollups current
+        from . import filter_materialization  # noqa: F401
+        from . import facet_engine  # noqa: F401
+        from . import campaign_rollups  # noqa: F401
+        from . import campaign_actions  # noqa: F401
+        from .lead_search import ensure_search_index
+
+        post_migrate.connect(ensure_search_index, sender=self)
@@ -0,0 +1,202 @@
+"""
+Audience Estimation for DroneStrike v2
+Campaign builders re-check their audience on every targeting change; instead
+of exact counts and breakdowns over the whole book, criteria are evaluated
+against a cached uniform random sample of the owner's leads and scaled up,
+with Wilson score confidence bounds. Books no larger than the sample are
+evaluated in full, so their numbers are exact. Launches still count exactly
+"""
+
+import logging
+import math
+import random
+import time
+from collections import Counter
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Min
+
+from .facet_engine import FacetEngine
+from .filter_spec import FilterSpec
+from .models import Lead
+
+logger = logging.getLogger(__name__)
+
+
+SAMPLE_CACHE_PREFIX = 'audience_sample'
+
+# Random lead ids probed per query when drawing a sample, and queries per draw
+PROBE_BATCH_SIZE = 10000
+PROBE_ROUNDS = 10
+
+# Two-sided normal quantiles for the supported confidence levels
+Z_SCORES = {0.90: 1.645, 0.95: 1.96, 0.99: 2.576}
+
+# Lead fields read for each sampled match
+BREAKDOWN_FIELDS = (
+    'mailing_state', 'mailing_city', 'lead_status',
+    'do_not_email', 'do_not_mail', 'phone_cell', 'property__total_value',
+)
+
+
+def wilson_interval(matched: int, sampled: int, population: int, z: float) -> Tuple[float, float]:
+    """
+    Wilson score interval for the matching share of the population
+    The variance is scaled by the finite population correction, so the
+    interval narrows to a point as the sample approaches the whole book
+    """
+    if sampled <= 0:
+        return 0.0, 1.0
+    share = matched / sampled
+    fpc = (population - sampled) / (population - 1) if population > 1 else 0.0
+    if fpc <= 0:
+        return share, share
+
+    z2 = z * z * fpc
+    denominator = 1 + z2 / sampled
+    centre = (share + z2 / (2 * sampled)) / denominator
+    margin = math.sqrt(z2) * math.sqrt(share * (1 - share) / sampled + z2 / (4 * sampled * sampled)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+class AudienceEstimator:
+    """
+    Sampled audience size and breakdowns for one owner's leads
+    The sample (lead ids plus the book size when drawn) is cached per owner
+    and reused while the owner's lead data version is unchanged, or for up to
+    AUDIENCE_SAMPLE_MAX_AGE seconds after it changes
+    """
+
+    def __init__(self, user, sample_size: Optional[int] = None, confidence: float = 0.95):
+        if confidence not in Z_SCORES:
+            raise ValueError(f"Unsupported confidence level: {confidence}")
+        self.user = user
+        self.sample_size = sample_size or getattr(settings, 'AUDIENCE_SAMPLE_SIZE', 5000)
+        self.max_age = getattr(settings, 'AUDIENCE_SAMPLE_MAX_AGE', 300)
+        self.confidence = confidence
+        self.z = Z_SCORES[confidence]
+        self.scope = FacetEngine.owner_scope(user.pk)
+
+    def sample(self) -> Dict[str, Any]:
+        """Cached sample: {'ids', 'population', 'version', 'drawn_at'}"""
+        key = f"{SAMPLE_CACHE_PREFIX}:{self.scope}:{self.sample_size}"
+        version = FacetEngine.version(self.scope)
+        sample = cache.get(key)
+        if sample is not None and (sample['version'] == version or time.time() - sample['drawn_at'] < self.max_age):
+            return sample
+
+        ids, population = self._draw()
+        sample = {'ids': ids, 'population': population, 'version': version, 'drawn_at': time.time()}
+        cache.set(key, sample, None)
+        logger.debug(f"Drew audience sample of {len(ids)}/{population} leads for {self.scope}")
+        return sample
+
+    def _draw(self) -> Tuple[List[int], int]:
+        """
+        Uniform random sample of the owner's lead ids, and the owner's lead count
+        Random ids between the owner's lowest and highest lead id are probed
+        in batches against the (owner, id) index, so only the sample is read.
+        Owners whose ids are too sparse in that range to fill the sample
+        within PROBE_ROUNDS batches are read in full
+        """
+        leads = Lead.objects.filter(owner=self.user)
+        population = leads.count()
+        if population <= self.sample_size:
+            return list(leads.values_list('pk', flat=True)), population
+
+        bounds = leads.aggregate(low=Min('pk'), high=Max('pk'))
+        id_range = range(bounds['low'], bounds['high'] + 1)
+        density = population / len(id_range)
+        if density * PROBE_BATCH_SIZE * PROBE_ROUNDS < self.sample_size:
+            return random.sample(list(leads.values_list('pk', flat=True)), self.sample_size), population
+
+        found = set()
+        for _ in range(PROBE_ROUNDS):
+            needed = self.sample_size - len(found)
+            if needed <= 0:
+                break
+            probes = random.sample(id_range, min(len(id_range), PROBE_BATCH_SIZE, math.ceil(needed / density * 1.2)))
+            found.update(leads.filter(pk__in=probes).values_list('pk', flat=True))
+
+        ids = list(found)
+        if len(ids) > self.sample_size:
+            ids = random.sample(ids, self.sample_size)
+        return ids, population
+
+    def _matches(self, spec: FilterSpec) -> Tuple[List[Dict], Dict[str, Any]]:
+        """Sampled leads matching spec (one query), and the sample they came from"""
+        sample = self.sample()
+        if not sample['ids']:
+            return [], sample
+        queryset = spec.apply(Lead.objects.filter(owner=self.user, pk__in=sample['ids']))
+        # pk keeps rows from joined predicates distinct per lead
+        rows = list(queryset.order_by().values('pk', *BREAKDOWN_FIELDS).distinct())
+        return rows, sample
+
+    def _estimate(self, matched: int, sample: Dict[str, Any]) -> Dict[str, Any]:
+        sampled, population = len(sample['ids']), sample['population']
+        is_exact = sampled >= population
+        if is_exact:
+            count = low = high = matched
+        else:
+            low_share, high_share = wilson_interval(matched, sampled, population, self.z)
+            count = round(matched * population / sampled)
+            # The sampled matches exist, and the sampled misses do not match
+            low = max(matched, math.floor(low_share * population))
+            high = min(population - (sampled - matched), math.ceil(high_share * population))
+        return {
+            'count': count,
+            'low': low,
+            'high': high,
+            'confidence': self.confidence,
+            'sample_size': sampled,
+            'population': population,
+            'is_exact': is_exact,
+        }
+
+    def estimate(self, spec: FilterSpec) -> Dict[str, Any]:
+        """Estimated audience size for spec with confidence bounds"""
+        rows, sample = self._matches(spec)
+        return self._estimate(len(rows), sample)
+
+    def analyze(self, spec: FilterSpec) -> Dict[str, Any]:
+        """
+        Audience analysis in the exact analyze_audience format, with counts
+        scaled from the sample and the size estimate under 'estimate'
+        """
+        rows, sample = self._matches(spec)
+        estimate = self._estimate(len(rows), sample)
+        scale = sample['population'] / len(sample['ids']) if sample['ids'] else 0
+
+        def scaled(count: int) -> int:
+            return round(count * scale)
+
+        places = Counter((row['mailing_state'], row['mailing_city']) for row in rows)
+        statuses = Counter(row['lead_status'] for row in rows)
+        values = [row['property__total_value'] for row in rows if row['property__total_value'] is not None]
+
+        return {
+            'total_size': estimate['count'],
+            'estimate': estimate,
+            'geographic_distribution': [
+                {'mailing_state': state, 'mailing_city': city, 'count': scaled(count)}
+                for (state, city), count in places.most_common(10)
+            ],
+            'status_distribution': [
+                {'lead_status': lead_status, 'count': scaled(count)}
+                for lead_status, count in statuses.items()
+            ],
+            'property_value_stats': {
+                'min_value': min(values) if values else None,
+                'max_value': max(values) if values else None,
+                'avg_value': sum(values, Decimal(0)) / len(values) if values else None,
+            },
+            'communication_preferences': {
+                'email_ok': scaled(sum(1 for row in rows if not row['do_not_email'])),
+                'mail_ok': scaled(sum(1 for row in rows if not row['do_not_mail'])),
+                'phone_ok': scaled(sum(1 for row in rows if row['phone_cell'])),
+            }
+        }
@@ -0,0 +1,259 @@
+"""
+County Roll Bulk Refresh for DroneStrike v2
+Full county refreshes skip per-row ORM writes: cleaned rows are streamed into
+a temporary staging table (COPY on PostgreSQL, executemany elsewhere) and one
+set-based merge, keyed on county and account number,
+- inserts properties and leads for new accounts
+- updates tax amounts that changed (reactivating returning accounts)
+- marks accounts missing from the roll inactive
+"""
+
+import csv
+import io
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .csv_streaming import StreamingCSVReader
+from .models import Lead, Property
+
+logger = logging.getLogger(__name__)
+
+
+STAGING_TABLE = 'core_roll_staging'
+STAGING_CHUNK_ROWS = 5000
+
+# Tax columns refreshed on existing properties
+TAX_COLUMNS = ['ple_amount_due', 'ple_amount_tax']
+
+
+def _staged_fields(model, exclude: Tuple[str, ...]) -> List:
+    return [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key and field.attname not in exclude
+    ]
+
+
+PROPERTY_FIELDS = _staged_fields(Property, ())
+LEAD_FIELDS = _staged_fields(Lead, ('property_id',))
+
+
+class CountyRollLoader:
+    """
+    Stage and merge a TARRANT-style county roll
+    Rows are cleaned and defaulted exactly like a regular import (unsaved
+    model instances), but reach the database only through the staging table
+    """
+
+    def __init__(self, processor):
+        self.processor = processor
+        self.quote = connection.ops.quote_name
+        self.stats = {
+            'staged_rows': 0,
+            'inserted': 0,
+            'updated': 0,
+            'unchanged': 0,
+            'deactivated': 0,
+            'duplicate_rows': 0,
+            'failed_rows': 0,
+            'counties': 0,
+        }
+
+    def load(self, file_content, batch_id: str, headers: List[str]) -> Dict:
+        """Stage every row of file_content, then merge (one transaction)"""
+        if not isinstance(file_content, str):
+            file_content.seek(0)
+        reader = StreamingCSVReader(file_content)
+
+        with transaction.atomic():
+            self._create_staging_table()
+            try:
+                county_ids = self._stage_rows(reader, headers, batch_id)
+                self._merge(county_ids)
+            finally:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DROP TABLE IF EXISTS {self.quote(STAGING_TABLE)}")
+
+        self.stats['counties'] = len(county_ids)
+        self.stats['unchanged'] = self.stats['staged_rows'] - self.stats['inserted'] - self.stats['updated']
+        return self.stats
+
+    # Staging
+
+    def _columns(self) -> List[Tuple[str, str]]:
+        """(staging column, db type) for every staged property and lead field"""
+        columns = [(f'p_{field.column}', field.db_type(connection)) for field in PROPERTY_FIELDS]
+        columns += [(f'l_{field.column}', field.db_type(connection)) for field in LEAD_FIELDS]
+        return columns
+
+    def _create_staging_table(self):
+        definitions = ', '.join(f'{self.quote(name)} {db_type} NULL' for name, db_type in self._columns())
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.quote(STAGING_TABLE)}")
+            cursor.execute(f"CREATE TEMPORARY TABLE {self.quote(STAGING_TABLE)} ({definitions}, is_new integer NOT NULL DEFAULT 0)")
+            cursor.execute(
+                f"CREATE INDEX {self.quote(STAGING_TABLE + '_key')} ON {self.quote(STAGING_TABLE)} "
+                f"({self.quote('p_county_id')}, {self.quote('p_account_number')})"
+            )
+
+    def _stage_rows(self, reader: StreamingCSVReader, headers: List[str], batch_id: str) -> set:
+        processor = self.processor
+        seen_keys = set()
+        county_ids = set()
+        batch = []
+
+        for row_number, row, _, processed_row, error in processor.clean_rows(reader, headers):
+            if error is None and not (processed_row['property_data'].get('account_number') or '').strip():
+                error = 'Missing account number'
+            if error is not None:
+                self._record_error(row_number, error, dict(row))
+                continue
+            batch.append(processed_row)
+            if len(batch) >= STAGING_CHUNK_ROWS:
+                self._stage_batch(batch, batch_id, seen_keys, county_ids)
+                batch = []
+
+        if batch:
+            self._stage_batch(batch, batch_id, seen_keys, county_ids)
+        return county_ids
+
+    def _stage_batch(self, batch: List[Dict], batch_id: str, seen_keys: set, county_ids: set):
+        processor = self.processor
+        counties = processor.resolve_counties(batch)
+        values = []
+
+        for row_data in batch:
+            try:
+                county = counties[processor.county_key(row_data['property_data'])]
+                property_obj = processor.build_property(row_data['property_data'], county)
+                key = (county.pk, property_obj.account_number.strip())
+                if key in seen_keys:
+                    self.stats['duplicate_rows'] += 1
+                    continue
+                seen_keys.add(key)
+                property_obj.account_number = key[1]
+
+                lead_obj = processor.build_lead(row_data['lead_data'], property_obj, batch_id)
+                property_obj.compute_derived_fields()
+                lead_obj.compute_derived_fields()
+                values.append(
+                    [self._db_value(field, property_obj) for field in PROPERTY_FIELDS] +
+                    [self._db_value(field, lead_obj) for field in LEAD_FIELDS]
+                )
+                county_ids.add(county.pk)
+            except Exception as e:
+                self._record_error(row_data['row_number'], str(e), row_data['raw_data'])
+
+        if values:
+            self._insert_staging(values)
+            self.stats['staged_rows'] += len(values)
+
+    @staticmethod
+    def _db_value(field, obj):
+        return field.get_db_prep_save(field.pre_save(obj, True), connection)
+
+    def _insert_staging(self, values: List[List]):
+        names = [name for name, _ in self._columns()]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for row in values:
+                    writer.writerow([_copy_text(value) for value in row])
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f"COPY {self.quote(STAGING_TABLE)} ({', '.join(self.quote(n) for n in names)}) "
+                    f"FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                    buffer
+                )
+            else:
+                placeholders = ', '.join(['%s'] * len(names))
+                cursor.executemany(
+                    f"INSERT INTO {self.quote(STAGING_TABLE)} ({', '.join(self.quote(n) for n in names)}) "
+                    f"VALUES ({placeholders})",
+                    values
+                )
+
+    def _record_error(self, row_number: int, error: str, data: Dict):
+        self.stats['failed_rows'] += 1
+        self.processor.import_stats['errors'].append({'row': row_number, 'error': error, 'data': data})
+
+    # Merge
+
+    def _merge(self, county_ids: set):
+        if not county_ids:
+            return
+        q = self.quote
+        staging = q(STAGING_TABLE)
+        property_table = q(Property._meta.db_table)
+        lead_table = q(Lead._meta.db_table)
+        distinct = 'IS NOT' if connection.vendor == 'sqlite' else 'IS DISTINCT FROM'
+        now = timezone.now()
+        same_account = (f"p.{q('county_id')} = s.{q('p_county_id')} "
+                        f"AND p.{q('account_number')} = s.{q('p_account_number')}")
+
+        with connection.cursor() as cursor:
+            # New accounts
+            cursor.execute(
+                f"UPDATE {staging} SET is_new = 1 WHERE NOT EXISTS ("
+                f"SELECT 1 FROM {property_table} p WHERE p.{q('county_id')} = {staging}.{q('p_county_id')} "
+                f"AND p.{q('account_number')} = {staging}.{q('p_account_number')})"
+            )
+
+            # Changed tax amounts (ltv_ratio follows the stored total value)
+            changed = ' OR '.join(f"p.{q(column)} {distinct} s.{q('p_' + column)}" for column in TAX_COLUMNS)
+            total_value, amount_due = f"p.{q('total_value')}", f"s.{q('p_ple_amount_due')}"
+            cursor.execute(
+                f"UPDATE {property_table} AS p SET "
+                + ', '.join(f"{q(column)} = s.{q('p_' + column)}" for column in TAX_COLUMNS) +
+                f", {q('ltv_ratio')} = CASE WHEN {total_value} IS NULL OR {total_value} <= 0 THEN 0 "
+                f"WHEN {amount_due} IS NULL THEN NULL "
+                f"ELSE ROUND({amount_due} * 100.0 / {total_value}, 2) END, "
+                f"{q('is_active')} = %s, {q('updated_at')} = %s "
+                f"FROM {staging} s WHERE s.is_new = 0 AND {same_account} "
+                f"AND ({changed} OR NOT p.{q('is_active')})",
+                [True, now]
+            )
+            self.stats['updated'] = max(cursor.rowcount, 0)
+
+            # Properties, then their leads, for new accounts
+            columns = ', '.join(q(field.column) for field in PROPERTY_FIELDS)
+            staged = ', '.join(f"s.{q('p_' + field.column)}" for field in PROPERTY_FIELDS)
+            cursor.execute(f"INSERT INTO {property_table} ({columns}) SELECT {staged} FROM {staging} s WHERE s.is_new = 1")
+            self.stats['inserted'] = max(cursor.rowcount, 0)
+
+            columns = ', '.join(q(field.column) for field in LEAD_FIELDS)
+            staged = ', '.join(f"s.{q('l_' + field.column)}" for field in LEAD_FIELDS)
+            cursor.execute(
+                f"INSERT INTO {lead_table} ({columns}, {q('property_id')}) "
+                f"SELECT {staged}, p.{q('id')} FROM {staging} s "
+                f"JOIN {property_table} p ON {same_account} WHERE s.is_new = 1"
+            )
+
+            # Accounts that disappeared from the refreshed counties
+            placeholders = ', '.join(['%s'] * len(county_ids))
+            cursor.execute(
+                f"UPDATE {property_table} SET {q('is_active')} = %s, {q('updated_at')} = %s "
+                f"WHERE {q('county_id')} IN ({placeholders}) AND {q('is_active')} "
+                f"AND NOT EXISTS (SELECT 1 FROM {staging} s WHERE s.{q('p_county_id')} = {property_table}.{q('county_id')} "
+                f"AND s.{q('p_account_number')} = {property_table}.{q('account_number')})",
+                [False, now] + sorted(county_ids)
+            )
+            self.stats['deactivated'] = max(cursor.rowcount, 0)
+
+        logger.info(f"County roll merge: {self.stats}")
+
+
+def _copy_text(value) -> Optional[str]:
+    """Value in COPY csv text form (None is the \\N null marker)"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if hasattr(value, 'adapted'):
+        # psycopg2 Json adapter from JSONField.get_db_prep_save
+        return json.dumps(value.adapted)
+    return str(value)
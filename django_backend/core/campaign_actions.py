@@ -0,0 +1,388 @@
+"""
+Scheduled Campaign Actions for DroneStrike v2
+Timed campaign work - scheduled launches, drip steps, trigger follow-ups -
+is stored as due-time ScheduledAction rows, a persistent priority queue on
+(status, due_at). Workers claim the oldest due entries in batches (SELECT ...
+FOR UPDATE SKIP LOCKED where the database supports it, a conditional UPDATE
+elsewhere) and sleep until the next due time, so a pass costs what is due,
+not what is scheduled. Drip steps and follow-ups are per lead: each sent step
+queues the lead's next one. A lead's entry is stamped before its message is
+handed to delivery, so retries and workers taking over an expired lease
+never send a step to the same lead twice
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .communication_models import Campaign, CampaignRecipient, CommunicationTemplate, ScheduledAction
+from .filter_spec import FilterSpec
+from .models import Lead
+from .user_roles import UserPermission
+
+logger = logging.getLogger(__name__)
+
+
+ENQUEUE_BATCH_SIZE = 2000
+
+# Campaign statuses whose queued work is dropped, or held back
+CLOSED_STATUSES = ('cancelled', 'failed')
+PAUSED_RECHECK = timedelta(hours=1)
+
+
+class PermanentActionError(Exception):
+    """An action that cannot succeed on retry"""
+
+
+class LeaseLostError(Exception):
+    """The worker's claim on its entries expired and another worker may own them"""
+
+
+def as_datetime(value) -> datetime:
+    """Aware datetime from a datetime or an ISO string (schedule configs come from JSON)"""
+    if isinstance(value, str):
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(f"Invalid datetime: {value}")
+        value = parsed
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+# Enqueueing
+
+def schedule_launch(campaign, due_at) -> ScheduledAction:
+    """Queue a campaign's launch, replacing a launch queued earlier"""
+    ScheduledAction.objects.filter(campaign=campaign, action_type='launch', status='pending').update(
+        status='cancelled', updated_at=timezone.now()
+    )
+    return ScheduledAction.objects.create(campaign=campaign, action_type='launch', due_at=as_datetime(due_at))
+
+
+def schedule_lead_actions(campaign, action_type: str, lead_ids: Iterable[int], due_at, step: int = 0) -> int:
+    """Queue one entry per lead (bulk inserts)"""
+    due_at = as_datetime(due_at)
+    queued = 0
+    batch = []
+    for lead_id in lead_ids:
+        batch.append(ScheduledAction(
+            campaign_id=campaign.pk, lead_id=lead_id, action_type=action_type, step=step, due_at=due_at
+        ))
+        if len(batch) >= ENQUEUE_BATCH_SIZE:
+            ScheduledAction.objects.bulk_create(batch)
+            queued += len(batch)
+            batch = []
+    if batch:
+        ScheduledAction.objects.bulk_create(batch)
+        queued += len(batch)
+    return queued
+
+
+def drip_step_config(campaign, step: int) -> Optional[Dict]:
+    """
+    Sequence entry for a follow-up step (steps 1..n follow the launch), or
+    None past the end; entries are template ids or dicts with template_id
+    and an optional delay_days
+    """
+    configuration = campaign.configuration or {}
+    sequence = configuration.get('drip_sequence', [])
+    if not 0 < step <= len(sequence):
+        return None
+    entry = sequence[step - 1]
+    if not isinstance(entry, dict):
+        entry = {'template_id': entry}
+    return {
+        'template_id': entry.get('template_id'),
+        'delay_days': entry.get('delay_days', configuration.get('interval_days', 7)),
+    }
+
+
+def schedule_next_drip_step(campaign, lead_ids: Iterable[int], step: int, now: datetime) -> int:
+    """Queue step for leads that received the previous one (nothing past the sequence)"""
+    config = drip_step_config(campaign, step)
+    if config is None:
+        return 0
+    return schedule_lead_actions(campaign, 'drip_step', lead_ids, now + timedelta(days=config['delay_days']), step)
+
+
+def fire_trigger(owner_id: int, event: str, lead_ids: Iterable[int], now: Optional[datetime] = None) -> int:
+    """
+    Queue follow-ups of the owner's triggered campaigns listening for event
+    Called by the lead signal below and by the CSV import and county refresh
+    paths, whose bulk inserts skip signals; lead_ids (a list or a lazy
+    queryset) is only read when a campaign is listening
+    """
+    now = now or timezone.now()
+    campaigns = [
+        campaign for campaign in Campaign.objects.filter(
+            user_id=owner_id, campaign_type='triggered', status__in=('scheduled', 'active')
+        ).only('id', 'configuration')
+        if (campaign.configuration or {}).get('trigger_event') == event
+    ]
+    if not campaigns:
+        return 0
+
+    lead_ids = list(lead_ids)
+    queued = 0
+    for campaign in campaigns:
+        due_at = now + timedelta(hours=campaign.configuration.get('delay_hours') or 0)
+        queued += schedule_lead_actions(campaign, 'trigger_followup', lead_ids, due_at)
+    return queued
+
+
+@receiver(post_save, sender=Lead)
+def trigger_lead_created(sender, instance, created=False, raw=False, **kwargs):
+    """Queue follow-ups of triggered campaigns for a new lead"""
+    if not created or raw:
+        return
+    try:
+        fire_trigger(instance.owner_id, 'lead_created', [instance.pk])
+    except Exception as e:
+        logger.error(f"Failed to queue triggered follow-ups for lead {instance.pk}: {str(e)}")
+
+
+# Claiming and running
+
+class CampaignActionQueue:
+    """
+    Claims and runs due ScheduledAction entries for one worker
+    Claimed entries are leased: a worker that dies leaves them 'claimed'
+    until release_stale hands them back after the lease runs out
+    """
+
+    def __init__(self, worker_id: Optional[str] = None, batch_size: Optional[int] = None):
+        self.worker_id = worker_id or uuid.uuid4().hex[:12]
+        self.batch_size = batch_size or getattr(settings, 'CAMPAIGN_SCHEDULER_BATCH_SIZE', 500)
+        self.lease = timedelta(seconds=getattr(settings, 'CAMPAIGN_SCHEDULER_LEASE_SECONDS', 900))
+        self.max_attempts = getattr(settings, 'CAMPAIGN_SCHEDULER_MAX_ATTEMPTS', 5)
+
+    def claim_due(self, now: Optional[datetime] = None) -> List[ScheduledAction]:
+        """Claim up to batch_size due entries, oldest due first"""
+        now = now or timezone.now()
+        token = f"{self.worker_id}:{uuid.uuid4().hex[:16]}"
+        due = ScheduledAction.objects.filter(status='pending', due_at__lte=now).order_by('due_at')
+        claim = {'status': 'claimed', 'claimed_by': token, 'claimed_at': now,
+                 'attempts': models.F('attempts') + 1, 'updated_at': now}
+
+        if connection.features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                ids = list(due.select_for_update(skip_locked=True).values_list('pk', flat=True)[:self.batch_size])
+                if ids:
+                    ScheduledAction.objects.filter(pk__in=ids).update(**claim)
+        else:
+            # No row locks (SQLite): writes are serialized, so only one worker's
+            # conditional update can move an entry out of pending
+            ids = list(due.values_list('pk', flat=True)[:self.batch_size])
+            if ids:
+                ScheduledAction.objects.filter(pk__in=ids, status='pending').update(**claim)
+
+        if not ids:
+            return []
+        return list(
+            ScheduledAction.objects.filter(claimed_by=token, status='claimed')
+            .select_related('campaign__user', 'campaign__template', 'lead__property')
+            .order_by('due_at')
+        )
+
+    def release_stale(self, now: Optional[datetime] = None) -> int:
+        """Return entries whose claim outlived the lease to the queue"""
+        now = now or timezone.now()
+        return ScheduledAction.objects.filter(status='claimed', claimed_at__lt=now - self.lease).update(
+            status='pending', claimed_by='', claimed_at=None, updated_at=now
+        )
+
+    @staticmethod
+    def next_due_at() -> Optional[datetime]:
+        """Due time of the earliest pending entry (one index lookup)"""
+        return ScheduledAction.objects.filter(status='pending').order_by('due_at').values_list('due_at', flat=True).first()
+
+    def run_due(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Claim one batch of due entries and run it, grouped by campaign, action and step"""
+        actions = self.claim_due(now)
+        stats = {'claimed': len(actions), 'done': 0, 'retried': 0, 'failed': 0, 'cancelled': 0,
+                 'deferred': 0, 'lost': 0}
+
+        groups = defaultdict(list)
+        for action in actions:
+            groups[(action.campaign_id, action.action_type, action.step)].append(action)
+
+        for (_, action_type, step), group in groups.items():
+            campaign = group[0].campaign
+            if campaign.status in CLOSED_STATUSES:
+                self._finish(group, 'cancelled', f"Campaign {campaign.status}")
+                stats['cancelled'] += len(group)
+                continue
+            if campaign.status == 'paused':
+                self._requeue(group, timezone.now() + PAUSED_RECHECK, count_attempt=False)
+                stats['deferred'] += len(group)
+                continue
+
+            try:
+                if action_type == 'launch':
+                    self._run_launch(campaign)
+                    self._finish(group, 'done')
+                else:
+                    self._run_lead_step(campaign, action_type, step, group)
+            except PermanentActionError as e:
+                logger.error(f"Scheduled {action_type} for campaign {campaign.id} failed: {str(e)}")
+                self._finish(group, 'failed', str(e))
+                stats['failed'] += len(group)
+            except LeaseLostError as e:
+                logger.warning(f"Scheduled {action_type} for campaign {campaign.id} dropped: {str(e)}")
+                stats['lost'] += len(group)
+            except Exception as e:
+                logger.error(f"Scheduled {action_type} for campaign {campaign.id} errored: {str(e)}")
+                self._retry(campaign, action_type, step, group, e, stats)
+            else:
+                stats['done'] += len(group)
+
+        return stats
+
+    def _retry(self, campaign, action_type: str, step: int, group: List[ScheduledAction],
+               error: Exception, stats: Dict[str, int]):
+        """
+        Requeue the entries of an errored group whose leads were not handed to
+        delivery (with backoff, until max_attempts); entries stamped as sent
+        are finished instead
+        """
+        stamped = set(ScheduledAction.objects.filter(
+            pk__in=[action.pk for action in group], sent_at__isnull=False
+        ).values_list('pk', flat=True))
+        sent = [action for action in group if action.pk in stamped]
+        unsent = [action for action in group if action.pk not in stamped]
+
+        if sent:
+            try:
+                self._complete_lead_step(campaign, action_type, step, sent, error=f"Sent before error: {str(error)}")
+                stats['done'] += len(sent)
+            except LeaseLostError:
+                stats['lost'] += len(sent)
+
+        retry = [action for action in unsent if action.attempts < self.max_attempts]
+        exhausted = [action for action in unsent if action.attempts >= self.max_attempts]
+        if retry:
+            # Exponential backoff: 1, 2, 4 ... minutes
+            delay = timedelta(minutes=2 ** (retry[0].attempts - 1))
+            self._requeue(retry, timezone.now() + delay, error=str(error))
+            stats['retried'] += len(retry)
+        if exhausted:
+            self._finish(exhausted, 'failed', str(error))
+            stats['failed'] += len(exhausted)
+
+    # Handlers
+
+    def _run_launch(self, campaign):
+        """Launch a campaign whose scheduled start is due (completion queues drip step 1)"""
+        from .campaign_system import CampaignService
+
+        if campaign.status not in ('draft', 'scheduled'):
+            # Launched by hand already
+            return
+
+        result = async_to_sync(CampaignService(campaign.user).launch_campaign)(campaign.id)
+        if result.get('status') != 'completed':
+            raise PermanentActionError(result.get('error', 'Launch failed'))
+
+    def _run_lead_step(self, campaign, action_type: str, step: int, actions: List[ScheduledAction]):
+        """
+        Send a drip step or trigger follow-up to the leads of a claimed group
+        Entries stamped by an earlier attempt were handed to delivery already
+        and are only finished
+        """
+        from .campaign_system import CampaignExecutor
+
+        if not campaign.user.profile.has_permission(UserPermission.CAN_SEND_COMMUNICATIONS):
+            raise PermanentActionError("No permission to send communications")
+
+        template = campaign.template
+        if action_type == 'drip_step':
+            config = drip_step_config(campaign, step)
+            if config is None:
+                raise PermanentActionError(f"Drip step {step} is not in the sequence")
+            if config['template_id']:
+                template = CommunicationTemplate.objects.filter(pk=config['template_id'], user=campaign.user).first() or template
+        if template is None:
+            raise PermanentActionError("Campaign has no template")
+
+        unsent = {action.lead_id: action for action in actions if action.sent_at is None and action.lead is not None}
+        leads = [action.lead for action in unsent.values()]
+        if action_type == 'trigger_followup':
+            leads = self._matching_leads(campaign, leads)
+        if leads:
+            self._mark_sent([unsent[lead.pk] for lead in leads])
+            executor = CampaignExecutor(campaign.user)
+            async_to_sync(executor.deliver_to_leads)(campaign, template, leads)
+
+        self._complete_lead_step(campaign, action_type, step, actions)
+
+    def _complete_lead_step(self, campaign, action_type: str, step: int,
+                            actions: List[ScheduledAction], error: str = ''):
+        """
+        Finish a group's entries and queue the next drip step for leads whose
+        step went out, in one transaction so neither is repeated or lost
+        """
+        with transaction.atomic():
+            if action_type == 'drip_step':
+                # Leads whose step went out move on; a failed send ends their sequence
+                sent = list(CampaignRecipient.objects.filter(
+                    campaign=campaign, lead_id__in=[action.lead_id for action in actions if action.sent_at],
+                    status='sent'
+                ).values_list('lead_id', flat=True))
+                schedule_next_drip_step(campaign, sent, step + 1, timezone.now())
+            if self._finish(actions, 'done', error) != len(actions):
+                raise LeaseLostError(f"Lease on {len(actions)} entries expired before they finished")
+
+    @staticmethod
+    def _mark_sent(actions: List[ScheduledAction]):
+        """Stamp entries as handed to delivery, or raise LeaseLostError if the claim is gone"""
+        now = timezone.now()
+        with transaction.atomic():
+            updated = ScheduledAction.objects.filter(
+                pk__in=[action.pk for action in actions], claimed_by=actions[0].claimed_by,
+                status='claimed', sent_at__isnull=True
+            ).update(sent_at=now, updated_at=now)
+            if updated != len(actions):
+                raise LeaseLostError(f"Lease on {len(actions)} entries expired before sending")
+        for action in actions:
+            action.sent_at = now
+
+    @staticmethod
+    def _matching_leads(campaign, leads: List[Lead]) -> List[Lead]:
+        """Leads still matching the campaign's targeting and trigger conditions (one query)"""
+        queryset = Lead.objects.filter(pk__in=[lead.pk for lead in leads], owner=campaign.user)
+        for criteria in (campaign.targeting_criteria, (campaign.configuration or {}).get('conditions')):
+            if criteria:
+                queryset = FilterSpec.from_targeting_criteria(criteria).apply(queryset)
+        matching = set(queryset.values_list('pk', flat=True))
+        return [lead for lead in leads if lead.pk in matching]
+
+    # Bookkeeping
+
+    @staticmethod
+    def _finish(actions: List[ScheduledAction], status: str, error: str = '') -> int:
+        """Close claimed entries (only while this claim still holds them); returns the number closed"""
+        return ScheduledAction.objects.filter(
+            pk__in=[action.pk for action in actions], claimed_by=actions[0].claimed_by, status='claimed'
+        ).update(status=status, last_error=error, updated_at=timezone.now())
+
+    @staticmethod
+    def _requeue(actions: List[ScheduledAction], due_at: datetime, error: str = '', count_attempt: bool = True) -> int:
+        """Return claimed entries to the queue (only while this claim still holds them)"""
+        update = {'status': 'pending', 'due_at': due_at, 'claimed_by': '', 'claimed_at': None,
+                  'last_error': error, 'updated_at': timezone.now()}
+        if not count_attempt:
+            update['attempts'] = models.F('attempts') - 1
+        return ScheduledAction.objects.filter(
+            pk__in=[action.pk for action in actions], claimed_by=actions[0].claimed_by, status='claimed'
+        ).update(**update)
@@ -0,0 +1,183 @@
+"""
+Campaign Rollups for DroneStrike v2
+Per-campaign and per-hour counters (sent, delivered, opened, clicked,
+responded, bounced, failed, cost) kept up to date as communications change,
+so analytics read a few precomputed rows instead of counting communications.
+Each communication contributes to a metric in the hour its event happened;
+a change applies the difference between its old and new contributions with
+F() increments. Bulk writes (bulk_create/update) skip the model signals and
+must call record_changes themselves. Deleting a communication does not take
+back what it recorded, like the campaign's own total_sent
+"""
+
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from django.db import models, transaction
+from django.db.models.signals import pre_save, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .communication_models import CampaignHourlyRollup, CampaignRollup, Communication
+
+logger = logging.getLogger(__name__)
+
+
+METRICS = ('sent', 'delivered', 'opened', 'clicked', 'responded', 'bounced', 'failed', 'cost')
+
+# Communication fields that decide its contributions
+SNAPSHOT_FIELDS = (
+    'campaign_id', 'status', 'sent_at', 'delivered_at', 'opened_at', 'clicked_at',
+    'response_received', 'response_at', 'failed_at', 'tokens_cost',
+)
+
+DELIVERED_STATUSES = ('delivered', 'read', 'replied')
+
+
+def _hour(value: Optional[datetime]) -> Optional[datetime]:
+    return value.replace(minute=0, second=0, microsecond=0) if value else None
+
+
+def contributions(values: Dict) -> Counter:
+    """(campaign_id, metric, hour) -> amount for one communication's field values"""
+    campaign_id = values['campaign_id']
+    result = Counter()
+    if campaign_id is None:
+        return result
+
+    status, sent_at = values['status'], values['sent_at']
+    failed_at = values['failed_at'] or sent_at
+    events = {
+        'sent': sent_at if status != 'failed' else False,
+        'delivered': (values['delivered_at'] or sent_at) if status in DELIVERED_STATUSES or values['delivered_at'] else False,
+        'opened': values['opened_at'] or False,
+        'clicked': values['clicked_at'] or False,
+        'responded': (values['response_at'] or sent_at) if values['response_received'] else False,
+        'bounced': failed_at if status == 'bounced' else False,
+        'failed': failed_at if status == 'failed' else False,
+    }
+    for metric, happened_at in events.items():
+        # False: no event; None: an event without a time (counts in the totals only)
+        if happened_at is not False:
+            result[(campaign_id, metric, _hour(happened_at))] += 1
+    if values['tokens_cost']:
+        result[(campaign_id, 'cost', _hour(sent_at))] += values['tokens_cost']
+    return result
+
+
+def snapshot(communication: Communication) -> Dict:
+    return {field: getattr(communication, field) for field in SNAPSHOT_FIELDS}
+
+
+def record_changes(before: Iterable[Dict] = (), after: Iterable[Dict] = ()):
+    """
+    Apply the change from the before to the after field values of a set of
+    communications (snapshot() dicts) - pass only after for new rows
+    """
+    deltas = Counter()
+    for values in after:
+        deltas.update(contributions(values))
+    for values in before:
+        deltas.subtract(contributions(values))
+    apply_deltas(deltas)
+
+
+@transaction.atomic
+def apply_deltas(deltas: Counter):
+    """
+    Add (campaign_id, metric, hour) -> amount deltas to the rollup rows
+    One insert of missing rows per table, then one F() update per changed row
+    """
+    totals = defaultdict(Counter)
+    hourly = defaultdict(Counter)
+    for (campaign_id, metric, hour), amount in deltas.items():
+        if amount:
+            totals[campaign_id][metric] += amount
+            if hour is not None:
+                hourly[(campaign_id, hour)][metric] += amount
+    if not totals:
+        return
+
+    now = timezone.now()
+    CampaignRollup.objects.bulk_create(
+        [CampaignRollup(campaign_id=campaign_id) for campaign_id in totals], ignore_conflicts=True
+    )
+    for campaign_id, changes in totals.items():
+        CampaignRollup.objects.filter(campaign_id=campaign_id).update(updated_at=now, **_increments(changes))
+
+    if hourly:
+        CampaignHourlyRollup.objects.bulk_create(
+            [CampaignHourlyRollup(campaign_id=campaign_id, hour=hour) for campaign_id, hour in hourly],
+            ignore_conflicts=True
+        )
+        for (campaign_id, hour), changes in hourly.items():
+            CampaignHourlyRollup.objects.filter(campaign_id=campaign_id, hour=hour).update(
+                updated_at=now, **_increments(changes)
+            )
+
+
+def _increments(changes: Counter) -> Dict:
+    return {metric: models.F(metric) + amount for metric, amount in changes.items() if amount}
+
+
+@transaction.atomic
+def rebuild(campaign_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute rollups from communications (all campaigns, or the given ones)"""
+    communications = Communication.objects.filter(campaign__isnull=False)
+    rollups = CampaignRollup.objects.all()
+    hourly_rollups = CampaignHourlyRollup.objects.all()
+    if campaign_ids is not None:
+        campaign_ids = list(campaign_ids)
+        communications = communications.filter(campaign_id__in=campaign_ids)
+        rollups = rollups.filter(campaign_id__in=campaign_ids)
+        hourly_rollups = hourly_rollups.filter(campaign_id__in=campaign_ids)
+
+    rollups.delete()
+    hourly_rollups.delete()
+
+    totals = defaultdict(Counter)
+    hourly = defaultdict(Counter)
+    scanned = 0
+    for values in communications.order_by().values(*SNAPSHOT_FIELDS).iterator(chunk_size=5000):
+        scanned += 1
+        for (campaign_id, metric, hour), amount in contributions(values).items():
+            totals[campaign_id][metric] += amount
+            if hour is not None:
+                hourly[(campaign_id, hour)][metric] += amount
+
+    CampaignRollup.objects.bulk_create(
+        [CampaignRollup(campaign_id=campaign_id, **changes) for campaign_id, changes in totals.items()],
+        batch_size=1000
+    )
+    CampaignHourlyRollup.objects.bulk_create(
+        [CampaignHourlyRollup(campaign_id=campaign_id, hour=hour, **changes)
+         for (campaign_id, hour), changes in hourly.items()],
+        batch_size=1000
+    )
+    return scanned
+
+
+@receiver(pre_save, sender=Communication)
+def snapshot_communication(sender, instance, raw=False, **kwargs):
+    """Remember the rollup fields before a communication changes"""
+    if raw or instance.pk is None:
+        return
+    instance._rollup_snapshot = Communication.objects.filter(pk=instance.pk).values(*SNAPSHOT_FIELDS).first()
+
+
+@receiver(post_save, sender=Communication)
+def update_rollups(sender, instance, created=False, raw=False, **kwargs):
+    """Apply a created or updated communication to its campaign's rollups"""
+    before = instance.__dict__.pop('_rollup_snapshot', None)
+    if raw:
+        return
+    after = snapshot(instance)
+    if before == after or (after['campaign_id'] is None and (before is None or before['campaign_id'] is None)):
+        return
+    try:
+        record_changes([before] if before else [], [after])
+    except Exception as e:
+        logger.error(f"Failed to update campaign rollups for communication {instance.pk}: {str(e)}")
+
@@ -5,24 +5,64 @@ Based on original Node.js system's campaign capabilities
 """
 
 import logging
-import asyncio
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
-from django.db import transaction, models
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import connection, transaction, models
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
 
 from .models import Lead, Property, UserProfile
-from .communication_models import Communication, CommunicationTemplate
+from .communication_models import (
+    CampaignHourlyRollup, CampaignRecipient, CampaignRollup, Communication, CommunicationTemplate
+)
+from .delivery_scheduler import DeliveryScheduler, OutboundMessage
+from .template_engine import compiled_field
 # Forward reference for Campaign to avoid circular imports
 from .token_engine import TokenEngine
 from .user_roles import UserPermission
 from .filtering_system import PropertyFilter
+from .filter_spec import FilterSpec
+from .audience_estimator import AudienceEstimator
+from . import campaign_rollups
+from .campaign_actions import ENQUEUE_BATCH_SIZE, as_datetime, schedule_launch, schedule_next_drip_step
 
 logger = logging.getLogger(__name__)
 
 
+def _property_text(getter):
+    """Variable read from the lead's property: '' without a property"""
+    return lambda lead: getter(lead.property) if lead.property else ''
+
+
+def _property_only(getter):
+    """Variable defined only for leads with a property ({placeholder} kept otherwise)"""
+    return lambda lead: getter(lead.property) if lead.property else None
+
+
+def _currency(value) -> str:
+    return f"${value:,.2f}" if value else ''
+
+
+# {variable} -> text for campaign personalization
+PERSONALIZATION_VARIABLES = {
+    'first_name': lambda lead: lead.first_name or 'Property Owner',
+    'last_name': lambda lead: lead.last_name or '',
+    'full_name': lambda lead: f"{lead.first_name} {lead.last_name}".strip() or 'Property Owner',
+    'city': lambda lead: lead.mailing_city or '',
+    'state': lambda lead: lead.mailing_state or '',
+    'zip_code': lambda lead: lead.mailing_zip5 or '',
+    'property_address': _property_text(lambda prop: prop.address1 or ''),
+    'property_value': _property_text(lambda prop: _currency(prop.total_value)),
+    'taxes_due': _property_text(lambda prop: _currency(prop.ple_amount_due)),
+    'property_city': _property_only(lambda prop: prop.city or ''),
+    'property_type': _property_only(lambda prop: prop.property_type or 'property'),
+}
+
+
 class CampaignTargetingEngine:
     """
     Advanced targeting engine for campaign audiences
@@ -36,139 +76,63 @@ class CampaignTargetingEngine:
     def build_audience(self, targeting_criteria: Dict[str, Any]) -> models.QuerySet:
         """
         Build targeted audience based on sophisticated criteria
+        Criteria are normalized into a FilterSpec, so audiences share compiled
+        filters and cached counts with identical searches and saved filters
         """
-        # Start with user's leads
-        base_queryset = Lead.objects.filter(owner=self.user)
-        
-        # Geographic targeting
-        if 'geographic' in targeting_criteria:
-            geo_criteria = targeting_criteria['geographic']
-            
-            if 'states' in geo_criteria:
-                base_queryset = base_queryset.filter(
-                    mailing_state__in=geo_criteria['states']
-                )
-            
-            if 'cities' in geo_criteria:
-                base_queryset = base_queryset.filter(
-                    mailing_city__in=geo_criteria['cities']
-                )
-            
-            if 'zip_codes' in geo_criteria:
-                base_queryset = base_queryset.filter(
-                    mailing_zip5__in=geo_criteria['zip_codes']
-                )
+        spec = FilterSpec.from_targeting_criteria(targeting_criteria)
         
-        # Lead status targeting
-        if 'lead_status' in targeting_criteria:
-            base_queryset = base_queryset.filter(
-                lead_status__in=targeting_criteria['lead_status']
-            )
-        
-        # Workflow stage targeting
-        if 'workflow_stages' in targeting_criteria:
-            base_queryset = base_queryset.filter(
-                workflow_stage__in=targeting_criteria['workflow_stages']
-            )
-        
-        # Property value targeting
-        if 'property_criteria' in targeting_criteria:
-            prop_criteria = targeting_criteria['property_criteria']
-            
-            if 'min_value' in prop_criteria:
-                base_queryset = base_queryset.filter(
-                    property__total_value__gte=prop_criteria['min_value']
-                )
-            
-            if 'max_value' in prop_criteria:
-                base_queryset = base_queryset.filter(
-                    property__total_value__lte=prop_criteria['max_value']
-                )
-            
-            if 'property_types' in prop_criteria:
-                base_queryset = base_queryset.filter(
-                    property__property_type__in=prop_criteria['property_types']
-                )
-            
-            if 'min_taxes_due' in prop_criteria:
-                base_queryset = base_queryset.filter(
-                    property__ple_amount_due__gte=prop_criteria['min_taxes_due']
-                )
-        
-        # Communication history targeting
-        if 'communication_history' in targeting_criteria:
-            comm_criteria = targeting_criteria['communication_history']
-            
-            if 'exclude_recent_contacts' in comm_criteria:
-                days = comm_criteria['exclude_recent_contacts']
-                cutoff_date = timezone.now() - timedelta(days=days)
-                recent_contacts = Communication.objects.filter(
-                    lead__in=base_queryset,
-                    created_at__gte=cutoff_date
-                ).values_list('lead_id', flat=True)
-                base_queryset = base_queryset.exclude(id__in=recent_contacts)
-            
-            if 'only_unopened_emails' in comm_criteria and comm_criteria['only_unopened_emails']:
-                # Find leads with unopened emails
-                unopened_leads = Communication.objects.filter(
-                    lead__in=base_queryset,
-                    communication_type='email',
-                    opened_at__isnull=True
-                ).values_list('lead_id', flat=True)
-                base_queryset = base_queryset.filter(id__in=unopened_leads)
-        
-        # Demographic targeting
-        if 'demographics' in targeting_criteria:
-            demo_criteria = targeting_criteria['demographics']
-            
-            if 'owner_types' in demo_criteria:
-                base_queryset = base_queryset.filter(
-                    owner_type__in=demo_criteria['owner_types']
-                )
-            
-            if 'exclude_businesses' in demo_criteria and demo_criteria['exclude_businesses']:
-                base_queryset = base_queryset.filter(is_business=False)
-        
-        # Engagement targeting
-        if 'engagement' in targeting_criteria:
-            eng_criteria = targeting_criteria['engagement']
-            
-            if 'min_lead_score' in eng_criteria:
-                # Would need to calculate lead scores
-                pass  # Implement lead scoring integration
-            
-            if 'response_history' in eng_criteria:
-                if eng_criteria['response_history'] == 'responsive':
-                    # Find leads that have responded to communications
-                    responsive_leads = Communication.objects.filter(
-                        lead__in=base_queryset,
-                        response_received=True
-                    ).values_list('lead_id', flat=True)
-                    base_queryset = base_queryset.filter(id__in=responsive_leads)
-                elif eng_criteria['response_history'] == 'non_responsive':
-                    # Find leads that haven't responded
-                    responsive_leads = Communication.objects.filter(
-                        lead__in=base_queryset,
-                        response_received=True
-                    ).values_list('lead_id', flat=True)
-                    base_queryset = base_queryset.exclude(id__in=responsive_leads)
-        
-        # Exclude opted-out leads
-        if targeting_criteria.get('respect_opt_outs', True):
-            base_queryset = base_queryset.exclude(
-                models.Q(do_not_email=True) |
-                models.Q(do_not_mail=True) |
-                models.Q(phone_dnd=True)
+        # Start with user's leads
+        return spec.apply(Lead.objects.filter(owner=self.user)).distinct()
+    
+    @transaction.atomic
+    def materialize_audience(self, campaign) -> int:
+        """
+        Freeze the campaign's audience into CampaignRecipient rows with one
+        INSERT ... SELECT of the resolved lead ids
+        A campaign is frozen once - relaunches and retries reuse its snapshot
+        """
+        if campaign.audience_frozen_at is not None:
+            return campaign.audience_size
+        
+        audience = self.build_audience(campaign.targeting_criteria).order_by().values('pk')
+        select_sql, select_params = audience.query.sql_with_params()
+        q = connection.ops.quote_name
+        now = timezone.now()
+        
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {q(CampaignRecipient._meta.db_table)} "
+                f"({q('campaign_id')}, {q('lead_id')}, {q('status')}, {q('added_at')}) "
+                f"SELECT %s, audience.{q('id')}, %s, %s FROM ({select_sql}) audience",
+                [campaign.pk, 'pending', now, *select_params]
             )
+            audience_size = max(cursor.rowcount, 0)
         
-        return base_queryset.distinct()
+        campaign.audience_size = audience_size
+        campaign.audience_frozen_at = now
+        campaign.save(update_fields=['audience_size', 'audience_frozen_at', 'updated_at'])
+        logger.info(f"Campaign {campaign.id} audience frozen at {audience_size} recipients")
+        return audience_size
     
     def estimate_audience_size(self, targeting_criteria: Dict[str, Any]) -> int:
-        """Estimate audience size without executing full query"""
-        return self.build_audience(targeting_criteria).count()
+        """Estimated audience size from the owner's lead sample"""
+        return self.estimate_audience(targeting_criteria)['count']
+    
+    def estimate_audience(self, targeting_criteria: Dict[str, Any]) -> Dict[str, Any]:
+        """Estimated audience size with confidence bounds (exact for small books)"""
+        spec = FilterSpec.from_targeting_criteria(targeting_criteria)
+        return AudienceEstimator(self.user).estimate(spec)
     
-    def analyze_audience(self, targeting_criteria: Dict[str, Any]) -> Dict[str, Any]:
-        """Provide detailed audience analysis"""
+    def analyze_audience(self, targeting_criteria: Dict[str, Any], exact: bool = False) -> Dict[str, Any]:
+        """
+        Provide detailed audience analysis
+        Sizes and breakdowns are estimated from the owner's lead sample unless
+        exact is set; the launch itself always freezes the exact audience
+        """
+        if not exact:
+            spec = FilterSpec.from_targeting_criteria(targeting_criteria)
+            return AudienceEstimator(self.user).analyze(spec)
+        
         audience = self.build_audience(targeting_criteria)
         
         # Geographic distribution
@@ -198,7 +162,7 @@ class CampaignTargetingEngine:
             'communication_preferences': {
                 'email_ok': audience.filter(do_not_email=False).count(),
                 'mail_ok': audience.filter(do_not_mail=False).count(),
-                'phone_ok': audience.filter(phone_dnd=False).count(),
+                'phone_ok': audience.filter(phone_cell__isnull=False).exclude(phone_cell='').count(),
             }
         }
 
@@ -243,10 +207,14 @@ class CampaignScheduler:
     
     def _schedule_datetime(self, campaign, scheduled_datetime: datetime) -> Dict[str, Any]:
         """Schedule for specific datetime"""
+        scheduled_datetime = as_datetime(scheduled_datetime)
         campaign.status = 'scheduled'
         campaign.scheduled_start = scheduled_datetime
         campaign.save()
         
+        # A campaign action worker launches it when due
+        schedule_launch(campaign, scheduled_datetime)
+        
         return {
             'status': 'scheduled',
             'delivery_time': scheduled_datetime.isoformat(),
@@ -260,7 +228,7 @@ class CampaignScheduler:
         
         campaign.status = 'scheduled'
         campaign.campaign_type = 'drip'
-        campaign.scheduled_start = config.get('start_date', timezone.now())
+        campaign.scheduled_start = as_datetime(config.get('start_date') or timezone.now())
         
         # Store drip configuration
         campaign.configuration = {
@@ -270,6 +238,9 @@ class CampaignScheduler:
         }
         campaign.save()
         
+        # The launch sends the first message; each lead's later steps are queued as it receives one
+        schedule_launch(campaign, campaign.scheduled_start)
+        
         return {
             'status': 'scheduled',
             'campaign_type': 'drip',
@@ -311,91 +282,137 @@ class CampaignExecutor:
     def __init__(self, user: User):
         self.user = user
         self.token_engine = TokenEngine()
+        self.token_reservation = None
+        self.scheduler = None
     
     async def execute_campaign(self, campaign) -> Dict[str, Any]:
         """
         Execute campaign with sophisticated delivery logic
         """
         try:
-            # Check user permissions
-            if not self.user.profile.has_permission(UserPermission.CAN_SEND_COMMUNICATIONS):
-                raise PermissionError("No permission to send communications")
-            
-            # Get campaign audience
-            targeting_engine = CampaignTargetingEngine(self.user)
-            audience = targeting_engine.build_audience(campaign.targeting_criteria)
-            
-            if audience.count() == 0:
-                return {'status': 'failed', 'error': 'No audience found'}
-            
-            # Calculate token cost
-            cost_per_contact = self._get_communication_cost(campaign.communication_type)
-            total_cost = audience.count() * cost_per_contact
-            
-            # Check token availability
-            can_afford, message, breakdown = self.token_engine.check_token_availability(
-                self.user, f"{campaign.communication_type}_send", total_cost
-            )
-            
-            if not can_afford:
-                return {'status': 'failed', 'error': f'Insufficient tokens: {message}'}
+            prepared = await database_sync_to_async(self._prepare_campaign)(campaign)
+            if 'error' in prepared:
+                return {'status': 'failed', 'error': prepared['error']}
+            audience_size = prepared['audience_size']
+            self.token_reservation = prepared['reservation']
             
-            # Execute delivery
-            campaign.status = 'active'
-            campaign.started_at = timezone.now()
-            campaign.save()
-            
-            delivery_results = await self._deliver_to_audience(campaign, audience)
+            self.scheduler = DeliveryScheduler.from_settings()
+            try:
+                delivery_results = await self._deliver_to_audience(campaign)
+            finally:
+                self.scheduler.close()
             
-            # Update campaign status
-            campaign.status = 'completed'
-            campaign.completed_at = timezone.now()
-            campaign.total_sent = delivery_results['sent']
-            campaign.total_failed = delivery_results['failed']
-            campaign.save()
+            # Update campaign status (counters were incremented per batch)
+            await database_sync_to_async(self._complete_campaign)(campaign)
             
             return {
                 'status': 'completed',
-                'total_audience': audience.count(),
+                'total_audience': audience_size,
                 'sent': delivery_results['sent'],
                 'failed': delivery_results['failed'],
                 'tokens_consumed': delivery_results['tokens_used'],
-                'delivery_rate': delivery_results['sent'] / audience.count() * 100
+                'delivery_rate': delivery_results['sent'] / audience_size * 100
             }
         
         except Exception as e:
             campaign.status = 'failed'
             campaign.error_message = str(e)
-            campaign.save()
+            await database_sync_to_async(campaign.save)(update_fields=['status', 'error_message', 'updated_at'])
+            if self.token_reservation is not None:
+                # Recipients already sent keep their tokens, the rest go back
+                await database_sync_to_async(self.token_engine.release_reservation)(self.token_reservation)
             logger.error(f"Campaign {campaign.id} execution failed: {str(e)}")
             return {'status': 'failed', 'error': str(e)}
     
-    async def _deliver_to_audience(self, campaign, audience: models.QuerySet) -> Dict[str, Any]:
+    def _prepare_campaign(self, campaign) -> Dict[str, Any]:
+        """Check permission and reserve tokens, then mark the campaign active"""
+        # Check user permissions
+        if not self.user.profile.has_permission(UserPermission.CAN_SEND_COMMUNICATIONS):
+            raise PermissionError("No permission to send communications")
+        
+        # Freeze the campaign audience; recipients not sent yet are pending
+        targeting_engine = CampaignTargetingEngine(self.user)
+        if targeting_engine.materialize_audience(campaign) == 0:
+            return {'error': 'No audience found'}
+        
+        audience_size = campaign.recipients.filter(status='pending').count()
+        if audience_size == 0:
+            return {'error': 'No pending recipients'}
+        
+        # Calculate token cost
+        cost_per_contact = self._get_communication_cost(campaign.communication_type)
+        total_cost = audience_size * cost_per_contact
+        
+        # Hold tokens for the whole audience; batches draw from the hold
+        try:
+            reservation = self.token_engine.reserve_tokens(
+                self.user, f"{campaign.communication_type}_send", total_cost,
+                description=f"Campaign: {campaign.name} ({audience_size} recipients)",
+                reference_id=str(campaign.id)
+            )
+        except ValueError as e:
+            return {'error': f'Insufficient tokens: {str(e)}'}
+        
+        # Execute delivery
+        campaign.status = 'active'
+        campaign.started_at = timezone.now()
+        campaign.save()
+        
+        return {'audience_size': audience_size, 'reservation': reservation}
+    
+    def _complete_campaign(self, campaign):
+        campaign.refresh_from_db(fields=['total_sent', 'total_failed', 'tokens_consumed'])
+        campaign.status = 'completed'
+        campaign.completed_at = timezone.now()
+        campaign.save(update_fields=['status', 'completed_at', 'updated_at'])
+        
+        # Refund tokens held for recipients that failed
+        if self.token_reservation is not None:
+            self.token_engine.settle_reservation(self.token_reservation)
+            self.token_reservation = None
+        
+        if campaign.campaign_type == 'drip':
+            # Recipients of the first message move on to the sequence's next step
+            sent = campaign.recipients.filter(status='sent').values_list('lead_id', flat=True)
+            queued = schedule_next_drip_step(campaign, sent.iterator(chunk_size=ENQUEUE_BATCH_SIZE), 1, campaign.completed_at)
+            logger.info(f"Drip campaign {campaign.id}: {queued} leads queued for step 1")
+    
+    async def _deliver_to_audience(self, campaign) -> Dict[str, Any]:
         """
-        Deliver campaign to audience with batching and rate limiting
+        Deliver campaign to its frozen audience in batches
+        Pending recipients are walked by lead id (keyset on the campaign,
+        status, lead index), so each batch is one indexed query however far
+        into the audience delivery has got; sending is paced by the delivery
+        scheduler's per-provider limits
         """
         sent_count = 0
         failed_count = 0
         tokens_used = 0
-        batch_size = 50  # Process in batches
+        batch_size = getattr(settings, 'CAMPAIGN_DELIVERY_BATCH_SIZE', 1000)
         
         # Get template
-        template = campaign.template
+        template = await database_sync_to_async(lambda: campaign.template)()
         if not template:
             raise ValueError("Campaign has no template")
         
-        # Process in batches to avoid overwhelming the system
-        for i in range(0, audience.count(), batch_size):
-            batch = audience[i:i + batch_size]
+        recipients = CampaignRecipient.objects.filter(
+            campaign=campaign, status='pending'
+        ).select_related('lead__property').order_by('lead_id')
+        last_lead_id = 0
+        
+        while True:
+            batch = await database_sync_to_async(list)(recipients.filter(lead_id__gt=last_lead_id)[:batch_size])
+            if not batch:
+                break
+            last_lead_id = batch[-1].lead_id
             
-            batch_results = await self._process_batch(campaign, template, batch)
+            batch_results = await self._process_batch(campaign, template, [recipient.lead for recipient in batch])
             sent_count += batch_results['sent']
             failed_count += batch_results['failed']
             tokens_used += batch_results['tokens']
             
-            # Rate limiting - pause between batches
-            if i + batch_size < audience.count():
-                await asyncio.sleep(1)  # 1 second pause between batches
+            if len(batch) < batch_size:
+                break
         
         return {
             'sent': sent_count,
@@ -403,103 +420,232 @@ class CampaignExecutor:
             'tokens_used': tokens_used
         }
     
+    async def deliver_to_leads(self, campaign, template: CommunicationTemplate,
+                               leads: List[Lead]) -> Dict[str, Any]:
+        """Send one batch outside a launch (scheduled drip steps and trigger follow-ups)"""
+        self.scheduler = DeliveryScheduler.from_settings()
+        try:
+            return await self._process_batch(campaign, template, leads)
+        finally:
+            self.scheduler.close()
+            self.scheduler = None
+            if self.token_reservation is not None:
+                # Refund what the batch held but did not spend
+                await database_sync_to_async(self.token_engine.settle_reservation)(self.token_reservation)
+                self.token_reservation = None
+    
     async def _process_batch(self, campaign, template: CommunicationTemplate, 
-                           leads: models.QuerySet) -> Dict[str, Any]:
-        """Process a batch of leads for campaign delivery"""
-        sent = 0
-        failed = 0
-        tokens = 0
+                           leads: List[Lead]) -> Dict[str, Any]:
+        """
+        Process a batch of leads for campaign delivery: render, draw tokens,
+        send, record
+        Tokens are drawn and the recipients moved out of pending before
+        anything is sent, so a crash mid-batch never sends a message twice;
+        messages the provider rejects give their tokens back when recorded
+        """
+        communications, failed = await database_sync_to_async(self._render_batch)(campaign, template, leads)
         
-        for lead in leads:
+        drawn = 0
+        if communications:
             try:
-                # Personalize content
-                personalized_content = self._personalize_content(template, lead)
-                
-                # Create communication record
-                communication = Communication.objects.create(
-                    lead=lead,
-                    campaign=campaign,
-                    template=template,
-                    communication_type=campaign.communication_type,
-                    subject=personalized_content['subject'],
-                    content=personalized_content['content'],
-                    status='sent',
-                    sent_at=timezone.now()
-                )
-                
-                # Consume tokens
-                cost = self._get_communication_cost(campaign.communication_type)
-                self.token_engine.consume_tokens(
-                    user=self.user,
-                    action_type=f"{campaign.communication_type}_send",
-                    quantity=cost,
-                    description=f"Campaign: {campaign.name}"
-                )
-                
-                sent += 1
-                tokens += cost
-                
-                # Update campaign metrics
-                campaign.update_metrics({
-                    'sent': models.F('total_sent') + 1
-                })
-                
+                drawn = await database_sync_to_async(self._claim_batch)(campaign, communications)
             except Exception as e:
-                logger.error(f"Failed to send to lead {lead.id}: {str(e)}")
-                failed += 1
-                
-                # Record failed communication
-                Communication.objects.create(
-                    lead=lead,
-                    campaign=campaign,
-                    template=template,
-                    communication_type=campaign.communication_type,
-                    status='failed',
-                    error_message=str(e),
-                    failed_at=timezone.now()
+                logger.error(f"Failed to draw tokens for batch of {len(communications)} for campaign {campaign.id}: {str(e)}")
+                now = timezone.now()
+                failed.extend(
+                    self._failed_communication(campaign, template, communication.lead, str(e), now)
+                    for communication in communications
+                )
+                communications = []
+        
+        communication_type = campaign.communication_type
+        if communications and self.scheduler is not None and self.scheduler.handles(communication_type):
+            results = await self.scheduler.send_all(communication_type, [
+                OutboundMessage(
+                    to=communication.email_address if communication_type == 'email' else communication.phone_number,
+                    subject=communication.subject,
+                    body=communication.content
                 )
+                for communication in communications
+            ])
+            delivered = []
+            for communication, result in zip(communications, results):
+                if result.sent:
+                    communication.external_id = result.external_id[:100]
+                    communication.sent_at = timezone.now()
+                    delivered.append(communication)
+                else:
+                    failed.append(self._failed_communication(
+                        campaign, template, communication.lead, result.error, timezone.now()
+                    ))
+            communications = delivered
+        
+        return await database_sync_to_async(self._write_batch)(campaign, template, communications, failed, drawn)
+    
+    def _render_batch(self, campaign, template: CommunicationTemplate,
+                      leads: List[Lead]) -> Tuple[List[Communication], List[Communication]]:
+        """Unsaved sent and failed Communication rows for a batch"""
+        action_type = f"{campaign.communication_type}_send"
+        action_config = self.token_engine.ACTION_COSTS.get(action_type, {})
+        quantity = self._get_communication_cost(campaign.communication_type)
+        token_type = action_config.get('token_type', 'regular')
+        now = timezone.now()
         
-        return {'sent': sent, 'failed': failed, 'tokens': tokens}
+        try:
+            # Personalize content for the whole batch
+            rendered = self._personalize_batch(template, leads)
+        except Exception:
+            # Find the leads that cannot be rendered
+            rendered = []
+            for lead in leads:
+                try:
+                    rendered.append(self._personalize_content(template, lead))
+                except Exception as e:
+                    rendered.append(e)
+        
+        communications = []
+        failed = []
+        for lead, personalized_content in zip(leads, rendered):
+            if isinstance(personalized_content, Exception):
+                logger.error(f"Failed to send to lead {lead.id}: {str(personalized_content)}")
+                failed.append(self._failed_communication(campaign, template, lead, str(personalized_content), now))
+                continue
+            
+            communications.append(Communication(
+                user=self.user,
+                lead=lead,
+                campaign=campaign,
+                template=template,
+                type=campaign.communication_type,
+                direction='outbound',
+                subject=personalized_content['subject'][:255],
+                content=personalized_content['content'],
+                status='sent',
+                sent_at=now,
+                email_address=lead.email or '',
+                phone_number=(lead.phone_cell or '')[:20],
+                tokens_cost=int(action_config.get('tokens', 0) * quantity),
+                token_type=token_type
+            ))
+        
+        return communications, failed
     
-    def _personalize_content(self, template: CommunicationTemplate, lead: Lead) -> Dict[str, str]:
+    def _claim_batch(self, campaign, communications: List[Communication]) -> int:
         """
-        Personalize template content with lead data
-        Advanced templating with property information
+        Draw the tokens for every message of a batch from the reservation and
+        mark the recipients sent, before the messages go out
+        Outside a launch the batch first holds its own tokens (settled by
+        deliver_to_leads). Returns the tokens drawn
         """
-        context = {
-            'first_name': lead.first_name or 'Property Owner',
-            'last_name': lead.last_name or '',
-            'full_name': f"{lead.first_name} {lead.last_name}".strip() or 'Property Owner',
-            'property_address': '',
-            'property_value': '',
-            'taxes_due': '',
-            'city': lead.mailing_city or '',
-            'state': lead.mailing_state or '',
-            'zip_code': lead.mailing_zip5 or '',
-        }
+        action_type = f"{campaign.communication_type}_send"
+        quantity = self._get_communication_cost(campaign.communication_type) * len(communications)
+        
+        if self.token_reservation is None:
+            self.token_reservation = self.token_engine.reserve_tokens(
+                self.user, action_type, quantity,
+                description=f"Campaign: {campaign.name} ({len(communications)} recipients)",
+                reference_id=str(campaign.id)
+            )
         
-        # Add property context if available
-        if lead.property:
-            context.update({
-                'property_address': lead.property.address1 or '',
-                'property_city': lead.property.city or '',
-                'property_value': f"${lead.property.total_value:,.2f}" if lead.property.total_value else '',
-                'taxes_due': f"${lead.property.ple_amount_due:,.2f}" if lead.property.ple_amount_due else '',
-                'property_type': lead.property.property_type or 'property',
-            })
+        _, cost = self.token_engine.action_cost(action_type, quantity)
+        with transaction.atomic():
+            self.token_engine.draw_reserved_tokens(self.token_reservation, cost)
+            self._mark_recipients(campaign, communications, 'sent', timezone.now())
+        return cost
+    
+    def _write_batch(self, campaign, template: CommunicationTemplate, communications: List[Communication],
+                     failed: List[Communication], drawn: int = 0) -> Dict[str, Any]:
+        """
+        Record a batch after sending with a fixed number of queries: the
+        undelivered share of the drawn tokens goes back to the reservation,
+        then one bulk insert of sent and one of failed Communication rows, one
+        status update of the failed recipients, the rollup increments and one
+        F() update of the campaign counters
+        """
+        from .communication_models import Campaign
         
-        # Simple template replacement (could be enhanced with Jinja2)
-        subject = template.subject
-        content = template.content
+        action_type = f"{campaign.communication_type}_send"
+        quantity = self._get_communication_cost(campaign.communication_type)
+        now = timezone.now()
         
-        for key, value in context.items():
-            subject = subject.replace(f"{{{key}}}", str(value))
-            content = content.replace(f"{{{key}}}", str(value))
+        tokens = self.token_engine.action_cost(action_type, quantity * len(communications))[1] if communications else 0
+        if drawn > tokens:
+            try:
+                self.token_engine.return_reserved_tokens(self.token_reservation, drawn - tokens)
+            except Exception as e:
+                logger.error(f"Failed to return {drawn - tokens} tokens for campaign {campaign.id}: {str(e)}")
         
-        return {
-            'subject': subject,
-            'content': content
-        }
+        if communications:
+            try:
+                with transaction.atomic():
+                    Communication.objects.bulk_create(communications)
+                    campaign_rollups.record_changes(after=map(campaign_rollups.snapshot, communications))
+            except Exception as e:
+                # The messages went out: keep their provider ids row by row
+                logger.error(f"Failed to record batch of {len(communications)} for campaign {campaign.id}: {str(e)}")
+                for communication in communications:
+                    communication.pk = None
+                    communication._state.adding = True
+                    try:
+                        communication.save()
+                    except Exception as e:
+                        logger.error(
+                            f"Lost record of message {communication.external_id or '(no id)'} to lead "
+                            f"{communication.lead_id} for campaign {campaign.id}: {str(e)}"
+                        )
+        
+        # Record failed communications
+        if failed:
+            with transaction.atomic():
+                Communication.objects.bulk_create(failed)
+                self._mark_recipients(campaign, failed, 'failed', now)
+                campaign_rollups.record_changes(after=map(campaign_rollups.snapshot, failed))
+        
+        # Update campaign metrics
+        Campaign.objects.filter(pk=campaign.pk).update(
+            total_sent=models.F('total_sent') + len(communications),
+            total_failed=models.F('total_failed') + len(failed),
+            tokens_consumed=models.F('tokens_consumed') + tokens,
+            updated_at=now
+        )
+        
+        return {'sent': len(communications), 'failed': len(failed), 'tokens': tokens}
+    
+    def _mark_recipients(self, campaign, communications: List[Communication], status: str, now: datetime):
+        """Move the snapshot rows of these communications' leads out of pending"""
+        CampaignRecipient.objects.filter(
+            campaign=campaign, lead_id__in=[communication.lead_id for communication in communications]
+        ).update(status=status, sent_at=now if status == 'sent' else None)
+    
+    def _failed_communication(self, campaign, template: CommunicationTemplate, lead: Lead,
+                              error: str, failed_at: datetime) -> Communication:
+        return Communication(
+            user=self.user,
+            lead=lead,
+            campaign=campaign,
+            template=template,
+            type=campaign.communication_type,
+            direction='outbound',
+            status='failed',
+            external_error=error,
+            failed_at=failed_at
+        )
+    
+    def _personalize_content(self, template: CommunicationTemplate, lead: Lead) -> Dict[str, str]:
+        """
+        Personalize template content with lead data
+        Advanced templating with property information
+        """
+        return self._personalize_batch(template, [lead])[0]
+    
+    def _personalize_batch(self, template: CommunicationTemplate, leads: List[Lead]) -> List[Dict[str, str]]:
+        """Personalized subject and content for each lead, from the template's compiled segments"""
+        subjects = compiled_field(template, 'subject').render_batch(leads, PERSONALIZATION_VARIABLES)
+        contents = compiled_field(template, 'content').render_batch(leads, PERSONALIZATION_VARIABLES)
+        return [
+            {'subject': subject, 'content': content}
+            for subject, content in zip(subjects, contents)
+        ]
     
     def _get_communication_cost(self, communication_type: str) -> int:
         """Get token cost for communication type"""
@@ -521,53 +667,41 @@ class CampaignAnalytics:
     def __init__(self, user: User):
         self.user = user
     
+    def get_delivery_progress(self, campaign) -> Optional[Dict[str, Any]]:
+        """Recipient counts by status from the audience snapshot (None before launch)"""
+        if campaign.audience_frozen_at is None:
+            return None
+        
+        counts = dict(
+            CampaignRecipient.objects.filter(campaign=campaign)
+            .values_list('status').annotate(count=models.Count('id')).order_by()
+        )
+        audience_size = campaign.audience_size or 0
+        pending = counts.pop('pending', 0)
+        return {
+            'audience_size': audience_size,
+            'frozen_at': campaign.audience_frozen_at.isoformat(),
+            'pending': pending,
+            'by_status': counts,
+            'percent_complete': round((audience_size - pending) / audience_size * 100, 2) if audience_size else 100.0
+        }
+    
     def get_campaign_performance(self, campaign) -> Dict[str, Any]:
-        """Get comprehensive campaign performance metrics"""
-        communications = Communication.objects.filter(campaign=campaign)
-        
-        # Basic metrics
-        total_sent = communications.filter(status='sent').count()
-        total_failed = communications.filter(status='failed').count()
-        total_opened = communications.filter(opened_at__isnull=False).count()
-        total_clicked = communications.filter(clicked_at__isnull=False).count()
-        total_responded = communications.filter(response_received=True).count()
-        
-        # Calculate rates
-        delivery_rate = (total_sent / (total_sent + total_failed) * 100) if (total_sent + total_failed) > 0 else 0
-        open_rate = (total_opened / total_sent * 100) if total_sent > 0 else 0
-        click_rate = (total_clicked / total_sent * 100) if total_sent > 0 else 0
-        response_rate = (total_responded / total_sent * 100) if total_sent > 0 else 0
-        
-        # Cost analysis
-        total_cost = campaign.tokens_consumed or 0
-        cost_per_send = total_cost / total_sent if total_sent > 0 else 0
-        cost_per_response = total_cost / total_responded if total_responded > 0 else 0
+        """Get comprehensive campaign performance metrics (from the campaign rollups)"""
+        progress = self.get_delivery_progress(campaign)
+        metrics = self._rollup_metrics(self._rollup(campaign))
         
         # Time-based analysis
-        hourly_stats = self._get_hourly_engagement_stats(communications)
+        hourly_stats = self._get_hourly_engagement_stats(campaign)
         
         return {
             'campaign_id': campaign.id,
             'campaign_name': campaign.name,
             'status': campaign.status,
-            'delivery_metrics': {
-                'total_sent': total_sent,
-                'total_failed': total_failed,
-                'delivery_rate': round(delivery_rate, 2)
-            },
-            'engagement_metrics': {
-                'total_opened': total_opened,
-                'total_clicked': total_clicked,
-                'total_responded': total_responded,
-                'open_rate': round(open_rate, 2),
-                'click_rate': round(click_rate, 2),
-                'response_rate': round(response_rate, 2)
-            },
-            'cost_metrics': {
-                'total_cost': total_cost,
-                'cost_per_send': round(cost_per_send, 2),
-                'cost_per_response': round(cost_per_response, 2) if total_responded > 0 else None
-            },
+            'delivery_metrics': metrics['delivery_metrics'],
+            'progress': progress,
+            'engagement_metrics': metrics['engagement_metrics'],
+            'cost_metrics': metrics['cost_metrics'],
             'timing_analysis': hourly_stats,
             'duration': {
                 'started_at': campaign.started_at.isoformat() if campaign.started_at else None,
@@ -577,21 +711,22 @@ class CampaignAnalytics:
         }
     
     def get_comparative_analysis(self, campaign_ids: List[int]) -> Dict[str, Any]:
-        """Compare multiple campaigns"""
-        campaigns = Campaign.objects.filter(id__in=campaign_ids, user=self.user)
+        """Compare multiple campaigns (one query: campaigns joined to their rollups)"""
+        from .communication_models import Campaign
+        campaigns = Campaign.objects.filter(id__in=campaign_ids, user=self.user).select_related('rollup')
         
         comparison_data = []
         for campaign in campaigns:
-            performance = self.get_campaign_performance(campaign)
+            metrics = self._rollup_metrics(self._rollup(campaign))
             comparison_data.append({
                 'campaign_id': campaign.id,
                 'name': campaign.name,
                 'type': campaign.communication_type,
-                'delivery_rate': performance['delivery_metrics']['delivery_rate'],
-                'open_rate': performance['engagement_metrics']['open_rate'],
-                'response_rate': performance['engagement_metrics']['response_rate'],
-                'cost_per_response': performance['cost_metrics']['cost_per_response'],
-                'total_sent': performance['delivery_metrics']['total_sent']
+                'delivery_rate': metrics['delivery_metrics']['delivery_rate'],
+                'open_rate': metrics['engagement_metrics']['open_rate'],
+                'response_rate': metrics['engagement_metrics']['response_rate'],
+                'cost_per_response': metrics['cost_metrics']['cost_per_response'],
+                'total_sent': metrics['delivery_metrics']['total_sent']
             })
         
         return {
@@ -599,21 +734,64 @@ class CampaignAnalytics:
             'insights': self._generate_comparison_insights(comparison_data)
         }
     
-    def _get_hourly_engagement_stats(self, communications: models.QuerySet) -> Dict[str, Any]:
-        """Analyze engagement patterns by hour"""
-        from django.db.models import Count, Q
-        from django.db.models.functions import Extract
+    @staticmethod
+    def _rollup(campaign) -> CampaignRollup:
+        """The campaign's rollup row (all zero before its first communication)"""
+        try:
+            return campaign.rollup
+        except CampaignRollup.DoesNotExist:
+            return CampaignRollup(campaign=campaign)
+    
+    def _rollup_metrics(self, rollup: CampaignRollup) -> Dict[str, Any]:
+        """Delivery, engagement and cost metrics from a rollup row"""
+        total_sent, total_failed = rollup.sent, rollup.failed
+        total_responded = rollup.responded
+        
+        # Calculate rates
+        delivery_rate = (total_sent / (total_sent + total_failed) * 100) if (total_sent + total_failed) > 0 else 0
+        open_rate = (rollup.opened / total_sent * 100) if total_sent > 0 else 0
+        click_rate = (rollup.clicked / total_sent * 100) if total_sent > 0 else 0
+        response_rate = (total_responded / total_sent * 100) if total_sent > 0 else 0
         
-        hourly_opens = communications.filter(
-            opened_at__isnull=False
-        ).extra(
-            select={'hour': 'EXTRACT(hour FROM opened_at)'}
-        ).values('hour').annotate(
-            count=Count('id')
-        ).order_by('hour')
+        # Cost analysis
+        total_cost = rollup.cost
+        cost_per_send = total_cost / total_sent if total_sent > 0 else 0
+        cost_per_response = total_cost / total_responded if total_responded > 0 else 0
         
         return {
-            'peak_open_hours': list(hourly_opens),
+            'delivery_metrics': {
+                'total_sent': total_sent,
+                'total_failed': total_failed,
+                'total_delivered': rollup.delivered,
+                'total_bounced': rollup.bounced,
+                'delivery_rate': round(delivery_rate, 2)
+            },
+            'engagement_metrics': {
+                'total_opened': rollup.opened,
+                'total_clicked': rollup.clicked,
+                'total_responded': total_responded,
+                'open_rate': round(open_rate, 2),
+                'click_rate': round(click_rate, 2),
+                'response_rate': round(response_rate, 2)
+            },
+            'cost_metrics': {
+                'total_cost': total_cost,
+                'cost_per_send': round(cost_per_send, 2),
+                'cost_per_response': round(cost_per_response, 2) if total_responded > 0 else None
+            }
+        }
+    
+    def _get_hourly_engagement_stats(self, campaign) -> Dict[str, Any]:
+        """Analyze engagement patterns by hour of day (from the hourly rollups)"""
+        opens_by_hour = Counter()
+        for hour, opened in CampaignHourlyRollup.objects.filter(
+            campaign=campaign, opened__gt=0
+        ).values_list('hour', 'opened'):
+            opens_by_hour[timezone.localtime(hour).hour] += opened
+        
+        hourly_opens = [{'hour': hour, 'count': count} for hour, count in sorted(opens_by_hour.items())]
+        return {
+            'peak_open_hours': hourly_opens,
             'best_open_hour': max(hourly_opens, key=lambda x: x['count'])['hour'] if hourly_opens else None
         }
     
@@ -693,11 +871,8 @@ class CampaignService:
         
         # Set up scheduling if provided
         if 'schedule' in campaign_data:
-            schedule_result = self.scheduler.schedule_campaign(
-                campaign, campaign_data['schedule']
-            )
-            campaign.scheduled_start = schedule_result.get('delivery_time')
-            campaign.save()
+            # Sets and saves the campaign's status and scheduled start
+            self.scheduler.schedule_campaign(campaign, campaign_data['schedule'])
         
         return campaign
     
@@ -705,7 +880,7 @@ class CampaignService:
         """Launch a campaign"""
         try:
             from .communication_models import Campaign
-            campaign = Campaign.objects.get(id=campaign_id, user=self.user)
+            campaign = await database_sync_to_async(Campaign.objects.get)(id=campaign_id, user=self.user)
             
             if campaign.status != 'draft' and campaign.status != 'scheduled':
                 raise ValueError(f"Cannot launch campaign with status: {campaign.status}")
@@ -715,7 +890,7 @@ class CampaignService:
         except Campaign.DoesNotExist:
             raise ValueError("Campaign not found")
     
-    def preview_campaign(self, campaign_id: int, sample_size: int = 5) -> Dict[str, Any]:
+    def preview_campaign(self, campaign_id: int, sample_size: int = 5, exact: bool = False) -> Dict[str, Any]:
         """Preview campaign with sample audience and content"""
         from .communication_models import Campaign
         campaign = Campaign.objects.get(id=campaign_id, user=self.user)
@@ -736,7 +911,7 @@ class CampaignService:
                 })
         
         # Audience analysis
-        audience_analysis = self.targeting_engine.analyze_audience(campaign.targeting_criteria)
+        audience_analysis = self.targeting_engine.analyze_audience(campaign.targeting_criteria, exact=exact)
         
         return {
             'campaign': {
@@ -765,11 +940,11 @@ class CampaignService:
         active_campaigns = campaigns.filter(status='active').count()
         completed_campaigns = campaigns.filter(status='completed').count()
         
-        # Recent performance
-        recent_campaigns = campaigns[:5]
+        # Recent performance (read from the campaign rollups in the same query)
+        recent_campaigns = campaigns.select_related('rollup')[:5]
         recent_performance = []
         for campaign in recent_campaigns:
-            perf = self.analytics.get_campaign_performance(campaign)
+            perf = self.analytics._rollup_metrics(self.analytics._rollup(campaign))
             recent_performance.append({
                 'id': campaign.id,
                 'name': campaign.name,
@@ -277,7 +277,7 @@ def preview_campaign_api(request, campaign_id):
         data = json.loads(request.body) if request.body else {}
         sample_size = data.get('sample_size', 5)
         
-        preview = campaign_service.preview_campaign(campaign_id, sample_size)
+        preview = campaign_service.preview_campaign(campaign_id, sample_size, exact=bool(data.get('exact')))
         
         return Response(preview)
         
@@ -296,8 +296,10 @@ def test_audience_api(request):
         
         campaign_service = CampaignService(request.user)
         
-        # Analyze audience
-        analysis = campaign_service.targeting_engine.analyze_audience(targeting_criteria)
+        # Analyze audience (sampled estimate unless an exact count is asked for)
+        analysis = campaign_service.targeting_engine.analyze_audience(
+            targeting_criteria, exact=bool(data.get('exact'))
+        )
         
         return Response({
             'audience_analysis': analysis,
@@ -8,6 +8,19 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 from decimal import Decimal
 from .models import Lead, TokenTransaction
+from .template_engine import compiled_field
+
+
+# {variable} -> text for CommunicationTemplate.render_content
+TEMPLATE_VARIABLES = {
+    'first_name': lambda lead: str(lead.first_name or ''),
+    'last_name': lambda lead: str(lead.last_name or ''),
+    'full_name': lambda lead: f"{lead.first_name} {lead.last_name}",
+    'address': lambda lead: str(lead.mailing_address_1 or ''),
+    'city': lambda lead: str(lead.mailing_city or ''),
+    'state': lambda lead: str(lead.mailing_state or ''),
+    'zip': lambda lead: str(lead.mailing_zip5 or ''),
+}
 
 
 class Communication(models.Model):
@@ -158,22 +171,16 @@ class CommunicationTemplate(models.Model):
     
     def render_content(self, lead, **kwargs):
         """Render template with lead data"""
-        context = {
-            'first_name': lead.first_name,
-            'last_name': lead.last_name,
-            'full_name': f"{lead.first_name} {lead.last_name}",
-            'address': lead.mailing_address_1,
-            'city': lead.mailing_city,
-            'state': lead.mailing_state,
-            'zip': lead.mailing_zip5,
-            **kwargs
-        }
-        
-        content = self.content
-        for key, value in context.items():
-            content = content.replace(f"{{{key}}}", str(value or ''))
-        
-        return content
+        return self.render_batch([lead], **kwargs)[0]
+    
+    def render_batch(self, leads, field_name: str = 'content', **kwargs):
+        """Render the subject or content for each lead; extra kwargs fill the same {variable} for every lead"""
+        variables = TEMPLATE_VARIABLES
+        if kwargs:
+            variables = {**variables, **{
+                name: (lambda lead, text=str(value or ''): text) for name, value in kwargs.items()
+            }}
+        return compiled_field(self, field_name).render_batch(leads, variables)
 
 
 class Campaign(models.Model):
@@ -219,6 +226,10 @@ class Campaign(models.Model):
     # Enhanced targeting criteria
     targeting_criteria = models.JSONField(default=dict, blank=True, help_text="Advanced targeting criteria")
     
+    # Audience snapshot (CampaignRecipient rows written at launch)
+    audience_size = models.IntegerField(null=True, blank=True)
+    audience_frozen_at = models.DateTimeField(null=True, blank=True)
+    
     # Campaign configuration (for drip, triggered campaigns)
     configuration = models.JSONField(default=dict, blank=True, help_text="Campaign configuration like drip sequence, triggers, etc.")
     
@@ -313,13 +324,17 @@ class Campaign(models.Model):
 class CampaignRecipient(models.Model):
     """
     Individual recipients in a campaign
+    A campaign's audience is frozen into these rows at launch; delivery walks
+    the pending rows by lead id
     """
+    STATUS_CHOICES = [('pending', 'Pending')] + Communication.STATUS_CHOICES
+    
     campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='recipients')
     lead = models.ForeignKey(Lead, on_delete=models.CASCADE)
     communication = models.OneToOneField(Communication, on_delete=models.CASCADE, null=True, blank=True)
     
     # Status tracking
-    status = models.CharField(max_length=20, choices=Communication.STATUS_CHOICES, default='sent')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     
     # Timestamps
     added_at = models.DateTimeField(auto_now_add=True)
@@ -330,11 +345,113 @@ class CampaignRecipient(models.Model):
     
     class Meta:
         unique_together = ['campaign', 'lead']
+        indexes = [
+            # Delivery keyset scans and progress counts
+            models.Index(fields=['campaign', 'status', 'lead']),
+        ]
     
     def __str__(self):
         return f"{self.campaign.name} → {self.lead.first_name} {self.lead.last_name}"
 
 
+class ScheduledAction(models.Model):
+    """
+    Due-time entry for scheduled campaign work
+    Launches are campaign-wide; drip steps and trigger follow-ups are per
+    lead. Workers claim due pending entries oldest first (campaign_actions)
+    """
+    ACTION_TYPES = [
+        ('launch', 'Campaign Launch'),
+        ('drip_step', 'Drip Step'),
+        ('trigger_followup', 'Trigger Follow-up'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('claimed', 'Claimed'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='scheduled_actions')
+    lead = models.ForeignKey(Lead, on_delete=models.CASCADE, null=True, blank=True)
+    action_type = models.CharField(max_length=20, choices=ACTION_TYPES)
+    step = models.IntegerField(default=0, help_text="Drip sequence step (launch is step 0)")
+
+    due_at = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+
+    # Claim tracking
+    attempts = models.IntegerField(default=0)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    # Set before the lead is handed to delivery; a stamped entry is never sent again
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['due_at']
+        indexes = [
+            # Due pending entries in due order, and claims past their lease
+            models.Index(fields=['status', 'due_at']),
+            models.Index(fields=['campaign', 'action_type', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_action_type_display()} for {self.campaign.name} at {self.due_at}"
+
+
+class RollupCounters(models.Model):
+    """
+    Delivery and engagement counters shared by the campaign rollups
+    Only changed through F() increments (see campaign_rollups)
+    """
+    sent = models.IntegerField(default=0)
+    delivered = models.IntegerField(default=0)
+    opened = models.IntegerField(default=0)
+    clicked = models.IntegerField(default=0)
+    responded = models.IntegerField(default=0)
+    bounced = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    cost = models.IntegerField(default=0, help_text="Tokens charged for the communications")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class CampaignRollup(RollupCounters):
+    """
+    Running totals for a campaign's communications
+    """
+    campaign = models.OneToOneField(Campaign, on_delete=models.CASCADE, related_name='rollup')
+
+    def __str__(self):
+        return f"{self.campaign.name} rollup"
+
+
+class CampaignHourlyRollup(RollupCounters):
+    """
+    A campaign's counters per hour; each event counts in the hour it happened
+    (sends at sent_at, opens at opened_at, ...)
+    """
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='hourly_rollups')
+    hour = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['campaign', 'hour']
+        ordering = ['hour']
+
+    def __str__(self):
+        return f"{self.campaign.name} @ {self.hour}"
+
+
 class CommunicationAnalytics(models.Model):
     """
     Daily analytics for communication tracking
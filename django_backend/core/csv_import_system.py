@@ -4,14 +4,14 @@ Handles TARRANT-style tax delinquent property data with 79+ fields
 Based on the original Node.js system's sophisticated import capabilities
 """
 
-import csv
-import io
 import logging
+import os
 import re
 import asyncio
 from decimal import Decimal, InvalidOperation
 from datetime import datetime, date
 from typing import Dict, List, Optional, Tuple, Any
+from django.conf import settings
 from django.db import transaction, models
 from django.utils import timezone
 from django.core.exceptions import ValidationError
@@ -19,6 +19,10 @@ from django.contrib.auth.models import User
 
 from .models import Lead, Property, County, TokenTransaction
 from .token_engine import TokenEngine
+from .csv_streaming import StreamingCSVReader
+from .campaign_actions import fire_trigger
+from .dedup_index import DedupIndex
+from .filter_materialization import deferred_invalidation
 from .user_roles import UserPermission
 
 logger = logging.getLogger(__name__)
@@ -122,8 +126,23 @@ class TarrantCSVProcessor:
         'DataQuality': 'data_quality_score',
     }
     
-    def __init__(self, user: User):
+    # Field groups cleaned alike by clean_and_validate_field
+    CURRENCY_FIELDS = ['tax_amount', 'fees_amount', 'prior_due_amount', 'total_amount_due',
+                       'assessed_value', 'land_value', 'improvement_value', 'last_payment_amount']
+    RATE_FIELDS = ['loan_to_value', 'interest_rate', 'penalty_rate', 'data_quality_score']
+    INTEGER_FIELDS = ['year_built', 'square_feet', 'bedrooms', 'tax_year']
+    DATE_FIELDS = ['last_payment_date', 'import_date', 'last_updated']
+    BOOLEAN_FIELDS = ['do_not_mail', 'do_not_email', 'do_not_call', 'homestead_exemption',
+                      'disabled_exemption', 'senior_exemption', 'veteran_exemption']
+    COORDINATE_RANGES = {'latitude': 90, 'longitude': 180}
+    
+    def __init__(self, user: User, workers: int = None):
         self.user = user
+        # Worker processes for row cleaning (1 = clean in-process)
+        self.workers = workers if workers is not None else getattr(settings, 'CSV_IMPORT_WORKERS', 1)
+        if self.workers <= 0:
+            self.workers = os.cpu_count() or 1
+        self.parallel_min_rows = getattr(settings, 'CSV_IMPORT_PARALLEL_MIN_ROWS', 20000)
         self.import_stats = {
             'total_rows': 0,
             'processed_rows': 0,
@@ -134,14 +153,22 @@ class TarrantCSVProcessor:
             'tokens_used': 0
         }
         self.batch_size = 100  # Process in batches
+        self.inserted_rows = 0
+        self.token_reservation = None
+        self._county_cache = {}  # (name, state) -> County
+        self.dedup_index = DedupIndex()
     
-    def validate_csv_structure(self, file_content: str) -> Tuple[bool, str, List[str]]:
+    def validate_csv_structure(self, file_content) -> Tuple[bool, str, List[str]]:
         """
         Validate CSV structure and return headers
+        file_content may be a str or a (binary or text) file object; rows are
+        counted in one streaming pass and the file is rewound afterwards
         """
         try:
-            csv_reader = csv.reader(io.StringIO(file_content))
-            headers = next(csv_reader)
+            csv_reader = StreamingCSVReader(file_content)
+            headers = csv_reader.read_headers()
+            if not headers:
+                return False, "CSV file is empty", []
             
             # Check for minimum required fields
             required_fields = ['OwnerName', 'PropStreet', 'Tax', 'ValueAss']
@@ -151,11 +178,11 @@ class TarrantCSVProcessor:
                 return False, f"Missing required fields: {', '.join(missing_fields)}", headers
             
             # Check row count
-            sample_rows = list(csv_reader)
-            if len(sample_rows) == 0:
+            total_rows = csv_reader.count_rows()
+            if total_rows == 0:
                 return False, "CSV file contains no data rows", headers
             
-            self.import_stats['total_rows'] = len(sample_rows)
+            self.import_stats['total_rows'] = total_rows
             
             return True, "CSV structure is valid", headers
         
@@ -173,22 +200,21 @@ class TarrantCSVProcessor:
         
         try:
             # Handle different field types
-            if field_name in ['tax_amount', 'fees_amount', 'prior_due_amount', 'total_amount_due', 
-                             'assessed_value', 'land_value', 'improvement_value', 'last_payment_amount']:
+            if field_name in self.CURRENCY_FIELDS:
                 # Clean currency values
                 clean_value = re.sub(r'[,$\s]', '', value)
                 if clean_value:
                     return Decimal(clean_value), None
                 return None, None
             
-            elif field_name in ['loan_to_value', 'interest_rate', 'penalty_rate', 'data_quality_score']:
+            elif field_name in self.RATE_FIELDS:
                 # Handle percentages and rates
                 clean_value = re.sub(r'[%\s]', '', value)
                 if clean_value:
                     return float(clean_value), None
                 return None, None
             
-            elif field_name in ['year_built', 'square_feet', 'bedrooms', 'tax_year']:
+            elif field_name in self.INTEGER_FIELDS:
                 # Integer fields
                 clean_value = re.sub(r'[,\s]', '', value)
                 if clean_value.isdigit():
@@ -203,23 +229,21 @@ class TarrantCSVProcessor:
                 except ValueError:
                     return None, f"Invalid bathroom count: {value}"
             
-            elif field_name in ['last_payment_date', 'import_date', 'last_updated']:
+            elif field_name in self.DATE_FIELDS:
                 # Date fields
                 return self.parse_date(value), None
             
-            elif field_name in ['do_not_mail', 'do_not_email', 'do_not_call', 'homestead_exemption',
-                               'disabled_exemption', 'senior_exemption', 'veteran_exemption']:
+            elif field_name in self.BOOLEAN_FIELDS:
                 # Boolean fields
                 return value.lower() in ['true', 'yes', '1', 'y'], None
             
-            elif field_name in ['latitude', 'longitude']:
+            elif field_name in self.COORDINATE_RANGES:
                 # Geographic coordinates
                 try:
                     coord = float(value)
-                    if field_name == 'latitude' and not (-90 <= coord <= 90):
-                        return None, f"Invalid latitude: {value}"
-                    elif field_name == 'longitude' and not (-180 <= coord <= 180):
-                        return None, f"Invalid longitude: {value}"
+                    limit = self.COORDINATE_RANGES[field_name]
+                    if not (-limit <= coord <= limit):
+                        return None, f"Invalid {field_name}: {value}"
                     return coord, None
                 except ValueError:
                     return None, f"Invalid coordinate: {value}"
@@ -333,49 +357,79 @@ class TarrantCSVProcessor:
                 'zip_code': ''
             }
     
-    @transaction.atomic
-    def process_csv_file(self, file_content: str, batch_id: str = None) -> Dict:
+    def process_csv_file(self, file_content, batch_id: str = None, job=None) -> Dict:
         """
         Process the entire CSV file with proper error handling and batch processing
+        file_content may be a str or a file object; rows are streamed, so only
+        one batch is held in memory at a time
+        Without a job the file is imported in one transaction; with a
+        CSVImportJob each batch commits together with a checkpoint and the
+        import continues after the job's last committed batch
         """
+        if job is None:
+            with transaction.atomic():
+                return self._import_rows(file_content, batch_id)
+        
+        try:
+            return self._import_rows(file_content, batch_id, job)
+        except Exception:
+            job.status = 'failed'
+            job.save(update_fields=['status'])
+            raise
+    
+    def _import_rows(self, file_content, batch_id: str = None, job=None) -> Dict:
         # Validate structure first
         is_valid, message, headers = self.validate_csv_structure(file_content)
         if not is_valid:
             raise CSVImportError(message)
         
-        # Check token availability for large imports
-        estimated_tokens = max(1, self.import_stats['total_rows'] // 100)  # 1 token per 100 rows
-        try:
-            TokenEngine.consume_tokens(
-                user=self.user,
-                action_type='csv_import_row',
-                quantity=estimated_tokens,
-                description=f"CSV import of {self.import_stats['total_rows']} rows"
-            )
-            self.import_stats['tokens_used'] = estimated_tokens
-        except ValueError as e:
-            raise CSVImportError(f"Insufficient tokens for import: {str(e)}")
+        if job is not None:
+            self.import_stats['tokens_used'] = job.tokens_used
+        if job is not None and job.token_reservation_id and job.token_reservation.status == 'held':
+            # Resumed import - keep drawing from the first run's hold
+            self.token_reservation = job.token_reservation
+        elif job is not None and job.tokens_used and not job.token_reservation_id:
+            # Resumed import charged in full by the first run
+            pass
+        else:
+            with transaction.atomic():
+                self.reserve_import_tokens(job)
+                if job is not None:
+                    job.total_rows = self.import_stats['total_rows']
+                    job.save(update_fields=['token_reservation', 'total_rows'])
         
         # Process CSV in batches
-        csv_reader = csv.DictReader(io.StringIO(file_content))
+        if not isinstance(file_content, str):
+            file_content.seek(0)
+        csv_reader = StreamingCSVReader(file_content)
+        start_row = 1
+        if job is not None and job.checkpoint_row:
+            self.restore_progress(job)
+            csv_reader.seek(job.checkpoint_offset, job.checkpoint_encoding)
+            start_row = job.checkpoint_row + 1
+            logger.info(f"Resuming import {job.pk} after row {job.checkpoint_row} "
+                        f"(batch {job.checkpoint_batch}, byte {job.checkpoint_offset})")
         batch = []
+        row_number, row_offset = start_row - 1, csv_reader.row_offset
         
-        for row_number, row in enumerate(csv_reader, start=1):
+        for row_number, row, row_offset, processed_row, error in self.clean_rows(csv_reader, headers, start_row):
             try:
-                processed_row = self.process_csv_row(row, row_number, headers)
+                if error is not None:
+                    raise CSVImportError(error)
                 if processed_row:
                     batch.append(processed_row)
+                self.import_stats['processed_rows'] += 1
                 
                 # Process batch when it reaches batch_size
                 if len(batch) >= self.batch_size:
-                    self.process_batch(batch, batch_id)
+                    self.commit_batch(batch, batch_id, job, row_number, row_offset, csv_reader.encoding)
                     batch = []
                 
-                self.import_stats['processed_rows'] += 1
-                
                 # Progress logging for large imports
                 if row_number % 1000 == 0:
-                    logger.info(f"Processed {row_number} rows...")
+                    self.import_stats['bytes_processed'] = csv_reader.bytes_read
+                    logger.info(f"Processed {row_number} rows "
+                                f"({csv_reader.progress_percentage:.1f}% of {csv_reader.total_bytes or '?'} bytes)...")
             
             except Exception as e:
                 self.import_stats['failed_rows'] += 1
@@ -387,16 +441,116 @@ class TarrantCSVProcessor:
                 logger.error(f"Error processing row {row_number}: {str(e)}")
         
         # Process remaining batch
-        if batch:
-            self.process_batch(batch, batch_id)
+        if batch or job is not None:
+            self.commit_batch(batch, batch_id, job, row_number, row_offset, csv_reader.encoding)
+        
+        self.notify_bulk_insert()
+        self.import_stats['bytes_processed'] = csv_reader.bytes_read
+        self.import_stats['encoding'] = csv_reader.encoding
         
         # Final statistics
         self.import_stats['success_rate'] = (
             self.import_stats['successful_rows'] / max(self.import_stats['processed_rows'], 1)
         ) * 100
         
+        self.settle_import_tokens()
+        
+        if job is not None:
+            job.status = 'completed'
+            job.completed_at = timezone.now()
+            job.save(update_fields=['status', 'completed_at'])
+        
         return self.import_stats
     
+    def reserve_import_tokens(self, job=None):
+        """
+        Hold 1 token per 100 rows (minimum 1) for the import; tokens are drawn
+        as rows are imported and the rest is refunded by settle_import_tokens
+        """
+        estimated_tokens = max(1, self.import_stats['total_rows'] // 100)
+        try:
+            self.token_reservation = TokenEngine.reserve_tokens(
+                user=self.user,
+                action_type='csv_import_row',
+                quantity=estimated_tokens,
+                description=f"CSV import of {self.import_stats['total_rows']} rows",
+                reference_id=job.batch_id if job is not None else ''
+            )
+        except ValueError as e:
+            raise CSVImportError(f"Insufficient tokens for import: {str(e)}")
+        if job is not None:
+            job.token_reservation = self.token_reservation
+    
+    def draw_import_tokens(self, imported_rows: int):
+        """Draw what imported_rows cost (1 token per 100, minimum 1) beyond what was drawn already"""
+        if self.token_reservation is None or not imported_rows:
+            return
+        _, cost = TokenEngine.action_cost('csv_import_row', max(1, imported_rows // 100))
+        owed = cost - self.import_stats['tokens_used']
+        if owed > 0:
+            TokenEngine.draw_reserved_tokens(self.token_reservation, owed)
+            self.import_stats['tokens_used'] += owed
+    
+    def settle_import_tokens(self):
+        """Refund the part of the import's hold that was not drawn"""
+        if self.token_reservation is None:
+            return
+        TokenEngine.settle_reservation(self.token_reservation)
+        self.token_reservation = None
+    
+    def commit_batch(self, batch: List[Dict], batch_id: str, job=None,
+                     row_number: int = 0, row_offset: int = 0, encoding: str = 'utf-8'):
+        """
+        Write a batch; with a job the batch, the job's counters and its
+        checkpoint (rows up to row_number, ending at row_offset) commit together
+        """
+        if job is None:
+            self.process_batch(batch, batch_id)
+            self.draw_import_tokens(self.import_stats['successful_rows'])
+            return
+        
+        with transaction.atomic():
+            if batch:
+                self.process_batch(batch, batch_id)
+            self.draw_import_tokens(self.import_stats['successful_rows'])
+            job.tokens_used = self.import_stats['tokens_used']
+            job.processed_rows = self.import_stats['processed_rows']
+            job.successful_rows = self.import_stats['successful_rows']
+            job.failed_rows = self.import_stats['failed_rows']
+            job.duplicate_rows = self.import_stats['duplicate_rows']
+            job.errors = self.import_stats['errors'][:job.MAX_STORED_ERRORS]
+            job.save_checkpoint(row_offset, row_number, encoding, fields=[
+                'tokens_used', 'processed_rows', 'successful_rows', 'failed_rows', 'duplicate_rows', 'errors'
+            ])
+    
+    def restore_progress(self, job):
+        """Continue counting from a job's last checkpoint"""
+        self.import_stats['processed_rows'] = job.processed_rows
+        self.import_stats['successful_rows'] = job.successful_rows
+        self.import_stats['failed_rows'] = job.failed_rows
+        self.import_stats['duplicate_rows'] = job.duplicate_rows
+        self.import_stats['errors'] = list(job.errors)
+        # Earlier runs may have stopped before invalidating caches
+        self.inserted_rows = job.successful_rows
+    
+    def clean_rows(self, reader: StreamingCSVReader, headers: List[str], start_row: int = 1):
+        """
+        Clean rows into structured data, yielding
+        (row_number, row, row_offset, processed_row, error) in file order;
+        large files are cleaned in a process pool when workers > 1
+        """
+        if self.workers > 1 and self.import_stats['total_rows'] >= self.parallel_min_rows:
+            from .csv_parallel import clean_rows_parallel
+            yield from clean_rows_parallel(reader, headers, self.workers, start_row=start_row)
+            return
+
+        for row_number, row in enumerate(reader, start=start_row):
+            try:
+                processed_row, error = self.process_csv_row(row, row_number, headers), None
+            except Exception as e:
+                processed_row, error = None, str(e)
+            yield row_number, row, reader.row_offset, processed_row, error
+    
     def process_csv_row(self, row: Dict, row_number: int, headers: List[str]) -> Optional[Dict]:
         """
         Process a single CSV row and return structured data
@@ -453,60 +607,122 @@ class TarrantCSVProcessor:
     @transaction.atomic
     def process_batch(self, batch: List[Dict], batch_id: str = None):
         """
-        Process a batch of rows with database operations
+        Process a batch of rows with set-based database operations:
+        one duplicate query, one county query, one bulk insert each for
+        properties and leads
+        Rows that fail are reported individually and skipped
         """
+        batch_id = batch_id or f"csv_import_{timezone.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        counties = self.resolve_counties(batch)
+        # Duplicates against existing leads and earlier rows of this import
+        self.dedup_index.load_counties(county.pk for county in counties.values())
+        
+        pending = []
         for row_data in batch:
+            digest = DedupIndex.row_digest(row_data)
+            if not self.dedup_index.add(digest):
+                self.import_stats['duplicate_rows'] += 1
+                continue
             try:
-                # Check for duplicates
-                existing_lead = self.check_for_duplicate(row_data)
-                if existing_lead:
-                    self.import_stats['duplicate_rows'] += 1
-                    continue
-                
-                # Create or get county
-                county = self.get_or_create_county(row_data['property_data'])
-                
-                # Create property
-                property_obj = self.create_property(row_data['property_data'], county)
-                
-                # Create lead
-                lead_obj = self.create_lead(row_data['lead_data'], property_obj, batch_id)
-                
-                self.import_stats['successful_rows'] += 1
+                county = counties[self.county_key(row_data['property_data'])]
+                property_obj = self.build_property(row_data['property_data'], county)
+                lead_obj = self.build_lead(row_data['lead_data'], property_obj, batch_id)
+                pending.append((row_data, property_obj, lead_obj))
             
             except Exception as e:
-                self.import_stats['failed_rows'] += 1
-                self.import_stats['errors'].append({
-                    'row': row_data['row_number'],
-                    'error': str(e),
-                    'data': row_data['raw_data']
-                })
-                logger.error(f"Error creating records for row {row_data['row_number']}: {str(e)}")
+                self.dedup_index.discard(digest)
+                self.record_row_error(row_data, e)
+        
+        if not pending:
+            return
+        
+        try:
+            with transaction.atomic():
+                Property.objects.bulk_create([property_obj for _, property_obj, _ in pending])
+                for _, property_obj, lead_obj in pending:
+                    lead_obj.property = property_obj
+                Lead.objects.bulk_create([lead_obj for _, _, lead_obj in pending])
+                # Bulk inserts skip the lead signal that queues triggered follow-ups
+                fire_trigger(self.user.pk, 'lead_created', [lead_obj.pk for _, _, lead_obj in pending])
+            self.import_stats['successful_rows'] += len(pending)
+            self.inserted_rows += len(pending)
+        except Exception as e:
+            # Some row broke the bulk insert - retry row by row to report it
+            logger.warning(f"Bulk insert failed, retrying batch row by row: {str(e)}")
+            self._insert_rows_individually(pending)
+    
+    def _insert_rows_individually(self, pending: List[Tuple[Dict, Property, Lead]]):
+        inserted_ids = []
+        for row_data, property_obj, lead_obj in pending:
+            try:
+                with transaction.atomic():
+                    property_obj.pk = None
+                    lead_obj.pk = None
+                    Property.objects.bulk_create([property_obj])
+                    lead_obj.property = property_obj
+                    Lead.objects.bulk_create([lead_obj])
+                self.import_stats['successful_rows'] += 1
+                self.inserted_rows += 1
+                inserted_ids.append(lead_obj.pk)
+            except Exception as e:
+                self.dedup_index.discard(DedupIndex.row_digest(row_data))
+                self.record_row_error(row_data, e)
+        
+        if inserted_ids:
+            fire_trigger(self.user.pk, 'lead_created', inserted_ids)
     
-    def check_for_duplicate(self, row_data: Dict) -> Optional[Lead]:
+    def record_row_error(self, row_data: Dict, error: Exception):
+        self.import_stats['failed_rows'] += 1
+        self.import_stats['errors'].append({
+            'row': row_data['row_number'],
+            'error': str(error),
+            'data': row_data['raw_data']
+        })
+        logger.error(f"Error creating records for row {row_data['row_number']}: {str(error)}")
+    
+    def notify_bulk_insert(self):
         """
-        Check for duplicate leads based on property address and owner name
+        Bulk inserts skip model signals - retire cached facets and materialized
+        filter results that can see the imported leads
         """
-        property_data = row_data['property_data']
-        lead_data = row_data['lead_data']
-        
-        # Check by property address and owner name
-        existing_leads = Lead.objects.filter(
-            first_name=lead_data.get('first_name', ''),
-            last_name=lead_data.get('last_name', ''),
-            property__address1__iexact=property_data.get('address1', ''),
-            property__city__iexact=property_data.get('city', ''),
-            property__state__iexact=property_data.get('state', '')
-        )
+        if not self.inserted_rows:
+            return
+        from .facet_engine import FacetEngine
+        from .filter_materialization import MaterializedFilterResults
+        
+        company_id = getattr(getattr(self.user, 'profile', None), 'company_id', None)
+        FacetEngine.bump_version(self.user.pk, company_id)
+        MaterializedFilterResults.invalidate(self.user.pk)
+    
+    @staticmethod
+    def county_key(property_data: Dict) -> Tuple[str, str]:
+        return property_data.get('county_name', 'Unknown'), property_data.get('state', 'TX')
+    
+    def resolve_counties(self, batch: List[Dict]) -> Dict[Tuple[str, str], County]:
+        """
+        Counties for every row of a batch: cached ones for free, the rest in one
+        query; only counties that do not exist yet are created one by one
+        """
+        wanted = {self.county_key(row['property_data']) for row in batch}
+        missing = wanted - self._county_cache.keys()
+        
+        if missing:
+            names = {name for name, _ in missing}
+            states = {state for _, state in missing}
+            for county in County.objects.filter(name__in=names, state__in=states):
+                self._county_cache[(county.name, county.state)] = county
+            
+            for name, state in missing - self._county_cache.keys():
+                self._county_cache[(name, state)] = self.get_or_create_county({'county_name': name, 'state': state})
         
-        return existing_leads.first()
+        return self._county_cache
     
     def get_or_create_county(self, property_data: Dict) -> County:
         """
         Get or create county record
         """
-        county_name = property_data.get('county_name', 'Unknown')
-        state = property_data.get('state', 'TX')
+        county_name, state = self.county_key(property_data)
         
         county, created = County.objects.get_or_create(
             name=county_name,
@@ -524,6 +740,14 @@ class TarrantCSVProcessor:
         """
         Create property record
         """
+        property_obj = self.build_property(property_data, county)
+        property_obj.save()
+        return property_obj
+    
+    def build_property(self, property_data: Dict, county: County) -> Property:
+        """
+        Build an unsaved property record (derived fields are filled on insert)
+        """
         # Map property type
         property_type_mapping = {
             'single family': 'single_family',
@@ -542,7 +766,7 @@ class TarrantCSVProcessor:
         raw_property_type = property_data.get('property_type', '').lower()
         property_type = property_type_mapping.get(raw_property_type, 'single_family')
         
-        property_obj = Property.objects.create(
+        property_obj = Property(
             county=county,
             address1=property_data.get('address1', ''),
             city=property_data.get('city', ''),
@@ -593,7 +817,15 @@ class TarrantCSVProcessor:
         """
         Create lead record
         """
-        lead_obj = Lead.objects.create(
+        lead_obj = self.build_lead(lead_data, property_obj, batch_id)
+        lead_obj.save()
+        return lead_obj
+    
+    def build_lead(self, lead_data: Dict, property_obj: Property, batch_id: str = None) -> Lead:
+        """
+        Build an unsaved lead record
+        """
+        lead_obj = Lead(
             owner=self.user,
             property=property_obj,
             
@@ -633,9 +865,12 @@ class CSVImportService:
     """
     
     @staticmethod
-    def import_tarrant_csv(user: User, file_content: str, filename: str = None) -> Dict:
+    def import_tarrant_csv(user: User, file_content, filename: str = None, job=None) -> Dict:
         """
         Import TARRANT-style CSV file
+        file_content may be a str or an open file object (streamed)
+        With a CSVImportJob the import is checkpointed per batch and resumes
+        from the job's last checkpoint
         """
         # Check permissions
         if not user.profile.has_permission(UserPermission.CAN_IMPORT_LEADS):
@@ -644,11 +879,13 @@ class CSVImportService:
         processor = TarrantCSVProcessor(user)
         
         try:
-            batch_id = f"tarrant_{timezone.now().strftime('%Y%m%d_%H%M%S')}"
+            batch_id = job.batch_id if job else f"tarrant_{timezone.now().strftime('%Y%m%d_%H%M%S')}"
             
             logger.info(f"Starting TARRANT CSV import for user {user.username}")
             
-            result = processor.process_csv_file(file_content, batch_id)
+            # Materialized filter results are invalidated once, not per row
+            with deferred_invalidation(user.pk):
+                result = processor.process_csv_file(file_content, batch_id, job=job)
             
             logger.info(f"Completed TARRANT CSV import: {result['successful_rows']} successful, {result['failed_rows']} failed")
             
@@ -668,4 +905,69 @@ class CSVImportService:
                 'stats': processor.import_stats,
                 'batch_id': None,
                 'filename': filename
-            }
\ No newline at end of file
+            }
+    
+    @staticmethod
+    def bulk_refresh_tarrant_csv(user: User, file_content, filename: str = None) -> Dict:
+        """
+        Full county refresh of a TARRANT-style roll: rows are staged and merged
+        set-based on (county, account number) - new accounts inserted, changed
+        tax amounts updated, accounts missing from the roll marked inactive
+        """
+        from .bulk_refresh import CountyRollLoader
+        
+        # Check permissions
+        if not user.profile.has_permission(UserPermission.CAN_IMPORT_LEADS):
+            raise PermissionError("No permission to import leads")
+        
+        processor = TarrantCSVProcessor(user)
+        merge_stats = None
+        
+        try:
+            is_valid, message, headers = processor.validate_csv_structure(file_content)
+            if not is_valid:
+                raise CSVImportError(message)
+            
+            batch_id = f"refresh_{timezone.now().strftime('%Y%m%d_%H%M%S')}"
+            logger.info(f"Starting TARRANT bulk refresh for user {user.username}")
+            
+            with deferred_invalidation(user.pk):
+                with transaction.atomic():
+                    processor.reserve_import_tokens()
+                    merge_stats = CountyRollLoader(processor).load(file_content, batch_id, headers)
+                    # Leads for new accounts carry this refresh's batch id
+                    fire_trigger(user.pk, 'lead_created', Lead.objects.filter(
+                        owner=user, source_batch=batch_id
+                    ).values_list('pk', flat=True))
+                    processor.draw_import_tokens(merge_stats['staged_rows'])
+                    processor.settle_import_tokens()
+                processor.inserted_rows = merge_stats['inserted'] + merge_stats['updated'] + merge_stats['deactivated']
+                processor.notify_bulk_insert()
+            
+            processor.import_stats.update({
+                'processed_rows': processor.import_stats['total_rows'],
+                'successful_rows': merge_stats['staged_rows'],
+                'failed_rows': merge_stats['failed_rows'],
+                'duplicate_rows': merge_stats['duplicate_rows'],
+            })
+            logger.info(f"Completed TARRANT bulk refresh: {merge_stats}")
+            
+            return {
+                'success': True,
+                'message': 'County roll refresh completed',
+                'stats': processor.import_stats,
+                'merge_stats': merge_stats,
+                'batch_id': batch_id,
+                'filename': filename
+            }
+        
+        except Exception as e:
+            logger.error(f"Bulk refresh failed for user {user.username}: {str(e)}")
+            return {
+                'success': False,
+                'message': str(e),
+                'stats': processor.import_stats,
+                'merge_stats': merge_stats,
+                'batch_id': None,
+                'filename': filename
+            }
@@ -3,6 +3,7 @@ CSV Import API views for DroneStrike v2
 Handles TARRANT-style tax data imports with sophisticated processing
 """
 
+import itertools
 import json
 import logging
 from django.http import JsonResponse
@@ -10,6 +11,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from django.core.files.storage import default_storage
 from django.conf import settings
+from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -17,6 +19,9 @@ from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
 
 from .csv_import_system import CSVImportService, TarrantCSVProcessor, CSVImportError
+from .csv_streaming import StreamingCSVReader
+from .csv_validation import CSVColumnValidator
+from .models import CSVImportJob
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -57,12 +62,9 @@ def upload_csv_file_api(request):
                        status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        # Read file content
-        file_content = uploaded_file.read().decode('utf-8-sig')  # Handle BOM
-        
-        # Validate CSV structure
+        # Validate CSV structure - streamed from the upload (BOM and encoding handled)
         processor = TarrantCSVProcessor(request.user)
-        is_valid, message, headers = processor.validate_csv_structure(file_content)
+        is_valid, message, headers = processor.validate_csv_structure(uploaded_file)
         
         if not is_valid:
             return Response({
@@ -80,6 +82,7 @@ def upload_csv_file_api(request):
         )
         
         # Store file temporarily for import
+        uploaded_file.seek(0)
         temp_filename = f"temp_csv_{request.user.id}_{uploaded_file.name}"
         file_path = default_storage.save(temp_filename, uploaded_file)
         
@@ -128,44 +131,28 @@ def import_csv_api(request):
             return Response({'error': 'No permission to import leads'}, 
                            status=status.HTTP_403_FORBIDDEN)
         
-        # Read file from temporary storage
+        # Open file from temporary storage (rows are streamed from it)
         try:
-            with default_storage.open(temp_file_path, 'r') as f:
-                file_content = f.read()
+            temp_file = default_storage.open(temp_file_path, 'rb')
         except Exception as e:
             return Response({'error': 'Temporary file not found or expired'}, 
                            status=status.HTTP_404_NOT_FOUND)
         
+        if import_options.get('mode') == 'bulk_refresh':
+            return _run_bulk_refresh(request.user, temp_file_path, temp_file)
+        
         # Start import process
         logger.info(f"Starting CSV import for user {request.user.username}")
         
-        result = CSVImportService.import_tarrant_csv(
-            user=request.user,
-            file_content=file_content,
-            filename=temp_file_path.split('_')[-1] if '_' in temp_file_path else 'unknown.csv'
+        job = CSVImportJob.objects.create(
+            filename=temp_file_path.split('_')[-1] if '_' in temp_file_path else 'unknown.csv',
+            batch_id=f"tarrant_{timezone.now().strftime('%Y%m%d_%H%M%S')}",
+            source_file=temp_file_path,
+            status='processing',
+            started_at=timezone.now(),
+            created_by=request.user
         )
-        
-        # Clean up temporary file
-        try:
-            default_storage.delete(temp_file_path)
-        except:
-            pass  # Ignore cleanup errors
-        
-        if result['success']:
-            return Response({
-                'success': True,
-                'message': result['message'],
-                'import_stats': result['stats'],
-                'batch_id': result['batch_id'],
-                'recommendations': _generate_import_recommendations(result['stats'])
-            }, status=status.HTTP_201_CREATED)
-        else:
-            return Response({
-                'success': False,
-                'message': result['message'],
-                'import_stats': result['stats'],
-                'errors': result['stats'].get('errors', [])[:10]  # First 10 errors
-            }, status=status.HTTP_400_BAD_REQUEST)
+        return _run_import_job(request.user, job, temp_file)
     
     except CSVImportError as e:
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -177,6 +164,125 @@ def import_csv_api(request):
                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def resume_import_api(request, job_id):
+    """
+    Resume an interrupted import after its last committed batch
+    """
+    try:
+        job = CSVImportJob.objects.get(pk=job_id, created_by=request.user)
+    except CSVImportJob.DoesNotExist:
+        return Response({'error': 'Import job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if job.status == 'completed':
+        return Response({'error': 'Import job already completed', 'job': _import_job_data(job)},
+                       status=status.HTTP_409_CONFLICT)
+    if not job.claim_for_resume():
+        return Response({'error': 'Import job is still running', 'job': _import_job_data(job)},
+                       status=status.HTTP_409_CONFLICT)
+    
+    try:
+        source_file = default_storage.open(job.source_file, 'rb')
+    except Exception:
+        job.status = 'failed'
+        job.save(update_fields=['status'])
+        return Response({'error': 'Import source file not found or expired'},
+                       status=status.HTTP_404_NOT_FOUND)
+    
+    logger.info(f"Resuming CSV import {job.pk} for user {request.user.username} "
+                f"from row {job.checkpoint_row}")
+    try:
+        return _run_import_job(request.user, job, source_file)
+    except PermissionError as e:
+        return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+
+
+def _run_import_job(user, job, source_file):
+    """Run (or continue) a checkpointed import; the source file is kept until it completes"""
+    with source_file:
+        result = CSVImportService.import_tarrant_csv(
+            user=user,
+            file_content=source_file,
+            filename=job.filename,
+            job=job
+        )
+    
+    if result['success']:
+        # Clean up temporary file
+        try:
+            default_storage.delete(job.source_file)
+        except:
+            pass  # Ignore cleanup errors
+        
+        return Response({
+            'success': True,
+            'message': result['message'],
+            'import_stats': result['stats'],
+            'batch_id': result['batch_id'],
+            'job': _import_job_data(job),
+            'recommendations': _generate_import_recommendations(result['stats'])
+        }, status=status.HTTP_201_CREATED)
+    else:
+        return Response({
+            'success': False,
+            'message': result['message'],
+            'import_stats': result['stats'],
+            'job': _import_job_data(job),
+            'errors': result['stats'].get('errors', [])[:10]  # First 10 errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _run_bulk_refresh(user, temp_file_path, temp_file):
+    """Full county refresh - staged, set-based merge instead of per-row import"""
+    logger.info(f"Starting CSV bulk refresh for user {user.username}")
+    with temp_file:
+        result = CSVImportService.bulk_refresh_tarrant_csv(
+            user=user,
+            file_content=temp_file,
+            filename=temp_file_path.split('_')[-1] if '_' in temp_file_path else 'unknown.csv'
+        )
+    
+    if result['success']:
+        # Clean up temporary file
+        try:
+            default_storage.delete(temp_file_path)
+        except:
+            pass  # Ignore cleanup errors
+        
+        return Response({
+            'success': True,
+            'mode': 'bulk_refresh',
+            'message': result['message'],
+            'import_stats': result['stats'],
+            'merge_stats': result['merge_stats'],
+            'batch_id': result['batch_id']
+        }, status=status.HTTP_201_CREATED)
+    else:
+        return Response({
+            'success': False,
+            'mode': 'bulk_refresh',
+            'message': result['message'],
+            'import_stats': result['stats'],
+            'merge_stats': result['merge_stats'],
+            'errors': result['stats'].get('errors', [])[:10]  # First 10 errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _import_job_data(job) -> dict:
+    return {
+        'id': str(job.pk),
+        'status': job.status,
+        'batch_id': job.batch_id,
+        'total_rows': job.total_rows,
+        'processed_rows': job.processed_rows,
+        'checkpoint_row': job.checkpoint_row,
+        'checkpoint_batch': job.checkpoint_batch,
+        'checkpointed_at': job.checkpointed_at.isoformat() if job.checkpointed_at else None,
+        'resumable': job.status != 'completed',
+    }
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def import_history_api(request):
@@ -307,15 +413,16 @@ def validate_csv_data_api(request):
         data = json.loads(request.body)
         temp_file_path = data.get('temp_file_path')
         sample_rows = data.get('sample_rows', 10)
+        # Validate every row column-wise, not just the sample
+        full_scan = data.get('full_scan', False)
         
         if not temp_file_path:
             return Response({'error': 'temp_file_path is required'}, 
                            status=status.HTTP_400_BAD_REQUEST)
         
-        # Read file
+        # Open file (streamed, never read whole)
         try:
-            with default_storage.open(temp_file_path, 'r') as f:
-                file_content = f.read()
+            file_content = default_storage.open(temp_file_path, 'rb')
         except Exception as e:
             return Response({'error': 'Temporary file not found'}, 
                            status=status.HTTP_404_NOT_FOUND)
@@ -324,26 +431,27 @@ def validate_csv_data_api(request):
         processor = TarrantCSVProcessor(request.user)
         
         # Get headers and structure validation
-        is_valid, message, headers = processor.validate_csv_structure(file_content)
+        with file_content:
+            is_valid, message, headers = processor.validate_csv_structure(file_content)
         
-        if not is_valid:
-            return Response({
-                'valid': False,
-                'message': message
-            }, status=status.HTTP_400_BAD_REQUEST)
+            if not is_valid:
+                return Response({
+                    'valid': False,
+                    'message': message
+                }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Analyze sample rows
-        import csv
-        import io
+            # Analyze sample rows
+            sample_rows_data = list(itertools.islice(StreamingCSVReader(file_content), sample_rows))
+        
+            column_validation = None
+            if full_scan:
+                validator = CSVColumnValidator(processor, max_errors=data.get('max_errors', 100))
+                column_validation = validator.validate(file_content)
         
-        csv_reader = csv.DictReader(io.StringIO(file_content))
         sample_data = []
         validation_issues = []
         
-        for i, row in enumerate(csv_reader):
-            if i >= sample_rows:
-                break
-            
+        for i, row in enumerate(sample_rows_data):
             # Process row for validation
             try:
                 processed_row = processor.process_csv_row(row, i + 1, headers)
@@ -372,7 +480,7 @@ def validate_csv_data_api(request):
                     'error': str(e)
                 })
         
-        return Response({
+        response_data = {
             'valid': True,
             'message': 'CSV data validation completed',
             'sample_data': sample_data,
@@ -380,7 +488,11 @@ def validate_csv_data_api(request):
             'total_rows': processor.import_stats['total_rows'],
             'headers_mapped': len([h for h in headers if h in processor.FIELD_MAPPING]),
             'headers_unmapped': [h for h in headers if h not in processor.FIELD_MAPPING]
-        })
+        }
+        if column_validation is not None:
+            response_data['column_validation'] = column_validation
+        
+        return Response(response_data)
     
     except Exception as e:
         return Response({'error': f'Validation failed: {str(e)}'}, 
@@ -481,13 +593,13 @@ def import_stats_api(request):
     """
     Get overall import statistics for user
     """
-    from django.db.models import Count, Sum, Avg
+    from django.db.models import Count, Max, Q, Sum
     from .models import Lead, TokenTransaction
     
     # Get lead statistics
     lead_stats = Lead.objects.filter(owner=request.user).aggregate(
         total_leads=Count('id'),
-        imported_leads=Count('id', filter=models.Q(imported_from__isnull=False)),
+        imported_leads=Count('id', filter=Q(imported_from__isnull=False)),
         total_batches=Count('source_batch', distinct=True)
     )
     
@@ -497,8 +609,12 @@ def import_stats_api(request):
         action_type__icontains='import'
     ).aggregate(
         total_import_tokens=Sum('tokens_changed'),
-        import_transactions=Count('id'),
-        avg_tokens_per_import=Avg('tokens_changed')
+        # Refunds of reserved tokens are part of the import they settle
+        import_transactions=Count('id', filter=~Q(transaction_type='settlement'))
+    )
+    token_stats['avg_tokens_per_import'] = (
+        (token_stats['total_import_tokens'] or 0) / token_stats['import_transactions']
+        if token_stats['import_transactions'] else 0
     )
     
     # Recent import activity (last 30 days)
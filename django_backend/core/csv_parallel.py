@@ -0,0 +1,91 @@
+"""
+Parallel CSV Row Cleaning for DroneStrike v2
+Field cleaning in TarrantCSVProcessor is pure, CPU-bound Python; large imports
+send chunks of raw rows to a process pool and read the cleaned rows back in
+file order. Workers never touch the database - all writes stay in the parent
+"""
+
+import itertools
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CHUNK_ROWS = 2000
+
+# Per-worker processor used for cleaning (created by _init_worker)
+_worker_processor = None
+
+
+def _init_worker():
+    """
+    Pool initializer - workers are spawned, not forked, so they never share
+    the parent's open database connection
+    """
+    import django
+    django.setup()
+
+    from .csv_import_system import TarrantCSVProcessor
+
+    global _worker_processor
+    _worker_processor = TarrantCSVProcessor(user=None)
+
+
+def _clean_chunk(first_row_number: int, rows: List[Dict], headers: List[str]) -> List[Tuple[Optional[Dict], Optional[str]]]:
+    """Clean one chunk of rows in a worker: (processed_row, error) per input row"""
+    results = []
+    for offset, row in enumerate(rows):
+        try:
+            results.append((_worker_processor.process_csv_row(row, first_row_number + offset, headers), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+
+def clean_rows_parallel(reader, headers: List[str], workers: int,
+                        chunk_rows: int = DEFAULT_CHUNK_ROWS, start_row: int = 1
+                        ) -> Iterator[Tuple[int, Dict, int, Optional[Dict], Optional[str]]]:
+    """
+    Clean a StreamingCSVReader's rows in a process pool, yielding
+    (row_number, row, row_offset, processed_row, error) in file order
+    At most 2 chunks per worker are in flight, so memory stays bounded while
+    the parent writes earlier batches
+    """
+    row_iter = iter(reader)
+    pending = deque()
+    next_row_number = start_row
+    context = multiprocessing.get_context('spawn')
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+
+        def submit_chunk() -> bool:
+            nonlocal next_row_number
+            # Row offsets are read as each row is parsed - the reader runs ahead of the writer
+            chunk = [(row, reader.row_offset) for row in itertools.islice(row_iter, chunk_rows)]
+            if not chunk:
+                return False
+            future = pool.submit(_clean_chunk, next_row_number, [row for row, _ in chunk], headers)
+            pending.append((next_row_number, chunk, future))
+            next_row_number += len(chunk)
+            return True
+
+        exhausted = False
+        for _ in range(workers * 2):
+            if not submit_chunk():
+                exhausted = True
+                break
+
+        while pending:
+            first_row_number, chunk, future = pending.popleft()
+            results = future.result()
+            if not exhausted and not submit_chunk():
+                exhausted = True
+
+            for offset, ((row, row_offset), (processed_row, error)) in enumerate(zip(chunk, results)):
+                yield first_row_number + offset, row, row_offset, processed_row, error
+
+    logger.info(f"Cleaned {next_row_number - start_row} rows with {workers} worker processes")
@@ -0,0 +1,220 @@
+"""
+Streaming CSV Intake for DroneStrike v2
+Reads uploads in fixed-size chunks, detects the text encoding incrementally
+and yields parsed rows one at a time, so peak memory stays flat regardless
+of file size. Progress is reported as a byte offset into the upload
+"""
+
+import codecs
+import csv
+import io
+import logging
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# cp1252 leaves five bytes undefined - decode those as latin-1 instead of failing
+FALLBACK_ERRORS = 'csv_latin1_fallback'
+
+
+def _latin1_fallback(error: UnicodeDecodeError):
+    return error.object[error.start:error.end].decode('latin-1'), error.end
+
+
+codecs.register_error(FALLBACK_ERRORS, _latin1_fallback)
+
+
+class StreamingCSVReader:
+    """
+    Iterate the rows of a CSV upload without loading it into memory
+    Accepts a str, bytes, or a binary/text file object (Django UploadedFile,
+    storage file, open()); iterating yields one dict per data row
+    Encoding: UTF-8 (BOM stripped) until a line fails to decode; if nothing
+    but ASCII was seen by then the file is treated as cp1252, otherwise the
+    bad bytes are replaced and decoding stays UTF-8
+    """
+
+    def __init__(self, source, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 progress_callback: Optional[Callable[['StreamingCSVReader'], None]] = None,
+                 progress_every: int = 1000):
+        if isinstance(source, str):
+            source = io.StringIO(source)
+        elif isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        self.source = source
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
+        self.progress_every = progress_every
+
+        self.encoding = 'utf-8'
+        self.headers: List[str] = []
+        self.bytes_read = 0
+        self.rows_read = 0
+        # Offset just past the last row yielded - a safe point to resume from
+        self.row_offset = 0
+        self.total_bytes = _source_size(source)
+        self._line_end = 0
+        self._resumed = False
+        self._decoder = None
+        self._seen_non_ascii = False
+
+    @property
+    def progress_percentage(self) -> float:
+        """Share of the upload consumed so far (by byte offset)"""
+        if not self.total_bytes:
+            return 0.0
+        return min(100.0, self.bytes_read / self.total_bytes * 100)
+
+    def rewind(self):
+        """Start over from the first byte (for a second pass, e.g. counting)"""
+        self.source.seek(0)
+        self.headers = []
+        self.bytes_read = 0
+        self.rows_read = 0
+        self.row_offset = 0
+        self.encoding = 'utf-8'
+        self._line_end = 0
+        self._resumed = False
+        self._decoder = None
+        self._seen_non_ascii = False
+
+    def seek(self, offset: int, encoding: str = 'utf-8'):
+        """
+        Continue from a row boundary recorded in row_offset by an earlier pass
+        The header row is re-read; encoding is the one that pass ended with
+        """
+        self.read_headers()
+        if not offset:
+            return
+        self.source.seek(offset)
+        self.bytes_read = self.row_offset = self._line_end = offset
+        self._resumed = True
+        if encoding != 'utf-8':
+            self.encoding = encoding
+            self._decoder = codecs.getincrementaldecoder(encoding)(FALLBACK_ERRORS)
+            self._seen_non_ascii = True
+
+    def read_headers(self) -> List[str]:
+        """Header row only - reads no further than the first chunk, then rewinds"""
+        headers = next(csv.reader(self._lines()), [])
+        self.rewind()
+        self.headers = headers
+        return headers
+
+    def count_rows(self) -> int:
+        """Count data rows in one streaming pass, then rewind"""
+        self.rewind()
+        count = sum(1 for _ in self)
+        self.rewind()
+        return count
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        reader = csv.reader(self._lines())
+        if not self._resumed:
+            for headers in reader:
+                self.headers = headers
+                break
+            else:
+                return
+
+        for values in reader:
+            # csv pulls no further than the record's last line
+            self.row_offset = self._line_end
+            if not values:
+                continue
+            # Same shape as csv.DictReader: missing values are None, extras go under None
+            row = dict(zip(self.headers, values))
+            if len(values) > len(self.headers):
+                row[None] = values[len(self.headers):]
+            elif len(values) < len(self.headers):
+                for header in self.headers[len(values):]:
+                    row[header] = None
+            self.rows_read += 1
+            if self.progress_callback and self.rows_read % self.progress_every == 0:
+                self.progress_callback(self)
+            yield row
+
+    def _lines(self) -> Iterator[str]:
+        """
+        Decoded lines with their endings (quoted newlines are left to csv)
+        Lines are split on raw bytes - b'\\n' never occurs inside a UTF-8 or
+        cp1252 character - so each line end is an exact offset into the source
+        """
+        first = not self._resumed
+        tail = None
+        for chunk in self._raw_chunks():
+            newline = '\n' if isinstance(chunk, str) else b'\n'
+            buffer = (tail or chunk[:0]) + chunk
+            cut = buffer.rfind(newline) + 1
+            body, tail = buffer[:cut], buffer[cut:]
+            if not body:
+                continue
+            # Decode all complete lines at once; newlines map 1:1 to the raw bytes
+            text = body if isinstance(body, str) else self._decode(body)
+            raw_lines = body.split(newline)
+            for raw, line in zip(raw_lines[:-1], text.split('\n')):
+                self._line_end += len(raw) + 1
+                if first and line:
+                    line = line.lstrip('\ufeff')
+                    first = False
+                yield line + '\n'
+
+        text = ''
+        if tail:
+            self._line_end += len(tail)
+            text = tail if isinstance(tail, str) else self._decode(tail)
+        if self._decoder is not None:
+            try:
+                text += self._decoder.decode(b'', final=True)
+            except UnicodeDecodeError:
+                # File ends inside a multi-byte sequence
+                text += '\ufffd'
+        if first:
+            text = text.lstrip('\ufeff')
+        if text:
+            yield text
+
+    def _raw_chunks(self) -> Iterator:
+        while True:
+            chunk = self.source.read(self.chunk_size)
+            if not chunk:
+                break
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def _decode(self, chunk: bytes) -> str:
+        if self._decoder is None:
+            self._decoder = codecs.getincrementaldecoder('utf-8')('strict')
+        try:
+            text = self._decoder.decode(chunk)
+        except UnicodeDecodeError:
+            pending = self._decoder.getstate()[0] if self.encoding == 'utf-8' else b''
+            if self._seen_non_ascii:
+                logger.warning(f"Invalid UTF-8 near byte {self.bytes_read}, replacing undecodable bytes")
+                self._decoder = codecs.getincrementaldecoder('utf-8')('replace')
+            else:
+                self.encoding = 'cp1252'
+                self._decoder = codecs.getincrementaldecoder('cp1252')(FALLBACK_ERRORS)
+            # Bytes buffered from the previous chunk were never emitted
+            text = self._decoder.decode(pending + chunk)
+
+        if not self._seen_non_ascii and not text.isascii():
+            self._seen_non_ascii = True
+        return text
+
+
+def _source_size(source) -> Optional[int]:
+    size = getattr(source, 'size', None)
+    if size is not None:
+        return size
+    try:
+        position = source.tell()
+        source.seek(0, io.SEEK_END)
+        size = source.tell()
+        source.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return None
@@ -0,0 +1,186 @@
+"""
+Column-wise CSV Validation for DroneStrike v2
+Validates a whole upload without importing it: the file is read in column
+chunks by pandas, each mapped column is factorized and the field rules of
+TarrantCSVProcessor.clean_and_validate_field run once per distinct value as
+vectorized masks. Values the fast checks cannot accept are re-checked with
+clean_and_validate_field itself, so error messages match a real import
+"""
+
+import logging
+import re
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+from .csv_streaming import FALLBACK_ERRORS
+
+logger = logging.getLogger(__name__)
+
+
+CHUNK_ROWS = 200000
+
+# Values these accept are accepted by Decimal()/float()/int() too
+NUMBER_RE = re.compile(r'[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?')
+DIGITS_RE = re.compile(r'[0-9]+')
+
+# Characters clean_and_validate_field strips before converting
+CURRENCY_NOISE_RE = re.compile(r'[,$\s]')
+RATE_NOISE_RE = re.compile(r'[%\s]')
+INTEGER_NOISE_RE = re.compile(r'[,\s]')
+
+
+class CSVColumnValidator:
+    """
+    Validate every row of a TARRANT-style CSV column by column
+    The rule set (which check applies to which mapped header) is compiled once
+    per validator; validate() returns the same summary structure as the
+    record-by-record bulk validator
+    """
+
+    def __init__(self, processor, max_errors: int = 100):
+        self.processor = processor
+        self.max_errors = max_errors
+        self.rules = self._compile_rules()
+
+    def _compile_rules(self) -> Dict[str, Callable]:
+        """CSV header -> check for the fields that can produce errors"""
+        processor = self.processor
+        rules = {}
+        for csv_field, db_field in processor.FIELD_MAPPING.items():
+            if db_field in processor.CURRENCY_FIELDS:
+                rules[csv_field] = self._number_check(CURRENCY_NOISE_RE, NUMBER_RE)
+            elif db_field in processor.RATE_FIELDS:
+                rules[csv_field] = self._number_check(RATE_NOISE_RE, NUMBER_RE)
+            elif db_field in processor.INTEGER_FIELDS:
+                rules[csv_field] = self._number_check(INTEGER_NOISE_RE, DIGITS_RE, allow_empty=False)
+            elif db_field == 'bathrooms':
+                rules[csv_field] = self._number_check(INTEGER_NOISE_RE, NUMBER_RE, allow_empty=False)
+            elif db_field in processor.COORDINATE_RANGES:
+                rules[csv_field] = self._coordinate_check(processor.COORDINATE_RANGES[db_field])
+        return rules
+
+    def validate(self, file_content) -> Dict:
+        """Validate all rows of file_content (a binary file object, rewound first)"""
+        try:
+            try:
+                result = self._validate_file(file_content, encoding='utf-8-sig', errors='strict')
+            except UnicodeDecodeError:
+                # Same fallback as StreamingCSVReader: cp1252 with latin-1 for undefined bytes
+                result = self._validate_file(file_content, encoding='cp1252', errors=FALLBACK_ERRORS)
+        except Exception as e:
+            logger.error(f"CSV column validation failed: {e}")
+            result = self._empty_result()
+            result['valid'] = False
+            result['errors'].append(f"Bulk validation error: {str(e)}")
+            return result
+
+        result['valid_records'] = result['total_records'] - result['invalid_records']
+        result['valid'] = result['invalid_records'] == 0
+        if sum(result['error_summary'].values()) > len(result['errors']):
+            result['warnings'].append(f"Error details limited to {self.max_errors} errors")
+        if result['total_records'] > 0:
+            result['success_rate'] = (result['valid_records'] / result['total_records']) * 100
+        else:
+            result['success_rate'] = 0
+
+        logger.info(f"CSV column validation: {result['total_records']} rows, "
+                    f"{result['invalid_records']} invalid")
+        return result
+
+    @staticmethod
+    def _empty_result() -> Dict:
+        return {
+            'valid': True,
+            'total_records': 0,
+            'valid_records': 0,
+            'invalid_records': 0,
+            'errors': [],
+            'warnings': [],
+            'error_summary': {},
+        }
+
+    def _validate_file(self, file_content, encoding: str, errors: str) -> Dict:
+        result = self._empty_result()
+        file_content.seek(0)
+        chunks = pd.read_csv(
+            file_content, dtype=str, keep_default_na=False, na_filter=False,
+            usecols=lambda header: header in self.rules, chunksize=CHUNK_ROWS,
+            encoding=encoding, encoding_errors=errors,
+        )
+        for chunk in chunks:
+            self._validate_chunk(chunk, result)
+        return result
+
+    def _validate_chunk(self, chunk: pd.DataFrame, result: Dict):
+        offset = result['total_records']
+        invalid = np.zeros(len(chunk), dtype=bool)
+        field_errors = []
+
+        for csv_field in chunk.columns:
+            codes, uniques = pd.factorize(chunk[csv_field].to_numpy(dtype=object))
+            values = pd.Series(uniques, dtype=object)
+            messages = self.rules[csv_field](values, self.processor.FIELD_MAPPING[csv_field])
+            failed = pd.notna(messages)
+            if not failed.any():
+                continue
+
+            row_failed = failed[codes]
+            invalid |= row_failed
+            field_errors.append((csv_field, codes, messages))
+
+            counts = np.bincount(codes, minlength=len(uniques))
+            for error, count in pd.Series(counts[failed]).groupby(messages[failed], sort=False).sum().items():
+                key = f"{csv_field}: {error}"
+                result['error_summary'][key] = result['error_summary'].get(key, 0) + int(count)
+
+        # Error details in row order, then header order
+        for index in np.flatnonzero(invalid):
+            if len(result['errors']) >= self.max_errors:
+                break
+            for csv_field, codes, messages in field_errors:
+                message = messages[codes[index]]
+                if message is not None and len(result['errors']) < self.max_errors:
+                    result['errors'].append({
+                        'record_index': offset + int(index),
+                        'field': csv_field,
+                        'error': message,
+                        'value': chunk[csv_field].iat[index],
+                    })
+
+        result['total_records'] += len(chunk)
+        result['invalid_records'] += int(invalid.sum())
+
+    # Checks: distinct raw values -> object array of error messages (None = valid)
+
+    def _number_check(self, noise_re, accept_re, allow_empty: bool = True) -> Callable:
+        strip_noise, accept = noise_re.sub, accept_re.fullmatch
+
+        def check(values: pd.Series, db_field: str) -> np.ndarray:
+            cleaned = [strip_noise('', value.strip()) for value in values]
+            accepted = np.fromiter(
+                ((allow_empty and not value) or accept(value) is not None for value in cleaned),
+                dtype=bool, count=len(cleaned)
+            )
+            return self._recheck(values, ~accepted, db_field)
+        return check
+
+    def _coordinate_check(self, limit: int) -> Callable:
+        accept = NUMBER_RE.fullmatch
+
+        def check(values: pd.Series, db_field: str) -> np.ndarray:
+            stripped = np.array([value.strip() for value in values], dtype=object)
+            accepted = np.fromiter((accept(value) is not None for value in stripped), dtype=bool, count=len(stripped))
+            numbers = np.full(len(values), np.nan)
+            numbers[accepted] = stripped[accepted].astype(float)
+            accepted = accepted & (numbers >= -limit) & (numbers <= limit)
+            return self._recheck(values, ~accepted, db_field)
+        return check
+
+    def _recheck(self, values: pd.Series, candidates: np.ndarray, db_field: str) -> np.ndarray:
+        """Error message of each candidate value from clean_and_validate_field"""
+        messages = np.full(len(values), None, dtype=object)
+        for position in np.flatnonzero(candidates):
+            _, messages[position] = self.processor.clean_and_validate_field(db_field, values.iat[position], 0)
+        return messages
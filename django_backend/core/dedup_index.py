@@ -0,0 +1,85 @@
+"""
+Import Dedup Index for DroneStrike v2
+Per-import set of normalized (owner, address, city, state) keys: existing
+leads are loaded once per county, accepted rows are added as the import runs,
+so duplicate checks are O(1) in memory with no database round trip
+"""
+
+import hashlib
+import logging
+from typing import Iterable
+
+from .models import Lead
+
+logger = logging.getLogger(__name__)
+
+
+KEY_SEPARATOR = '\x1f'
+
+
+class DedupIndex:
+    """
+    Duplicate keys for one import
+    Keys are stored as 16-byte digests in a set
+    """
+
+    def __init__(self):
+        self._digests = set()
+        self._loaded_counties = set()
+
+    @staticmethod
+    def normalize(first_name, last_name, address, city, state) -> str:
+        """Lowercased, whitespace-collapsed key fields"""
+        return KEY_SEPARATOR.join(
+            ' '.join(str(value or '').lower().split())
+            for value in (first_name, last_name, address, city, state)
+        )
+
+    @classmethod
+    def digest(cls, first_name, last_name, address, city, state) -> bytes:
+        key = cls.normalize(first_name, last_name, address, city, state)
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+
+    @classmethod
+    def row_digest(cls, row_data) -> bytes:
+        """Digest of a processed import row (owner name and property address)"""
+        property_data = row_data['property_data']
+        lead_data = row_data['lead_data']
+        return cls.digest(
+            lead_data.get('first_name'), lead_data.get('last_name'),
+            property_data.get('address1'), property_data.get('city'), property_data.get('state'),
+        )
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+    def __contains__(self, digest: bytes) -> bool:
+        return digest in self._digests
+
+    def add(self, digest: bytes) -> bool:
+        """Add a key; False if it was already present (a duplicate)"""
+        if digest in self._digests:
+            return False
+        self._digests.add(digest)
+        return True
+
+    def discard(self, digest: bytes):
+        """Forget a key whose row was not inserted"""
+        self._digests.discard(digest)
+
+    def load_counties(self, county_ids: Iterable[int]) -> int:
+        """Load keys of existing leads in counties not loaded yet - one query per call"""
+        county_ids = set(county_ids) - self._loaded_counties
+        if not county_ids:
+            return 0
+
+        existing = Lead.objects.filter(property__county_id__in=county_ids).values_list(
+            'first_name', 'last_name', 'property__address1', 'property__city', 'property__state'
+        )
+        loaded = 0
+        for values in existing.iterator(chunk_size=5000):
+            self._digests.add(self.digest(*values))
+            loaded += 1
+        self._loaded_counties |= county_ids
+        logger.debug(f"Dedup index loaded {loaded} keys for {len(county_ids)} counties")
+        return loaded
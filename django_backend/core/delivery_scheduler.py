@@ -0,0 +1,322 @@
+"""
+Campaign Delivery Scheduler for DroneStrike v2
+Sends rendered campaign messages to the providers - Mailgun for email,
+VoIP.ms for SMS - with provider I/O overlapped: each channel caps its
+in-flight requests and paces them with a token bucket sized to the
+provider's quota. 429 and 5xx responses slow the channel down (honouring
+Retry-After) and the message is retried; successes speed it back up
+"""
+
+import asyncio
+import logging
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+MAILGUN_API_URL = 'https://api.mailgun.net/v3'
+VOIPMS_API_URL = 'https://voip.ms/api/v1/rest.php'
+SMS_MAX_LENGTH = 160
+
+NON_DIGIT_RE = re.compile(r'\D')
+
+
+class ProviderError(Exception):
+    """A provider did not accept a message"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.retryable = retryable
+
+
+@dataclass
+class OutboundMessage:
+    """One rendered message for a provider"""
+    to: str
+    subject: str
+    body: str
+
+
+@dataclass
+class DeliveryResult:
+    """Provider message id, or the error that failed delivery"""
+    external_id: str = ''
+    error: Optional[str] = None
+
+    @property
+    def sent(self) -> bool:
+        return self.error is None
+
+
+def _check_response(response: requests.Response, provider: str):
+    """Raise ProviderError for HTTP errors; 429 and 5xx are retryable"""
+    status_code = response.status_code
+    if status_code < 400:
+        return
+
+    retry_after = None
+    header = response.headers.get('Retry-After')
+    if header:
+        try:
+            retry_after = max(0.0, float(header))
+        except ValueError:
+            pass
+
+    raise ProviderError(
+        f"{provider} returned HTTP {status_code}: {response.text[:200]}",
+        status_code=status_code,
+        retry_after=retry_after,
+        retryable=status_code == 429 or status_code >= 500
+    )
+
+
+class MailgunProvider:
+    """Email through the Mailgun messages API"""
+
+    name = 'Mailgun'
+
+    def __init__(self, api_key: str, domain: str, from_email: str,
+                 pool_size: int = 10, timeout: int = 30):
+        self.url = f"{MAILGUN_API_URL}/{domain}/messages"
+        self.from_email = from_email
+        self.timeout = timeout
+        self.session = _session(pool_size)
+        self.session.auth = ('api', api_key)
+
+    def send(self, message: OutboundMessage) -> str:
+        if not message.to:
+            raise ProviderError("Lead has no email address")
+        try:
+            response = self.session.post(self.url, data={
+                'from': self.from_email,
+                'to': message.to,
+                'subject': message.subject,
+                'text': message.body,
+            }, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise ProviderError(f"Mailgun request failed: {str(e)}", retryable=_not_delivered(e))
+        _check_response(response, self.name)
+        try:
+            return str(response.json().get('id', ''))
+        except (ValueError, AttributeError):
+            # Accepted (2xx) but the message id could not be read
+            logger.warning(f"Mailgun accepted a message with an unreadable response: {response.text[:200]}")
+            return ''
+
+
+class VoipMSProvider:
+    """SMS through the VoIP.ms REST API (sendSMS)"""
+
+    name = 'VoIP.ms'
+
+    def __init__(self, username: str, password: str, did: str,
+                 pool_size: int = 4, timeout: int = 30):
+        self.auth_params = {'api_username': username, 'api_password': password}
+        self.did = did
+        self.timeout = timeout
+        self.session = _session(pool_size)
+
+    def send(self, message: OutboundMessage) -> str:
+        # VoIP.ms takes 10-digit NANP numbers
+        destination = NON_DIGIT_RE.sub('', message.to or '')
+        if len(destination) == 11 and destination.startswith('1'):
+            destination = destination[1:]
+        if len(destination) != 10:
+            raise ProviderError(f"Invalid SMS number: {message.to or 'none'}")
+
+        try:
+            response = self.session.get(VOIPMS_API_URL, params={
+                **self.auth_params,
+                'method': 'sendSMS',
+                'did': self.did,
+                'dst': destination,
+                'message': message.body[:SMS_MAX_LENGTH],
+            }, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise ProviderError(f"VoIP.ms request failed: {str(e)}", retryable=_not_delivered(e))
+        _check_response(response, self.name)
+
+        try:
+            data = response.json()
+            data.get('status')
+        except (ValueError, AttributeError):
+            raise ProviderError(f"VoIP.ms returned an unreadable response: {response.text[:200]}")
+        if data.get('status') != 'success':
+            raise ProviderError(f"VoIP.ms API error: {data.get('status', 'unknown')}")
+        return str(data.get('sms', ''))
+
+
+def _not_delivered(error: requests.RequestException) -> bool:
+    """Connection failures never reached the provider - safe to retry; read timeouts may have sent"""
+    return isinstance(error, requests.ConnectionError)
+
+
+def _session(pool_size: int) -> requests.Session:
+    """Session whose connection pool fits the channel's in-flight limit"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    return session
+
+
+class TokenBucket:
+    """
+    Async token bucket: refills rate tokens per second up to capacity
+    The rate can be lowered and raised while the bucket is in use
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens go out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class DeliveryChannel:
+    """
+    Sends for one provider: at most max_in_flight requests at a time,
+    paced by a token bucket at up to rate per second
+    Throttled or failing responses halve the rate and pause the channel
+    (Retry-After, or an exponential backoff with jitter); each success adds
+    back a twentieth of the configured rate
+    """
+
+    MIN_RATE_SHARE = 0.05
+
+    def __init__(self, provider, executor: ThreadPoolExecutor, max_in_flight: int,
+                 rate: float, max_retries: int = 5, max_backoff: float = 60.0):
+        self.provider = provider
+        self.executor = executor
+        self.max_rate = rate
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.bucket = TokenBucket(rate)
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.backoff = 0.0
+        self.paused_until = 0.0
+        self.stats = {'sent': 0, 'failed': 0, 'throttled': 0}
+
+    async def send(self, message: OutboundMessage) -> DeliveryResult:
+        loop = asyncio.get_running_loop()
+        async with self.semaphore:
+            for attempt in range(self.max_retries + 1):
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                await self.bucket.acquire()
+
+                try:
+                    external_id = await loop.run_in_executor(self.executor, self.provider.send, message)
+                except ProviderError as e:
+                    if e.retryable and attempt < self.max_retries:
+                        self._throttle(e)
+                        continue
+                    self.stats['failed'] += 1
+                    return DeliveryResult(error=str(e))
+                except Exception as e:
+                    # Anything else fails this message only, never the batch
+                    logger.error(f"{self.provider.name} send failed: {str(e)}")
+                    self.stats['failed'] += 1
+                    return DeliveryResult(error=f"{self.provider.name} send failed: {str(e)}")
+
+                self._recover()
+                self.stats['sent'] += 1
+                return DeliveryResult(external_id=external_id)
+
+    def _throttle(self, error: ProviderError):
+        self.stats['throttled'] += 1
+        self.backoff = min(self.max_backoff, self.backoff * 2 if self.backoff else 1.0)
+        delay = error.retry_after if error.retry_after is not None else self.backoff * random.uniform(0.5, 1.0)
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        self.bucket.rate = max(self.max_rate * self.MIN_RATE_SHARE, self.bucket.rate / 2)
+        logger.warning(f"{self.provider.name} throttled ({error.status_code or 'no response'}), "
+                       f"pausing {delay:.1f}s at {self.bucket.rate:.2f}/s")
+
+    def _recover(self):
+        self.backoff = 0.0
+        if self.bucket.rate < self.max_rate:
+            self.bucket.rate = min(self.max_rate, self.bucket.rate + self.max_rate / 20)
+
+
+class DeliveryScheduler:
+    """
+    Provider channels for one campaign run, keyed by communication type
+    Channels exist only for configured providers; other types are recorded
+    without a provider call
+    """
+
+    def __init__(self, providers: Dict[str, tuple], max_retries: int = 5):
+        """providers: communication type -> (provider, max_in_flight, rate per second)"""
+        workers = sum(max_in_flight for _, max_in_flight, _ in providers.values())
+        self.executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='campaign-delivery')
+        self.channels = {
+            communication_type: DeliveryChannel(provider, self.executor, max_in_flight, rate, max_retries)
+            for communication_type, (provider, max_in_flight, rate) in providers.items()
+        }
+
+    @classmethod
+    def from_settings(cls) -> 'DeliveryScheduler':
+        providers = {}
+
+        if settings.MAILGUN_API_KEY and settings.MAILGUN_DOMAIN:
+            in_flight = settings.CAMPAIGN_EMAIL_MAX_IN_FLIGHT
+            providers['email'] = (
+                MailgunProvider(settings.MAILGUN_API_KEY, settings.MAILGUN_DOMAIN,
+                                settings.DEFAULT_FROM_EMAIL, pool_size=in_flight),
+                in_flight, settings.CAMPAIGN_EMAIL_RATE_PER_SECOND
+            )
+
+        if settings.VOIP_API_USERNAME and settings.VOIP_API_PASSWORD and settings.VOIP_SMS_DID:
+            in_flight = settings.CAMPAIGN_SMS_MAX_IN_FLIGHT
+            providers['sms'] = (
+                VoipMSProvider(settings.VOIP_API_USERNAME, settings.VOIP_API_PASSWORD,
+                               settings.VOIP_SMS_DID, pool_size=in_flight),
+                in_flight, settings.CAMPAIGN_SMS_RATE_PER_SECOND
+            )
+
+        return cls(providers, max_retries=settings.CAMPAIGN_DELIVERY_MAX_RETRIES)
+
+    def handles(self, communication_type: str) -> bool:
+        return communication_type in self.channels
+
+    async def send_all(self, communication_type: str, messages: List[OutboundMessage]) -> List[DeliveryResult]:
+        """
+        Send messages on their channel concurrently; results are in message order
+        Every message gets a result - an exception becomes its error
+        """
+        channel = self.channels[communication_type]
+        results = await asyncio.gather(*(channel.send(message) for message in messages), return_exceptions=True)
+        return [
+            DeliveryResult(error=f"Delivery failed: {result!r}") if isinstance(result, BaseException) else result
+            for result in results
+        ]
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        for channel in self.channels.values():
+            channel.provider.session.close()
@@ -17,6 +17,7 @@ from .models import (
     TokenTransaction, UserProfile, Mission, MissionRoute, Device, MissionDeclineReason, Lead
 )
 from .serializers import TLCClientSerializer, MissionSerializer, DeviceSerializer
+from .pagination import CountStrategyPaginator, resolve_count_mode
 from .stripe_config import TOKEN_PRICING
 from .services import TokenService
 
@@ -34,6 +35,7 @@ def dev_tlc_clients_list(request):
         search = request.GET.get('search', '')
         status_filter = request.GET.get('status', '')
         workflow_filter = request.GET.get('workflow_stage', '')
+        count_mode = resolve_count_mode(request.GET.get('count_mode'))
         
         # Build queryset
         queryset = TLCClient.objects.all().select_related(
@@ -59,19 +61,21 @@ def dev_tlc_clients_list(request):
         ordering = request.GET.get('ordering', '-created_at')
         queryset = queryset.order_by(ordering)
         
-        # Pagination
-        total = queryset.count()
-        start = (page - 1) * page_size
-        end = start + page_size
-        clients = queryset[start:end]
+        # Pagination - the total follows the count strategy, so only the page size
+        # bounds the cost unless exact counts are requested
+        paginator = CountStrategyPaginator(queryset, page_size, count_mode=count_mode)
+        clients = paginator.get_page(page)
+        count_info = paginator.count_info
         
         # Serialize
         serializer = TLCClientSerializer(clients, many=True)
         
         return Response({
-            'count': total,
-            'next': f"?page={page + 1}" if end < total else None,
-            'previous': f"?page={page - 1}" if page > 1 else None,
+            'count': count_info['count'],
+            'count_mode': count_info['mode'],
+            'count_display': count_info['display'],
+            'next': f"?page={clients.number + 1}" if clients.has_next() else None,
+            'previous': f"?page={clients.number - 1}" if clients.has_previous() else None,
             'results': serializer.data
         })
         
@@ -0,0 +1,171 @@
+"""
+Facet Engine for DroneStrike v2
+Computes every filter-dropdown facet and its lead count in one grouped pass
+over the lead set, cached per owner/company scope behind a data-version key
+"""
+
+import hashlib
+import json
+import logging
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Count
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Lead, Property
+
+logger = logging.getLogger(__name__)
+
+
+# Facet name -> lead field path
+FACET_FIELDS = {
+    'counties': 'mailing_county',
+    'states': 'mailing_state',
+    'cities': 'mailing_city',
+    'zip_codes': 'mailing_zip5',
+    'lead_statuses': 'lead_status',
+    'owner_types': 'owner_type',
+    'property_types': 'property__property_type',
+}
+
+FACET_CACHE_TIMEOUT = 60 * 60  # 1 hour; version bumps invalidate sooner
+FACET_CACHE_PREFIX = 'facets'
+
+
+class FacetEngine:
+    """
+    Single-pass facet counts for a (possibly filtered) lead queryset
+    """
+
+    GLOBAL_SCOPE = 'all'
+
+    @staticmethod
+    def compute(queryset) -> Dict[str, List[Dict]]:
+        """
+        Count leads per value of every facet with one GROUP BY query
+        Grouping on all facet columns at once yields each distinct combination
+        with its count; per-facet totals are summed from those groups
+        """
+        fields = list(FACET_FIELDS.values())
+        groups = queryset.order_by().values(*fields).annotate(facet_count=Count('id', distinct=True))
+
+        counters = {name: Counter() for name in FACET_FIELDS}
+        for group in groups.iterator():
+            for name, field in FACET_FIELDS.items():
+                value = group[field]
+                if value is not None and value != '':
+                    counters[name][value] += group['facet_count']
+
+        return {
+            name: [{'value': value, 'count': count} for value, count in sorted(counter.items())]
+            for name, counter in counters.items()
+        }
+
+    @classmethod
+    def get_facets(cls, queryset, scope: str, applied_filters: Optional[Dict] = None) -> Dict[str, List[Dict]]:
+        """
+        Get facet counts for a scope, served from cache while the scope's data
+        version is unchanged
+        applied_filters identifies the filters already applied to queryset
+        """
+        try:
+            key = cls._cache_key(scope, applied_filters)
+            cached = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Facet cache unavailable: {str(e)}")
+            return cls.compute(queryset)
+
+        if cached is not None:
+            return cached
+
+        facets = cls.compute(queryset)
+        try:
+            cache.set(key, facets, FACET_CACHE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Failed to cache facets for {scope}: {str(e)}")
+        return facets
+
+    @staticmethod
+    def values(facets: Dict[str, List[Dict]], name: str, limit: int = None) -> List:
+        """Plain value list for a facet (the pre-facet response format)"""
+        values = [entry['value'] for entry in facets.get(name, [])]
+        return values[:limit] if limit else values
+
+    @staticmethod
+    def owner_scope(user_id) -> str:
+        """Cache scope for one owner's leads"""
+        return f"owner:{user_id}"
+
+    @staticmethod
+    def company_scope(company_id) -> str:
+        """Cache scope for every lead owned by a company's employees"""
+        return f"company:{company_id}"
+
+    @classmethod
+    def bump_version(cls, owner_id=None, company_id=None):
+        """
+        Invalidate cached facets that include an owner's leads
+        Bulk writes that bypass model signals should call this when done
+        """
+        scopes = [cls.GLOBAL_SCOPE, cls.company_scope(company_id)]
+        if owner_id is not None:
+            scopes.append(cls.owner_scope(owner_id))
+
+        for scope in scopes:
+            key = f"{FACET_CACHE_PREFIX}:version:{scope}"
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Missing version key - start a new, never-reused version
+                cache.add(key, time.time_ns(), None)
+            except Exception as e:
+                logger.warning(f"Failed to bump facet version for {scope}: {str(e)}")
+
+    @classmethod
+    def version(cls, scope: str) -> int:
+        """Current lead data version of a scope (changes whenever bump_version covers it)"""
+        key = f"{FACET_CACHE_PREFIX}:version:{scope}"
+        version = cache.get(key)
+        if version is None:
+            # Seed with the clock so an evicted version never repeats an old one
+            cache.add(key, time.time_ns(), None)
+            version = cache.get(key)
+        return version
+
+    @classmethod
+    def _cache_key(cls, scope: str, applied_filters: Optional[Dict]) -> str:
+        payload = json.dumps(applied_filters or {}, sort_keys=True, default=str)
+        filters_hash = hashlib.md5(payload.encode('utf-8')).hexdigest()
+        return f"{FACET_CACHE_PREFIX}:{scope}:{cls.version(scope)}:{filters_hash}"
+
+
+def _owner_company_id(lead) -> Optional[int]:
+    """Company of a lead's owner (free when the owner's profile is already loaded)"""
+    try:
+        return lead.owner.profile.company_id
+    except ObjectDoesNotExist:
+        return None
+
+
+@receiver(post_save, sender=Lead)
+@receiver(post_delete, sender=Lead)
+def bump_facets_for_lead(sender, instance, raw=False, **kwargs):
+    """New data version for every scope that sees this lead"""
+    if raw:
+        return
+    FacetEngine.bump_version(instance.owner_id, _owner_company_id(instance))
+
+
+@receiver(post_save, sender=Property)
+def bump_facets_for_property(sender, instance, created=False, raw=False, **kwargs):
+    """Property type changes show up in the property_types facet of its leads' owners"""
+    if raw or created:
+        return
+    owners = instance.leads.values_list('owner_id', 'owner__profile__company').distinct()
+    for owner_id, company_id in owners:
+        FacetEngine.bump_version(owner_id, company_id)
@@ -0,0 +1,385 @@
+"""
+Materialized Filter Results for DroneStrike v2
+Saved filters and presets keep their matching lead IDs as a packed int array
+per (user, filter config), so reopening one is a slice of the ID list plus a
+primary-key lookup for the visible page. Lead/Property signals patch or
+invalidate the stored sets as the underlying rows change; sets past their
+TTL are skipped and deleted by the purge_filter_results command
+"""
+
+import hashlib
+import json
+import logging
+import math
+import sys
+import threading
+import zlib
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Lead, Property, FilterResultSet
+from .filtering_system import PropertyFilter
+from .filter_spec import FilterSpec
+
+logger = logging.getLogger(__name__)
+
+
+# Request keys that never change which leads match
+NON_FILTER_KEYS = {'page', 'limit', 'cursor', 'save_filter', 'filter_name', 'is_favorite',
+                   'materialize', 'profile', 'count_mode'}
+
+# Configs relative to "now" drift as time passes, so they expire sooner
+TIME_RELATIVE_KEYS = {'last_contact_days', 'created_since_days'}
+RELATIVE_RESULT_TTL = timedelta(minutes=15)
+RESULT_TTL = timedelta(hours=24)
+
+# Larger result sets are served live instead of materialized
+MAX_MATERIALIZED_IDS = 500000
+
+# Row values captured before a save to tell whether a result's sort order moved
+LEAD_SNAPSHOT_FIELDS = ['owner_id', 'property_id', 'score_value', 'created_at',
+                        'last_contact', 'mailing_city', 'mailing_state']
+PROPERTY_SNAPSHOT_FIELDS = ['total_value', 'ple_amount_due', 'ltv_ratio']
+
+_state = threading.local()
+
+
+def filter_config_hash(config: Dict) -> str:
+    """
+    Stable hash of what selects and orders leads: the config's FilterSpec hash
+    plus its sort, so equivalent configs share one result set
+    """
+    config = {k: v for k, v in config.items() if k not in NON_FILTER_KEYS and v is not None}
+    spec = FilterSpec.from_search_config(config)
+    payload = json.dumps({'spec': spec.hash, 'sort_by': config.get('sort_by', 'score_desc')}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def pack_ids(ids: Iterable[int]) -> bytes:
+    """Pack lead IDs as little-endian int64s and compress them"""
+    packed = array('q', ids)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return zlib.compress(packed.tobytes())
+
+
+def unpack_ids(data) -> array:
+    """Inverse of pack_ids"""
+    ids = array('q')
+    if data:
+        ids.frombytes(zlib.decompress(bytes(data)))
+        if sys.byteorder == 'big':
+            ids.byteswap()
+    return ids
+
+
+def find_ids(ids: array, lead_ids: Iterable[int]) -> np.ndarray:
+    """
+    Positions of lead_ids in a stored ID list, in one vectorized pass
+    (the list is in result order, not sorted, so it cannot be bisected)
+    """
+    return np.flatnonzero(np.isin(np.frombuffer(ids, dtype=np.int64), np.fromiter(lead_ids, dtype=np.int64)))
+
+
+class MaterializedFilterResults:
+    """
+    Build, serve and maintain materialized filter result sets
+    """
+
+    @classmethod
+    def get_page(cls, user, config: Dict, scope_owner=None, page=1, limit: int = 50) -> Optional[Dict]:
+        """
+        Get one page of a filter's results from its materialized ID list
+        Returns None when the result set is too large to materialize, so the
+        caller should run the filter live
+        """
+        entry = cls.get_or_build(user, config, scope_owner)
+        if entry is None:
+            return None
+
+        ids = unpack_ids(entry.lead_ids)
+        pages = max(1, math.ceil(len(ids) / limit))
+        try:
+            page = int(page)
+        except (TypeError, ValueError):
+            page = 1
+        page = min(max(page, 1), pages)
+
+        page_ids = ids[(page - 1) * limit:page * limit].tolist()
+        leads = Lead.objects.select_related('property').in_bulk(page_ids)
+
+        return {
+            'results': [leads[lead_id] for lead_id in page_ids if lead_id in leads],
+            'page': page,
+            'pages': pages,
+            'total': entry.result_count,
+            'has_next': page < pages,
+            'has_previous': page > 1,
+        }
+
+    @classmethod
+    def get_or_build(cls, user, config: Dict, scope_owner=None) -> Optional[FilterResultSet]:
+        """Return a fresh result set for the filter, rebuilding it if needed"""
+        config_hash = filter_config_hash(config)
+        scope_owner_id = scope_owner.pk if scope_owner is not None else None
+
+        entry = FilterResultSet.objects.filter(user=user, config_hash=config_hash).first()
+        if entry is not None and cls._is_fresh(entry, scope_owner_id):
+            FilterResultSet.objects.filter(pk=entry.pk).update(last_accessed=timezone.now())
+            return entry
+
+        return cls.build(user, config, scope_owner_id, config_hash)
+
+    @classmethod
+    def build(cls, user, config: Dict, scope_owner_id: Optional[int] = None,
+              config_hash: str = None) -> Optional[FilterResultSet]:
+        """Run the filter once and store its lead IDs in result order"""
+        config = {k: v for k, v in config.items() if k not in NON_FILTER_KEYS}
+        config_hash = config_hash or filter_config_hash(config)
+
+        property_filter = cls.build_filter(config, scope_owner_id)
+        ids = list(property_filter.get_results().values_list('id', flat=True)[:MAX_MATERIALIZED_IDS + 1])
+
+        if len(ids) > MAX_MATERIALIZED_IDS:
+            FilterResultSet.objects.filter(user=user, config_hash=config_hash).delete()
+            return None
+
+        now = timezone.now()
+        entry, _ = FilterResultSet.objects.update_or_create(
+            user=user,
+            config_hash=config_hash,
+            defaults={
+                'filter_config': config,
+                'sort_ordering': property_filter.sort_ordering or '',
+                'scope_owner_id': scope_owner_id,
+                'lead_ids': pack_ids(ids),
+                'result_count': len(ids),
+                'is_stale': False,
+                'built_at': now,
+                'last_accessed': now,
+            }
+        )
+        return entry
+
+    @staticmethod
+    def build_filter(config: Dict, scope_owner_id: Optional[int] = None) -> PropertyFilter:
+        """PropertyFilter for a stored config over the leads in its scope"""
+        queryset = Lead.objects.select_related('property').all()
+        if scope_owner_id is not None:
+            queryset = queryset.filter(owner_id=scope_owner_id)
+        return PropertyFilter(queryset).apply_config(
+            {k: v for k, v in config.items() if k not in NON_FILTER_KEYS}
+        )
+
+    @classmethod
+    def discard(cls, user, config: Dict):
+        """Drop the stored result set for a filter config"""
+        FilterResultSet.objects.filter(user=user, config_hash=filter_config_hash(config)).delete()
+
+    @classmethod
+    def invalidate(cls, owner_id: Optional[int] = None):
+        """Mark every result set that can see the owner's leads as stale"""
+        entries = FilterResultSet.objects.filter(is_stale=False)
+        if owner_id is not None:
+            entries = entries.filter(Q(scope_owner__isnull=True) | Q(scope_owner_id=owner_id))
+        entries.update(is_stale=True)
+
+    @classmethod
+    def patch_leads(cls, lead_ids: Iterable[int], owner_ids: Iterable[int], changed_paths: Iterable[str]):
+        """
+        Bring result sets up to date after leads changed
+        Leads that stopped matching are removed in place; new matches or moved
+        sort keys mark the set stale so it is rebuilt on next access
+        """
+        lead_ids = set(lead_ids)
+        changed_paths = set(changed_paths)
+        stale = []
+
+        for entry in cls._active_entries(owner_ids):
+            ids = unpack_ids(entry.lead_ids)
+            present = {ids[position] for position in find_ids(ids, lead_ids)}
+            matching = set(
+                cls.build_filter(entry.filter_config, entry.scope_owner_id)
+                .get_results().filter(pk__in=lead_ids).values_list('id', flat=True)
+            )
+
+            sort_moved = entry.sort_ordering.lstrip('-') in changed_paths
+            if (matching - present) or (sort_moved and matching & present):
+                stale.append(entry.pk)
+            elif present - matching:
+                cls._remove_ids(entry.pk, present - matching, ids)
+
+        if stale:
+            FilterResultSet.objects.filter(pk__in=stale).update(is_stale=True)
+
+    @classmethod
+    def remove_lead(cls, lead_id: int, owner_id: int):
+        """Remove a deleted lead from every result set holding it"""
+        for entry in cls._active_entries([owner_id]):
+            cls._remove_ids(entry.pk, {lead_id}, unpack_ids(entry.lead_ids))
+
+    @classmethod
+    def is_saved_filter(cls, user, config: Dict) -> bool:
+        """Whether a search config is one of the user's saved filters"""
+        from .filtering_system import SavedFilter
+
+        config_hash = filter_config_hash(config)
+        return any(
+            filter_config_hash(saved.get('config', {})) == config_hash
+            for saved in SavedFilter.list_saved_filters(user).values()
+        )
+
+    @classmethod
+    def purge_expired(cls) -> int:
+        """Delete result sets past their TTL (they would be rebuilt on access anyway)"""
+        deleted, _ = FilterResultSet.objects.exclude(cls._unexpired()).delete()
+        return deleted
+
+    @classmethod
+    def _active_entries(cls, owner_ids: Iterable[int]):
+        """Fresh, unexpired result sets whose scope includes any of the owners"""
+        return FilterResultSet.objects.filter(
+            Q(scope_owner__isnull=True) | Q(scope_owner_id__in=list(owner_ids)),
+            cls._unexpired(),
+            is_stale=False,
+        )
+
+    @staticmethod
+    def _unexpired() -> Q:
+        """Result sets built within their TTL"""
+        now = timezone.now()
+        return Q(built_at__gte=now - RESULT_TTL) & (
+            Q(built_at__gte=now - RELATIVE_RESULT_TTL)
+            | ~Q(filter_config__has_any_keys=sorted(TIME_RELATIVE_KEYS))
+        )
+
+    @staticmethod
+    def _remove_ids(entry_pk: int, remove: set, seen_ids: Optional[array] = None):
+        """
+        Remove lead IDs from a stored set under a row lock
+        seen_ids is the set as read without the lock; when it holds none of
+        the IDs the row is left alone
+        """
+        if seen_ids is not None and not len(find_ids(seen_ids, remove)):
+            return
+        with transaction.atomic():
+            entry = FilterResultSet.objects.select_for_update().filter(pk=entry_pk).first()
+            if entry is None:
+                return
+            ids = unpack_ids(entry.lead_ids)
+            positions = find_ids(ids, remove)
+            if len(positions):
+                kept = array('q')
+                kept.frombytes(np.delete(np.frombuffer(ids, dtype=np.int64), positions).tobytes())
+                entry.lead_ids = pack_ids(kept)
+                entry.result_count = len(kept)
+                entry.save(update_fields=['lead_ids', 'result_count'])
+
+    @staticmethod
+    def _is_fresh(entry: FilterResultSet, scope_owner_id: Optional[int]) -> bool:
+        """Whether a stored set can be served without rebuilding"""
+        if entry.is_stale or entry.scope_owner_id != scope_owner_id:
+            return False
+        ttl = RELATIVE_RESULT_TTL if TIME_RELATIVE_KEYS & set(entry.filter_config) else RESULT_TTL
+        return timezone.now() - entry.built_at < ttl
+
+
+@contextmanager
+def deferred_invalidation(owner_id: Optional[int] = None):
+    """
+    Skip per-row patching during bulk writes (CSV imports etc.) and invalidate
+    the affected result sets once at the end instead
+    """
+    depth = getattr(_state, 'deferred', 0)
+    _state.deferred = depth + 1
+    try:
+        yield
+    finally:
+        _state.deferred = depth
+        MaterializedFilterResults.invalidate(owner_id)
+
+
+def _deferred() -> bool:
+    return getattr(_state, 'deferred', 0) > 0
+
+
+@receiver(pre_save, sender=Lead)
+def snapshot_lead(sender, instance, raw=False, **kwargs):
+    """Remember the values that decide filter membership order before a lead changes"""
+    if raw or _deferred() or instance.pk is None:
+        return
+    instance._filter_snapshot = Lead.objects.filter(pk=instance.pk).values(*LEAD_SNAPSHOT_FIELDS).first()
+
+
+@receiver(post_save, sender=Lead)
+def patch_results_for_lead(sender, instance, created=False, raw=False, **kwargs):
+    """Patch materialized result sets after a lead is created or updated"""
+    if raw or _deferred():
+        return
+
+    snapshot = instance.__dict__.pop('_filter_snapshot', None)
+    owner_ids = {instance.owner_id}
+    if snapshot is None:
+        changed_paths = set()
+    else:
+        owner_ids.add(snapshot['owner_id'])
+        changed_paths = {f for f in LEAD_SNAPSHOT_FIELDS if snapshot[f] != getattr(instance, f)}
+        if 'property_id' in changed_paths:
+            changed_paths.update(f'property__{f}' for f in PROPERTY_SNAPSHOT_FIELDS)
+
+    try:
+        MaterializedFilterResults.patch_leads([instance.pk], owner_ids, changed_paths)
+    except Exception as e:
+        logger.error(f"Failed to patch filter results for lead {instance.pk}: {str(e)}")
+        MaterializedFilterResults.invalidate(instance.owner_id)
+
+
+@receiver(post_delete, sender=Lead)
+def remove_deleted_lead(sender, instance, **kwargs):
+    """Drop a deleted lead from materialized result sets"""
+    if _deferred():
+        return
+    MaterializedFilterResults.remove_lead(instance.pk, instance.owner_id)
+
+
+@receiver(pre_save, sender=Property)
+def snapshot_property(sender, instance, raw=False, **kwargs):
+    """Remember sortable property values before a property changes"""
+    if raw or _deferred() or instance.pk is None:
+        return
+    instance._filter_snapshot = Property.objects.filter(pk=instance.pk).values(*PROPERTY_SNAPSHOT_FIELDS).first()
+
+
+@receiver(post_save, sender=Property)
+def patch_results_for_property(sender, instance, created=False, raw=False, **kwargs):
+    """Patch materialized result sets for the leads attached to a property"""
+    snapshot = instance.__dict__.pop('_filter_snapshot', None)
+    if raw or created or _deferred():
+        return
+
+    leads = list(instance.leads.values_list('id', 'owner_id'))
+    if not leads:
+        return
+
+    if snapshot is None:
+        changed_paths = {f'property__{f}' for f in PROPERTY_SNAPSHOT_FIELDS}
+    else:
+        changed_paths = {f'property__{f}' for f in PROPERTY_SNAPSHOT_FIELDS
+                         if snapshot[f] != getattr(instance, f)}
+
+    owner_ids = {owner_id for _, owner_id in leads}
+    try:
+        MaterializedFilterResults.patch_leads([lead_id for lead_id, _ in leads], owner_ids, changed_paths)
+    except Exception as e:
+        logger.error(f"Failed to patch filter results for property {instance.pk}: {str(e)}")
+        for owner_id in owner_ids:
+            MaterializedFilterResults.invalidate(owner_id)
@@ -0,0 +1,410 @@
+"""
+Filter Specs for DroneStrike v2
+One canonical, hashable form for lead criteria coming from advanced search,
+saved filters, presets and campaign targeting. A spec is a sorted tuple of
+(name, op, value) predicates; it compiles once per hash into the ORM filter
+applied to a lead queryset, so identical criteria from any source share the
+compiled query and cached counts
+"""
+
+import functools
+import hashlib
+import json
+import logging
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db.models import Q, Value, FloatField
+from django.db.models.functions import Cast, Sqrt, Power, Sin, Cos, Radians, Now
+
+from .spatial_index import radius_prefilter, EARTH_RADIUS_KM
+
+logger = logging.getLogger(__name__)
+
+
+Predicate = namedtuple('Predicate', ['name', 'op', 'value'])
+
+# Predicate name -> lead field path for plain 'in' / 'gte' / 'lte' / 'eq' lookups
+FIELD_PATHS = {
+    'state': 'mailing_state',
+    'city': 'mailing_city',
+    'zip': 'mailing_zip5',
+    'property_value': 'property__total_value',
+    'taxes_due': 'property__ple_amount_due',
+    'ltv_ratio': 'property__ltv_ratio',
+    'property_type': 'property__property_type',
+    'square_feet': 'property__square_feet',
+    'year_built': 'property__year_built',
+    'bedrooms': 'property__bedrooms',
+    'bathrooms': 'property__bathrooms',
+    'in_foreclosure': 'property__in_foreclosure',
+    'existing_tax_loan': 'property__existing_tax_loan',
+    'lead_status': 'lead_status',
+    'score': 'score_value',
+    'owner_type': 'owner_type',
+    'workflow_stage': 'workflow_stage',
+}
+
+# Advanced search / saved filter keys:
+# key -> (category, predicate name, op, kind, label template)
+# kinds: list (non-empty list or scalar), number / days (truthy only),
+# bool (any value, Yes/No label), flag (truthy only, always True)
+SEARCH_KEYS = {
+    'states': ('geographic', 'state', 'in', 'list', 'States: {value}'),
+    'counties': ('geographic', 'county', 'in', 'list', 'Counties: {value}'),
+    'cities': ('geographic', 'city', 'in', 'list', 'Cities: {value}'),
+    'zip_codes': ('geographic', 'zip', 'in', 'list', 'ZIP Codes: {value}'),
+    'min_property_value': ('financial', 'property_value', 'gte', 'number', 'Min Property Value: ${value:,}'),
+    'max_property_value': ('financial', 'property_value', 'lte', 'number', 'Max Property Value: ${value:,}'),
+    'min_taxes_due': ('financial', 'taxes_due', 'gte', 'number', 'Min Taxes Due: ${value:,}'),
+    'max_taxes_due': ('financial', 'taxes_due', 'lte', 'number', 'Max Taxes Due: ${value:,}'),
+    'max_ltv_ratio': ('financial', 'ltv_ratio', 'lte', 'number', 'Max LTV Ratio: {value}%'),
+    'min_ltv_ratio': ('financial', 'ltv_ratio', 'gte', 'number', 'Min LTV Ratio: {value}%'),
+    'property_types': ('property', 'property_type', 'in', 'list', 'Property Types: {value}'),
+    'min_square_feet': ('property', 'square_feet', 'gte', 'number', 'Min Square Feet: {value:,}'),
+    'max_square_feet': ('property', 'square_feet', 'lte', 'number', 'Max Square Feet: {value:,}'),
+    'min_year_built': ('property', 'year_built', 'gte', 'number', 'Built After: {value}'),
+    'max_year_built': ('property', 'year_built', 'lte', 'number', 'Built Before: {value}'),
+    'min_bedrooms': ('property', 'bedrooms', 'gte', 'number', 'Min Bedrooms: {value}'),
+    'min_bathrooms': ('property', 'bathrooms', 'gte', 'number', 'Min Bathrooms: {value}'),
+    'in_foreclosure': ('legal', 'in_foreclosure', 'eq', 'bool', 'In Foreclosure: {value}'),
+    'has_lawsuit': ('legal', 'has_lawsuit', 'eq', 'bool', 'Has Lawsuit: {value}'),
+    'has_existing_tax_loan': ('legal', 'existing_tax_loan', 'eq', 'bool', 'Has Existing Tax Loan: {value}'),
+    'lead_statuses': ('lead', 'lead_status', 'in', 'list', 'Lead Status: {value}'),
+    'min_score': ('lead', 'score', 'gte', 'number', 'Min Score: {value}'),
+    'max_score': ('lead', 'score', 'lte', 'number', 'Max Score: {value}'),
+    'owner_types': ('lead', 'owner_type', 'in', 'list', 'Owner Types: {value}'),
+    'has_email': ('lead', 'has_email', 'eq', 'bool', 'Has Email: {value}'),
+    'has_phone': ('lead', 'has_phone', 'eq', 'bool', 'Has Phone: {value}'),
+    'exclude_do_not_contact': ('lead', 'exclude_do_not_contact', 'eq', 'flag', 'Exclude Do Not Contact: Yes'),
+    'exclude_dangerous': ('lead', 'exclude_dangerous', 'eq', 'flag', 'Exclude Dangerous Properties: Yes'),
+    'exclude_business': ('lead', 'exclude_business', 'eq', 'flag', 'Exclude Business Properties: Yes'),
+    'last_contact_days': ('date', 'last_contact_within_days', 'eq', 'days', 'Last Contact Within: {value} days'),
+    'created_since_days': ('date', 'created_within_days', 'eq', 'days', 'Created Within: {value} days'),
+}
+
+RADIUS_KEYS = ('center_lat', 'center_lng', 'radius_miles')
+
+# Predicates measured against "now" - their results drift as time passes
+TIME_RELATIVE_PREDICATES = {'last_contact_within_days', 'created_within_days', 'no_contact_within_days'}
+
+# Predicates over communication history - Communication writes do not bump
+# lead data versions, so their counts are never cached
+COMMUNICATION_PREDICATES = {'no_contact_within_days', 'has_unopened_email', 'responded'}
+
+COUNT_CACHE_PREFIX = 'filter_count'
+COUNT_CACHE_TIMEOUT = 60 * 60  # 1 hour; lead data version bumps invalidate sooner
+RELATIVE_COUNT_CACHE_TIMEOUT = 60 * 15
+
+
+class FilterSpec:
+    """
+    Canonical, hashable lead criteria
+    Equal specs have equal hashes no matter which engine or key order produced
+    them; labels are the human-readable filter descriptions and do not take
+    part in equality
+    """
+
+    __slots__ = ('predicates', 'hash', 'labels')
+
+    def __init__(self, predicates: Iterable[Predicate] = (), labels: Optional[List[str]] = None):
+        self.predicates = tuple(sorted(set(predicates), key=_predicate_sort_key))
+        payload = json.dumps([list(p) for p in self.predicates], default=_json_default, separators=(',', ':'))
+        self.hash = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        self.labels = list(labels or [])
+
+    def __eq__(self, other):
+        return isinstance(other, FilterSpec) and self.hash == other.hash
+
+    def __hash__(self):
+        return hash(self.hash)
+
+    def __bool__(self):
+        return bool(self.predicates)
+
+    def __repr__(self):
+        return f"FilterSpec({self.hash[:12]}, {len(self.predicates)} predicates)"
+
+    def merge(self, other: 'FilterSpec') -> 'FilterSpec':
+        """Spec matching leads that satisfy both specs"""
+        return FilterSpec(self.predicates + other.predicates, self.labels + other.labels)
+
+    @property
+    def is_time_relative(self) -> bool:
+        return any(p.name in TIME_RELATIVE_PREDICATES for p in self.predicates)
+
+    @property
+    def is_cacheable(self) -> bool:
+        """Whether result counts can be cached behind lead data versions"""
+        return not any(p.name in COMMUNICATION_PREDICATES for p in self.predicates)
+
+    def compile(self) -> 'CompiledFilter':
+        """Compiled ORM filter for this spec (compiled once per hash)"""
+        return _compile(self)
+
+    def apply(self, queryset):
+        """Restrict a lead queryset to leads matching the spec"""
+        return self.compile().apply(queryset)
+
+    @classmethod
+    def from_search_config(cls, config: Dict[str, Any], category: Optional[str] = None) -> 'FilterSpec':
+        """
+        Spec for an advanced search / saved filter / preset config
+        category limits it to one filter group (geographic, financial,
+        property, legal, lead or date); unknown keys are ignored
+        """
+        predicates, labels = [], []
+        for key, (key_category, name, op, kind, label) in SEARCH_KEYS.items():
+            if category and key_category != category:
+                continue
+            raw = config.get(key)
+            if kind == 'bool':
+                if key not in config or raw is None:
+                    continue
+                predicates.append(Predicate(name, op, bool(raw)))
+                labels.append(label.format(value='Yes' if raw else 'No'))
+                continue
+            if not raw:
+                continue
+            if kind == 'list':
+                values = raw if isinstance(raw, list) else [raw]
+                predicates.append(Predicate(name, op, _canonical_list(values)))
+                labels.append(label.format(value=', '.join(values)))
+            elif kind == 'flag':
+                predicates.append(Predicate(name, op, True))
+                labels.append(label)
+            else:
+                value = _canonical_number(raw)
+                predicates.append(Predicate(name, op, value))
+                labels.append(label.format(value=value))
+
+        if category in (None, 'geographic') and all(config.get(k) is not None for k in RADIUS_KEYS):
+            lat, lng, miles = (config[k] for k in RADIUS_KEYS)
+            predicates.append(Predicate('radius', 'within', tuple(_canonical_number(v) for v in (lat, lng, miles))))
+            labels.append(f"Within {miles} miles of {lat}, {lng}")
+
+        return cls(predicates, labels)
+
+    @classmethod
+    def from_targeting_criteria(cls, criteria: Dict[str, Any]) -> 'FilterSpec':
+        """Spec for campaign targeting criteria (CampaignTargetingEngine format)"""
+        predicates = []
+
+        def add_list(name, values):
+            if values:
+                predicates.append(Predicate(name, 'in', _canonical_list(values if isinstance(values, list) else [values])))
+
+        def add_number(name, op, value):
+            if value is not None and value != '':
+                predicates.append(Predicate(name, op, _canonical_number(value)))
+
+        geo = criteria.get('geographic') or {}
+        add_list('state', geo.get('states'))
+        add_list('city', geo.get('cities'))
+        add_list('zip', geo.get('zip_codes'))
+
+        add_list('lead_status', criteria.get('lead_status'))
+        add_list('workflow_stage', criteria.get('workflow_stages'))
+
+        prop = criteria.get('property_criteria') or {}
+        add_number('property_value', 'gte', prop.get('min_value'))
+        add_number('property_value', 'lte', prop.get('max_value'))
+        add_list('property_type', prop.get('property_types'))
+        add_number('taxes_due', 'gte', prop.get('min_taxes_due'))
+
+        comm = criteria.get('communication_history') or {}
+        if comm.get('exclude_recent_contacts'):
+            predicates.append(Predicate('no_contact_within_days', 'eq', int(comm['exclude_recent_contacts'])))
+        if comm.get('only_unopened_emails'):
+            predicates.append(Predicate('has_unopened_email', 'eq', True))
+
+        demo = criteria.get('demographics') or {}
+        add_list('owner_type', demo.get('owner_types'))
+        if demo.get('exclude_businesses'):
+            predicates.append(Predicate('exclude_business', 'eq', True))
+
+        engagement = criteria.get('engagement') or {}
+        add_number('score', 'gte', engagement.get('min_lead_score'))
+        if engagement.get('response_history') in ('responsive', 'non_responsive'):
+            predicates.append(Predicate('responded', 'eq', engagement['response_history'] == 'responsive'))
+
+        if criteria.get('respect_opt_outs', True):
+            predicates.append(Predicate('exclude_do_not_contact', 'eq', True))
+
+        return cls(predicates)
+
+
+class CompiledFilter:
+    """
+    ORM form of a spec: one Q over plain predicates plus the optional
+    radius step (which needs a distance annotation)
+    """
+
+    __slots__ = ('q', 'radius')
+
+    def __init__(self, q: Q, radius: Optional[Tuple] = None):
+        self.q = q
+        self.radius = radius
+
+    def apply(self, queryset):
+        if self.q:
+            queryset = queryset.filter(self.q)
+        if self.radius:
+            queryset = apply_radius_filter(queryset, *self.radius)
+        return queryset
+
+
+@functools.lru_cache(maxsize=512)
+def _compile(spec: FilterSpec) -> CompiledFilter:
+    q = Q()
+    radius = None
+    for predicate in spec.predicates:
+        if predicate.name == 'radius':
+            radius = predicate.value
+        else:
+            q &= compile_predicate(predicate)
+    return CompiledFilter(q, radius)
+
+
+def compile_predicate(predicate: Predicate) -> Q:
+    """Q object for a single predicate"""
+    from .communication_models import Communication
+
+    name, op, value = predicate
+    if name in FIELD_PATHS:
+        path = FIELD_PATHS[name]
+        return Q(**{path if op == 'eq' else f"{path}__{op}": list(value) if op == 'in' else value})
+
+    if name == 'county':
+        return Q(mailing_county__in=list(value)) | Q(property__county__name__in=list(value))
+    if name == 'has_lawsuit':
+        return Q(property__ple_lawsuit_no__isnull=not value)
+    if name == 'has_email':
+        return Q(email__isnull=False, email__gt='') if value else Q(email__isnull=True) | Q(email='')
+    if name == 'has_phone':
+        return Q(phone_cell__isnull=False, phone_cell__gt='') if value else Q(phone_cell__isnull=True) | Q(phone_cell='')
+    if name == 'exclude_do_not_contact':
+        return Q(do_not_email=False, do_not_mail=False)
+    if name == 'exclude_dangerous':
+        return Q(is_dangerous=False)
+    if name == 'exclude_business':
+        return Q(is_business=False)
+
+    # Time-relative predicates compare against the database clock, so the
+    # compiled filter stays valid however long it is cached
+    if name == 'last_contact_within_days':
+        return Q(last_contact__gte=Now() - timedelta(days=float(value))) | Q(last_contact__isnull=True)
+    if name == 'created_within_days':
+        return Q(created_at__gte=Now() - timedelta(days=float(value)))
+
+    if name == 'no_contact_within_days':
+        recent = Communication.objects.filter(created_at__gte=Now() - timedelta(days=float(value)))
+        return ~Q(id__in=recent.values('lead_id'))
+    if name == 'has_unopened_email':
+        unopened = Communication.objects.filter(type='email', opened_at__isnull=True)
+        return Q(id__in=unopened.values('lead_id'))
+    if name == 'responded':
+        responded = Q(id__in=Communication.objects.filter(response_received=True).values('lead_id'))
+        return responded if value else ~responded
+
+    raise ValueError(f"Unknown filter predicate: {name}")
+
+
+def apply_radius_filter(queryset, center_lat, center_lng, radius_miles):
+    """
+    Apply geographic radius filtering using Haversine formula
+    A bounding-box and geohash cell-range prefilter narrows the rows through
+    the spatial index first, so the exact distance is only computed for rows
+    near the center point
+    """
+    # Convert radius from miles to kilometers
+    radius_km = float(radius_miles) * 1.60934
+
+    # Use Haversine formula for distance calculation
+    # This is an approximation but works well for most use cases
+    earth_radius_km = EARTH_RADIUS_KM
+
+    queryset = queryset.filter(radius_prefilter(float(center_lat), float(center_lng), radius_km))
+
+    # Coordinates are stored as decimals; compare in floating point
+    latitude = Cast('latitude', FloatField())
+    longitude = Cast('longitude', FloatField())
+    center_lat = Value(float(center_lat), output_field=FloatField())
+    center_lng = Value(float(center_lng), output_field=FloatField())
+
+    return queryset.annotate(
+        distance=earth_radius_km * 2 * Sqrt(
+            Power(
+                Sin(Radians(latitude - center_lat) / 2), 2
+            ) +
+            Cos(Radians(center_lat)) *
+            Cos(Radians(latitude)) *
+            Power(
+                Sin(Radians(longitude - center_lng) / 2), 2
+            )
+        )
+    ).filter(distance__lte=radius_km)
+
+
+def cached_count(queryset, spec: FilterSpec, scope: str, count_mode: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Count a spec's matches, shared through the cache by every caller with the
+    same scope, spec and count mode
+    queryset must be the scope's base leads with the spec already applied;
+    scope is a FacetEngine scope, whose data version retires cached counts
+    when the scope's leads change
+    """
+    from .facet_engine import FacetEngine
+    from .pagination import count_queryset, resolve_count_mode
+
+    count_mode = resolve_count_mode(count_mode)
+    if not spec.is_cacheable:
+        return count_queryset(queryset, count_mode)
+
+    try:
+        key = f"{COUNT_CACHE_PREFIX}:{scope}:{FacetEngine.version(scope)}:{spec.hash}:{count_mode}"
+        cached = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Filter count cache unavailable: {str(e)}")
+        return count_queryset(queryset, count_mode)
+
+    if cached is not None:
+        return cached
+
+    count_info = count_queryset(queryset, count_mode)
+    timeout = RELATIVE_COUNT_CACHE_TIMEOUT if spec.is_time_relative else COUNT_CACHE_TIMEOUT
+    try:
+        cache.set(key, count_info, timeout)
+    except Exception as e:
+        logger.warning(f"Failed to cache filter count for {scope}: {str(e)}")
+    return count_info
+
+
+def _canonical_list(values) -> Tuple[str, ...]:
+    return tuple(sorted({str(v) for v in values}))
+
+
+def _canonical_number(value):
+    """1000, 1000.0, '1000' and Decimal('1000.00') all become 1000"""
+    try:
+        number = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Invalid numeric filter value: {value!r}")
+    if number == number.to_integral_value():
+        return int(number)
+    return number.normalize()
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return format(value, 'f')
+    if isinstance(value, tuple):
+        return list(value)
+    return str(value)
+
+
+def _predicate_sort_key(predicate: Predicate):
+    return (predicate.name, predicate.op, json.dumps(predicate.value, default=_json_default))
@@ -3,14 +3,44 @@ Advanced Property Filtering System for DroneStrike v2
 Based on the original Node.js system's sophisticated filtering capabilities
 """
 
-import math
-from decimal import Decimal
+import functools
+import time
+from contextlib import contextmanager
 from typing import Dict, List, Optional, Tuple
-from django.db.models import Q, F, Value, DecimalField, Case, When
-from django.db.models.functions import Cast, Sqrt, Power, Sin, Cos, Radians
+from django.db import connections
+from django.db.models import Q
 from django.utils import timezone
-from datetime import timedelta
-from .models import Lead, Property, County
+from .models import Lead, County
+from .filter_spec import FilterSpec, cached_count
+from .pagination import KeysetPaginator, count_queryset, planner_estimate
+
+
+def _profiled_stage(method):
+    """Record rows remaining and build time after a filter stage when profiling"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.profiling:
+            return method(self, *args, **kwargs)
+        
+        filters_before = len(self.filters_applied)
+        started = time.perf_counter()
+        result = method(self, *args, **kwargs)
+        build_ms = (time.perf_counter() - started) * 1000
+        
+        # Stages that added no filter leave the row count unchanged
+        if len(self.filters_applied) > filters_before:
+            started = time.perf_counter()
+            rows, row_source = self._estimate_rows(self.queryset)
+            self.stage_profile.append({
+                'stage': method.__name__,
+                'filters': self.filters_applied[filters_before:],
+                'rows': rows,
+                'row_source': row_source,
+                'build_ms': round(build_ms, 3),
+                'estimate_ms': round((time.perf_counter() - started) * 1000, 3),
+            })
+        return result
+    return wrapper
 
 
 class PropertyFilter:
@@ -19,271 +49,90 @@ class PropertyFilter:
     Supports geographic, financial, legal, and custom criteria filtering
     """
     
-    def __init__(self, queryset=None):
-        """Initialize with base queryset or default to all leads"""
-        self.queryset = queryset or Lead.objects.select_related('property').all()
+    def __init__(self, queryset=None, profiling: bool = False, scope: Optional[str] = None):
+        """
+        Initialize with base queryset or default to all leads
+        With profiling enabled, every filter stage records its remaining rows
+        (see get_profile)
+        scope names the base queryset's FacetEngine scope; when given, counts
+        are shared through the cache with every engine filtering that scope
+        by the same spec
+        """
+        self.queryset = queryset if queryset is not None else Lead.objects.select_related('property').all()
+        self.scope = scope
+        self.spec = FilterSpec()
+        self.has_custom_filters = False
         self.filters_applied = []
         self.sort_criteria = []
+        self.sort_ordering = None
+        self.profiling = profiling
+        self.stage_profile = []
+        self.timings = {}
+        self._count_cache = (None, None, None)  # (queryset, count_mode, count_info)
+        if profiling:
+            rows, row_source = self._estimate_rows(self.queryset)
+            self.stage_profile.append({'stage': 'base', 'filters': [], 'rows': rows, 'row_source': row_source})
     
+    @_profiled_stage
     def apply_geographic_filters(self, **kwargs):
         """
-        Apply geographic filtering
+        Apply geographic filtering (states, counties, cities, ZIP codes and
+        radius from a center point)
         """
-        # State filtering
-        if 'states' in kwargs and kwargs['states']:
-            states = kwargs['states'] if isinstance(kwargs['states'], list) else [kwargs['states']]
-            self.queryset = self.queryset.filter(mailing_state__in=states)
-            self.filters_applied.append(f"States: {', '.join(states)}")
-        
-        # County filtering
-        if 'counties' in kwargs and kwargs['counties']:
-            counties = kwargs['counties'] if isinstance(kwargs['counties'], list) else [kwargs['counties']]
-            self.queryset = self.queryset.filter(
-                Q(mailing_county__in=counties) |
-                Q(property__county__name__in=counties)
-            )
-            self.filters_applied.append(f"Counties: {', '.join(counties)}")
-        
-        # City filtering
-        if 'cities' in kwargs and kwargs['cities']:
-            cities = kwargs['cities'] if isinstance(kwargs['cities'], list) else [kwargs['cities']]
-            self.queryset = self.queryset.filter(mailing_city__in=cities)
-            self.filters_applied.append(f"Cities: {', '.join(cities)}")
-        
-        # ZIP code filtering
-        if 'zip_codes' in kwargs and kwargs['zip_codes']:
-            zip_codes = kwargs['zip_codes'] if isinstance(kwargs['zip_codes'], list) else [kwargs['zip_codes']]
-            self.queryset = self.queryset.filter(mailing_zip5__in=zip_codes)
-            self.filters_applied.append(f"ZIP Codes: {', '.join(zip_codes)}")
-        
-        # Radius filtering (from center point)
-        if all(k in kwargs for k in ['center_lat', 'center_lng', 'radius_miles']):
-            self.queryset = self._apply_radius_filter(
-                kwargs['center_lat'], 
-                kwargs['center_lng'], 
-                kwargs['radius_miles']
-            )
-            self.filters_applied.append(f"Within {kwargs['radius_miles']} miles of {kwargs['center_lat']}, {kwargs['center_lng']}")
-        
-        return self
+        return self.apply_spec(FilterSpec.from_search_config(kwargs, 'geographic'))
     
+    @_profiled_stage
     def apply_financial_filters(self, **kwargs):
         """
-        Apply financial criteria filtering
+        Apply financial criteria filtering (property value, taxes due, LTV ratio)
         """
-        # Property value range
-        if 'min_property_value' in kwargs and kwargs['min_property_value']:
-            self.queryset = self.queryset.filter(
-                property__total_value__gte=Decimal(str(kwargs['min_property_value']))
-            )
-            self.filters_applied.append(f"Min Property Value: ${kwargs['min_property_value']:,}")
-        
-        if 'max_property_value' in kwargs and kwargs['max_property_value']:
-            self.queryset = self.queryset.filter(
-                property__total_value__lte=Decimal(str(kwargs['max_property_value']))
-            )
-            self.filters_applied.append(f"Max Property Value: ${kwargs['max_property_value']:,}")
-        
-        # Tax amount due range
-        if 'min_taxes_due' in kwargs and kwargs['min_taxes_due']:
-            self.queryset = self.queryset.filter(
-                property__ple_amount_due__gte=Decimal(str(kwargs['min_taxes_due']))
-            )
-            self.filters_applied.append(f"Min Taxes Due: ${kwargs['min_taxes_due']:,}")
-        
-        if 'max_taxes_due' in kwargs and kwargs['max_taxes_due']:
-            self.queryset = self.queryset.filter(
-                property__ple_amount_due__lte=Decimal(str(kwargs['max_taxes_due']))
-            )
-            self.filters_applied.append(f"Max Taxes Due: ${kwargs['max_taxes_due']:,}")
-        
-        # Loan-to-Value ratio
-        if 'max_ltv_ratio' in kwargs and kwargs['max_ltv_ratio']:
-            # Calculate LTV as (taxes_due / property_value) * 100
-            self.queryset = self.queryset.annotate(
-                ltv_ratio=Case(
-                    When(property__total_value__gt=0,
-                         then=Cast(F('property__ple_amount_due') * 100 / F('property__total_value'), DecimalField(max_digits=5, decimal_places=2))),
-                    default=Value(0),
-                    output_field=DecimalField(max_digits=5, decimal_places=2)
-                )
-            ).filter(ltv_ratio__lte=kwargs['max_ltv_ratio'])
-            self.filters_applied.append(f"Max LTV Ratio: {kwargs['max_ltv_ratio']}%")
-        
-        if 'min_ltv_ratio' in kwargs and kwargs['min_ltv_ratio']:
-            if not hasattr(self.queryset.model, 'ltv_ratio'):
-                self.queryset = self.queryset.annotate(
-                    ltv_ratio=Case(
-                        When(property__total_value__gt=0,
-                             then=Cast(F('property__ple_amount_due') * 100 / F('property__total_value'), DecimalField(max_digits=5, decimal_places=2))),
-                        default=Value(0),
-                        output_field=DecimalField(max_digits=5, decimal_places=2)
-                    )
-                )
-            self.queryset = self.queryset.filter(ltv_ratio__gte=kwargs['min_ltv_ratio'])
-            self.filters_applied.append(f"Min LTV Ratio: {kwargs['min_ltv_ratio']}%")
-        
-        return self
+        return self.apply_spec(FilterSpec.from_search_config(kwargs, 'financial'))
     
+    @_profiled_stage
     def apply_property_filters(self, **kwargs):
         """
         Apply property-specific filters
         """
-        # Property types
-        if 'property_types' in kwargs and kwargs['property_types']:
-            property_types = kwargs['property_types'] if isinstance(kwargs['property_types'], list) else [kwargs['property_types']]
-            self.queryset = self.queryset.filter(property__property_type__in=property_types)
-            self.filters_applied.append(f"Property Types: {', '.join(property_types)}")
-        
-        # Square footage range
-        if 'min_square_feet' in kwargs and kwargs['min_square_feet']:
-            self.queryset = self.queryset.filter(property__square_feet__gte=kwargs['min_square_feet'])
-            self.filters_applied.append(f"Min Square Feet: {kwargs['min_square_feet']:,}")
-        
-        if 'max_square_feet' in kwargs and kwargs['max_square_feet']:
-            self.queryset = self.queryset.filter(property__square_feet__lte=kwargs['max_square_feet'])
-            self.filters_applied.append(f"Max Square Feet: {kwargs['max_square_feet']:,}")
-        
-        # Year built range
-        if 'min_year_built' in kwargs and kwargs['min_year_built']:
-            self.queryset = self.queryset.filter(property__year_built__gte=kwargs['min_year_built'])
-            self.filters_applied.append(f"Built After: {kwargs['min_year_built']}")
-        
-        if 'max_year_built' in kwargs and kwargs['max_year_built']:
-            self.queryset = self.queryset.filter(property__year_built__lte=kwargs['max_year_built'])
-            self.filters_applied.append(f"Built Before: {kwargs['max_year_built']}")
-        
-        # Bedrooms/Bathrooms
-        if 'min_bedrooms' in kwargs and kwargs['min_bedrooms']:
-            self.queryset = self.queryset.filter(property__bedrooms__gte=kwargs['min_bedrooms'])
-            self.filters_applied.append(f"Min Bedrooms: {kwargs['min_bedrooms']}")
-        
-        if 'min_bathrooms' in kwargs and kwargs['min_bathrooms']:
-            self.queryset = self.queryset.filter(property__bathrooms__gte=kwargs['min_bathrooms'])
-            self.filters_applied.append(f"Min Bathrooms: {kwargs['min_bathrooms']}")
-        
-        return self
+        return self.apply_spec(FilterSpec.from_search_config(kwargs, 'property'))
     
+    @_profiled_stage
     def apply_legal_filters(self, **kwargs):
         """
         Apply legal status filters
         """
-        # Foreclosure status
-        if 'in_foreclosure' in kwargs:
-            if kwargs['in_foreclosure']:
-                self.queryset = self.queryset.filter(property__in_foreclosure=True)
-                self.filters_applied.append("In Foreclosure: Yes")
-            else:
-                self.queryset = self.queryset.filter(property__in_foreclosure=False)
-                self.filters_applied.append("In Foreclosure: No")
-        
-        # Lawsuit status
-        if 'has_lawsuit' in kwargs:
-            if kwargs['has_lawsuit']:
-                self.queryset = self.queryset.filter(property__ple_lawsuit_no__isnull=False)
-                self.filters_applied.append("Has Lawsuit: Yes")
-            else:
-                self.queryset = self.queryset.filter(property__ple_lawsuit_no__isnull=True)
-                self.filters_applied.append("Has Lawsuit: No")
-        
-        # Existing tax loan
-        if 'has_existing_tax_loan' in kwargs:
-            if kwargs['has_existing_tax_loan']:
-                self.queryset = self.queryset.filter(property__existing_tax_loan=True)
-                self.filters_applied.append("Has Existing Tax Loan: Yes")
-            else:
-                self.queryset = self.queryset.filter(property__existing_tax_loan=False)
-                self.filters_applied.append("Has Existing Tax Loan: No")
-        
-        return self
+        return self.apply_spec(FilterSpec.from_search_config(kwargs, 'legal'))
     
+    @_profiled_stage
     def apply_lead_filters(self, **kwargs):
         """
         Apply lead-specific filters
         """
-        # Lead status
-        if 'lead_statuses' in kwargs and kwargs['lead_statuses']:
-            statuses = kwargs['lead_statuses'] if isinstance(kwargs['lead_statuses'], list) else [kwargs['lead_statuses']]
-            self.queryset = self.queryset.filter(lead_status__in=statuses)
-            self.filters_applied.append(f"Lead Status: {', '.join(statuses)}")
-        
-        # Lead score range
-        if 'min_score' in kwargs and kwargs['min_score']:
-            self.queryset = self.queryset.filter(score_value__gte=kwargs['min_score'])
-            self.filters_applied.append(f"Min Score: {kwargs['min_score']}")
-        
-        if 'max_score' in kwargs and kwargs['max_score']:
-            self.queryset = self.queryset.filter(score_value__lte=kwargs['max_score'])
-            self.filters_applied.append(f"Max Score: {kwargs['max_score']}")
-        
-        # Owner type
-        if 'owner_types' in kwargs and kwargs['owner_types']:
-            owner_types = kwargs['owner_types'] if isinstance(kwargs['owner_types'], list) else [kwargs['owner_types']]
-            self.queryset = self.queryset.filter(owner_type__in=owner_types)
-            self.filters_applied.append(f"Owner Types: {', '.join(owner_types)}")
-        
-        # Contact availability
-        if 'has_email' in kwargs:
-            if kwargs['has_email']:
-                self.queryset = self.queryset.filter(email__isnull=False, email__gt='')
-                self.filters_applied.append("Has Email: Yes")
-            else:
-                self.queryset = self.queryset.filter(Q(email__isnull=True) | Q(email=''))
-                self.filters_applied.append("Has Email: No")
-        
-        if 'has_phone' in kwargs:
-            if kwargs['has_phone']:
-                self.queryset = self.queryset.filter(phone_cell__isnull=False, phone_cell__gt='')
-                self.filters_applied.append("Has Phone: Yes")
-            else:
-                self.queryset = self.queryset.filter(Q(phone_cell__isnull=True) | Q(phone_cell=''))
-                self.filters_applied.append("Has Phone: No")
-        
-        # Communication preferences
-        if 'exclude_do_not_contact' in kwargs and kwargs['exclude_do_not_contact']:
-            self.queryset = self.queryset.filter(
-                do_not_email=False,
-                do_not_mail=False
-            )
-            self.filters_applied.append("Exclude Do Not Contact: Yes")
-        
-        # Safety flags
-        if 'exclude_dangerous' in kwargs and kwargs['exclude_dangerous']:
-            self.queryset = self.queryset.filter(is_dangerous=False)
-            self.filters_applied.append("Exclude Dangerous Properties: Yes")
-        
-        # Business properties
-        if 'exclude_business' in kwargs and kwargs['exclude_business']:
-            self.queryset = self.queryset.filter(is_business=False)
-            self.filters_applied.append("Exclude Business Properties: Yes")
-        
-        return self
+        return self.apply_spec(FilterSpec.from_search_config(kwargs, 'lead'))
     
+    @_profiled_stage
     def apply_date_filters(self, **kwargs):
         """
         Apply date-based filters
         """
-        # Last contact date
-        if 'last_contact_days' in kwargs and kwargs['last_contact_days']:
-            cutoff_date = timezone.now() - timedelta(days=kwargs['last_contact_days'])
-            self.queryset = self.queryset.filter(
-                Q(last_contact__gte=cutoff_date) | Q(last_contact__isnull=True)
-            )
-            self.filters_applied.append(f"Last Contact Within: {kwargs['last_contact_days']} days")
-        
-        # Property creation date
-        if 'created_since_days' in kwargs and kwargs['created_since_days']:
-            cutoff_date = timezone.now() - timedelta(days=kwargs['created_since_days'])
-            self.queryset = self.queryset.filter(created_at__gte=cutoff_date)
-            self.filters_applied.append(f"Created Within: {kwargs['created_since_days']} days")
-        
+        return self.apply_spec(FilterSpec.from_search_config(kwargs, 'date'))
+    
+    def apply_spec(self, spec: FilterSpec):
+        """
+        Apply a filter spec through its compiled (hash-cached) ORM filter
+        """
+        if spec:
+            self.queryset = spec.apply(self.queryset)
+            self.spec = self.spec.merge(spec)
+            self.filters_applied.extend(spec.labels)
         return self
     
+    @_profiled_stage
     def apply_custom_filters(self, custom_query: Q):
         """
         Apply custom Q object filters for advanced use cases
         """
         self.queryset = self.queryset.filter(custom_query)
+        self.has_custom_filters = True
         self.filters_applied.append("Custom Filter Applied")
         return self
     
@@ -298,6 +147,8 @@ class PropertyFilter:
             'taxes_due_asc': 'property__ple_amount_due',
             'property_value_desc': '-property__total_value',
             'property_value_asc': 'property__total_value',
+            'ltv_desc': '-property__ltv_ratio',
+            'ltv_asc': 'property__ltv_ratio',
             'created_desc': '-created_at',
             'created_asc': 'created_at',
             'last_contact_desc': '-last_contact',
@@ -308,50 +159,132 @@ class PropertyFilter:
         
         sort_by = kwargs.get('sort_by', 'score_desc')
         if sort_by in sort_options:
-            self.queryset = self.queryset.order_by(sort_options[sort_by])
+            self.sort_ordering = sort_options[sort_by]
+            # id tiebreaker keeps the order stable across pages
+            tiebreaker = '-id' if self.sort_ordering.startswith('-') else 'id'
+            self.queryset = self.queryset.order_by(self.sort_ordering, tiebreaker)
             self.sort_criteria.append(sort_by)
         
         return self
     
+    def apply_config(self, config: Dict):
+        """
+        Apply every filter category and the sort from a saved filter config
+        Keys with None values are ignored, matching the advanced search API
+        """
+        config = {k: v for k, v in config.items() if v is not None}
+        if self.profiling:
+            # Stage by stage so the profile shows rows after each category
+            self.apply_geographic_filters(**config)
+            self.apply_financial_filters(**config)
+            self.apply_property_filters(**config)
+            self.apply_legal_filters(**config)
+            self.apply_lead_filters(**config)
+            self.apply_date_filters(**config)
+        else:
+            self.apply_spec(FilterSpec.from_search_config(config))
+        self.apply_sorting(**config)
+        return self
+    
     def get_results(self):
         """
         Get the filtered queryset results
         """
         return self.queryset
     
-    def get_summary(self):
+    def get_keyset_page(self, cursor: Optional[str] = None, limit: int = 50):
+        """
+        Get one page of results using keyset (cursor) pagination
+        Returns (results, next_cursor); raises InvalidCursor for a bad token
+        """
+        ordering = self.sort_ordering or '-id'
+        paginator = KeysetPaginator(self.queryset, ordering, limit, sort_key=ordering)
+        with self.timed('fetch'):
+            return paginator.get_page(cursor)
+    
+    def count_results(self, count_mode: Optional[str] = None) -> Dict:
+        """
+        Count the current results with a count strategy (exact, estimated or
+        capped - see pagination.count_queryset); repeated calls reuse the count
+        """
+        counted_queryset, counted_mode, count_info = self._count_cache
+        if counted_queryset is not self.queryset or counted_mode != count_mode:
+            with self.timed('count'):
+                if self.scope and not self.has_custom_filters:
+                    count_info = cached_count(self.queryset, self.spec, self.scope, count_mode)
+                else:
+                    count_info = count_queryset(self.queryset, count_mode)
+            self._count_cache = (self.queryset, count_mode, count_info)
+        return count_info
+    
+    def get_summary(self, count_mode: Optional[str] = None):
         """
         Get summary of applied filters and results
+        count_mode defaults to the SEARCH_COUNT_MODE setting
         """
+        count_info = self.count_results(count_mode)
+        
         return {
-            'total_results': self.queryset.count(),
+            'total_results': count_info['count'],
+            'total_results_display': count_info['display'],
+            'count_mode': count_info['mode'],
             'filters_applied': self.filters_applied,
             'sort_criteria': self.sort_criteria,
         }
     
-    def _apply_radius_filter(self, center_lat: float, center_lng: float, radius_miles: float):
+    @contextmanager
+    def timed(self, name: str):
+        """Record the wall time of a block in self.timings (milliseconds)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[f'{name}_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    
+    def explain(self) -> Dict:
         """
-        Apply geographic radius filtering using Haversine formula
+        Get the generated SQL and the database query plan for the current queryset
         """
-        # Convert radius from miles to kilometers
-        radius_km = radius_miles * 1.60934
+        try:
+            sql = str(self.queryset.query)
+        except Exception as e:
+            sql = f"<unavailable: {e}>"
         
-        # Use Haversine formula for distance calculation
-        # This is an approximation but works well for most use cases
-        earth_radius_km = 6371
+        try:
+            plan = self.queryset.explain()
+        except Exception as e:
+            plan = f"<unavailable: {e}>"
         
-        return self.queryset.annotate(
-            distance=earth_radius_km * 2 * Sqrt(
-                Power(
-                    Sin(Radians(F('latitude') - Value(center_lat)) / 2), 2
-                ) +
-                Cos(Radians(Value(center_lat))) *
-                Cos(Radians(F('latitude'))) *
-                Power(
-                    Sin(Radians(F('longitude') - Value(center_lng)) / 2), 2
-                )
-            )
-        ).filter(distance__lte=radius_km)
+        return {
+            'sql': sql,
+            'query_plan': plan,
+            'database': connections[self.queryset.db].vendor,
+        }
+    
+    def get_profile(self) -> Dict:
+        """
+        Get the profiling report: SQL, query plan, rows after each filter
+        stage (when profiling) and count/fetch wall times
+        """
+        profile = self.explain()
+        profile.update({
+            'stages': self.stage_profile,
+            'timings': self.timings,
+            'filters_applied': self.filters_applied,
+            'sort_criteria': self.sort_criteria,
+        })
+        return profile
+    
+    @staticmethod
+    def _estimate_rows(queryset) -> Tuple[int, str]:
+        """
+        Rows a queryset would return - the planner estimate on PostgreSQL,
+        an exact COUNT elsewhere
+        """
+        estimate = planner_estimate(queryset)
+        if estimate is not None:
+            return estimate, 'estimated'
+        return queryset.count(), 'exact'
 
 
 class SavedFilter:
@@ -370,6 +303,12 @@ class SavedFilter:
         profile = user.profile
         saved_filters = profile.preferences.get('saved_filters', {})
         
+        # Drop results materialized for the config this name used to hold
+        previous = saved_filters.get(name)
+        if previous and previous.get('config') != filter_config:
+            from .filter_materialization import MaterializedFilterResults
+            MaterializedFilterResults.discard(user, previous['config'])
+        
         saved_filters[name] = {
             'config': filter_config,
             'is_favorite': is_favorite,
@@ -420,6 +359,9 @@ class SavedFilter:
         saved_filters = profile.preferences.get('saved_filters', {})
         
         if name in saved_filters:
+            from .filter_materialization import MaterializedFilterResults
+            MaterializedFilterResults.discard(user, saved_filters[name].get('config', {}))
+            
             del saved_filters[name]
             profile.preferences['saved_filters'] = saved_filters
             profile.save()
@@ -514,22 +456,13 @@ class FilterPresets:
         return cls.PRESETS
     
     @classmethod
-    def apply_preset(cls, preset_name: str, queryset=None) -> PropertyFilter:
-        """Apply a preset filter to a queryset"""
+    def apply_preset(cls, preset_name: str, queryset=None, scope: Optional[str] = None) -> PropertyFilter:
+        """Apply a preset filter to a queryset (scope as for PropertyFilter)"""
         preset = cls.get_preset(preset_name)
         
-        filter_obj = PropertyFilter(queryset)
+        filter_obj = PropertyFilter(queryset, scope=scope)
         
         # Apply all filters from the preset config
-        config = preset['config']
-        
-        # Apply different filter categories
-        filter_obj.apply_geographic_filters(**config)
-        filter_obj.apply_financial_filters(**config)
-        filter_obj.apply_property_filters(**config)
-        filter_obj.apply_legal_filters(**config)
-        filter_obj.apply_lead_filters(**config)
-        filter_obj.apply_date_filters(**config)
-        filter_obj.apply_sorting(**config)
+        filter_obj.apply_config(preset['config'])
         
         return filter_obj
\ No newline at end of file
@@ -4,8 +4,10 @@ Property and lead filtering with geographic, financial, and custom criteria
 """
 
 import json
+import logging
+import time
+from django.conf import settings
 from django.http import JsonResponse
-from django.core.paginator import Paginator
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -13,9 +15,15 @@ from rest_framework import status
 
 from .models import Lead, Property
 from .filtering_system import PropertyFilter, SavedFilter, FilterPresets
+from .filter_spec import FilterSpec
+from .filter_materialization import MaterializedFilterResults
+from .facet_engine import FacetEngine
+from .pagination import InvalidCursor, CountStrategyPaginator, resolve_count_mode
 from .user_roles import UserPermission
 from .token_engine import TokenEngine
 
+logger = logging.getLogger(__name__)
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -29,14 +37,29 @@ def advanced_search_api(request):
                        status=status.HTTP_403_FORBIDDEN)
     
     try:
+        search_started = time.perf_counter()
         data = json.loads(request.body)
         
+        # Opt-in profiling report (SQL, query plan, per-stage rows, timings) - admins only
+        profiling = bool(data.get('profile')) and (
+            request.user.is_staff or request.user.profile.role == 'admin'
+        )
+        
         # Get pagination parameters
+        # Sending a 'cursor' key (null for the first page) selects keyset pagination
         page = data.get('page', 1)
         limit = min(data.get('limit', 50), 200)  # Max 200 results per page
+        use_cursor = 'cursor' in data
+        
+        # Total count strategy: exact, estimated or capped (SEARCH_COUNT_MODE by default)
+        count_mode = resolve_count_mode(data.get('count_mode'))
+        
+        # Saved filters are served from their materialized lead ID list
+        materialize = (bool(data.get('materialize')) and not use_cursor
+                       and MaterializedFilterResults.is_saved_filter(request.user, data))
         
         # Check if user has tokens for the search (if it's a complex search)
-        filter_count = len([k for k in data.keys() if k not in ['page', 'limit', 'save_filter']])
+        filter_count = len([k for k in data.keys() if k not in ['page', 'limit', 'cursor', 'save_filter', 'materialize', 'profile', 'count_mode']])
         if filter_count > 5:  # Complex search
             try:
                 TokenEngine.consume_tokens(
@@ -50,11 +73,15 @@ def advanced_search_api(request):
         
         # Create base queryset - scope to user's leads unless they can view all
         queryset = Lead.objects.select_related('property').all()
+        scope_owner = None
+        scope = FacetEngine.GLOBAL_SCOPE
         if not request.user.profile.has_permission(UserPermission.CAN_VIEW_ALL_MISSIONS):
             queryset = queryset.filter(owner=request.user)
+            scope_owner = request.user
+            scope = FacetEngine.owner_scope(request.user.pk)
         
         # Initialize filter
-        property_filter = PropertyFilter(queryset)
+        property_filter = PropertyFilter(queryset, profiling=profiling, scope=scope)
         
         # Apply geographic filters
         geographic_filters = {
@@ -125,15 +152,64 @@ def advanced_search_api(request):
         
         # Get results
         results_queryset = property_filter.get_results()
-        summary = property_filter.get_summary()
+        materialized = None
+        if materialize:
+            materialized = MaterializedFilterResults.get_page(request.user, data, scope_owner, page, limit)
+        
+        if materialized is not None:
+            summary = {
+                'total_results': materialized['total'],
+                'total_results_display': f"{materialized['total']:,}",
+                'count_mode': 'exact',
+                'filters_applied': property_filter.filters_applied,
+                'sort_criteria': property_filter.sort_criteria,
+            }
+        else:
+            summary = property_filter.get_summary(count_mode)
         
         # Paginate results
-        paginator = Paginator(results_queryset, limit)
-        page_obj = paginator.get_page(page)
+        if materialized is not None:
+            page_results = materialized['results']
+            pagination = {
+                'mode': 'offset',
+                'page': materialized['page'],
+                'pages': materialized['pages'],
+                'per_page': limit,
+                'total': materialized['total'],
+                'has_next': materialized['has_next'],
+                'has_previous': materialized['has_previous'],
+            }
+        elif use_cursor:
+            try:
+                page_results, next_cursor = property_filter.get_keyset_page(data.get('cursor'), limit)
+            except InvalidCursor as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            pagination = {
+                'mode': 'cursor',
+                'per_page': limit,
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None,
+            }
+        else:
+            paginator = CountStrategyPaginator(results_queryset, limit,
+                                               count_info=property_filter.count_results(count_mode))
+            with property_filter.timed('fetch'):
+                page_results = paginator.get_page(page)
+                page_results.object_list = list(page_results.object_list)
+            pagination = {
+                'mode': 'offset',
+                'page': page,
+                'pages': paginator.num_pages,
+                'per_page': limit,
+                'total': paginator.count,
+                'count_mode': summary['count_mode'],
+                'has_next': page_results.has_next(),
+                'has_previous': page_results.has_previous(),
+            }
         
         # Serialize results
         leads_data = []
-        for lead in page_obj:
+        for lead in page_results:
             lead_data = {
                 'id': lead.id,
                 'first_name': lead.first_name,
@@ -173,10 +249,9 @@ def advanced_search_api(request):
                     'existing_tax_loan': lead.property.existing_tax_loan,
                 }
                 
-                # Calculate LTV ratio if possible
-                if lead.property.total_value and lead.property.ple_amount_due and lead.property.total_value > 0:
-                    ltv_ratio = (float(lead.property.ple_amount_due) / float(lead.property.total_value)) * 100
-                    property_data['ltv_ratio'] = round(ltv_ratio, 2)
+                # LTV ratio is stored on the property when it can be calculated
+                if lead.property.total_value and lead.property.ple_amount_due and lead.property.ltv_ratio is not None:
+                    property_data['ltv_ratio'] = float(lead.property.ltv_ratio)
                 
                 lead_data['property'] = property_data
             
@@ -187,7 +262,7 @@ def advanced_search_api(request):
             try:
                 # Remove pagination and save_filter params from saved config
                 filter_config = {k: v for k, v in data.items() 
-                               if k not in ['page', 'limit', 'save_filter', 'filter_name']}
+                               if k not in ['page', 'limit', 'cursor', 'save_filter', 'filter_name', 'materialize', 'profile', 'count_mode']}
                 
                 SavedFilter.save_filter(
                     user=request.user,
@@ -199,22 +274,33 @@ def advanced_search_api(request):
                 # Don't fail the search if saving fails
                 pass
         
-        return Response({
+        response_data = {
             'results': leads_data,
             'summary': summary,
-            'pagination': {
-                'page': page,
-                'pages': paginator.num_pages,
-                'per_page': limit,
-                'total': paginator.count,
-                'has_next': page_obj.has_next(),
-                'has_previous': page_obj.has_previous(),
-            },
+            'pagination': pagination,
             'search_cost': {
                 'tokens_used': 1 if filter_count > 5 else 0,
                 'filter_count': filter_count
             }
-        })
+        }
+        
+        elapsed_ms = (time.perf_counter() - search_started) * 1000
+        slow_search = (
+            getattr(settings, 'SEARCH_SLOW_QUERY_LOGGING', False) and
+            elapsed_ms >= getattr(settings, 'SEARCH_SLOW_QUERY_THRESHOLD_MS', 1000)
+        )
+        if profiling or slow_search:
+            search_profile = property_filter.get_profile()
+            search_profile['timings']['total_ms'] = round(elapsed_ms, 3)
+            if profiling:
+                response_data['profile'] = search_profile
+            if slow_search:
+                logger.warning(
+                    f"Slow advanced search ({elapsed_ms:.0f} ms) for user {request.user.pk}: "
+                    f"{json.dumps(search_profile, default=str)}"
+                )
+        
+        return Response(response_data)
     
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -247,6 +333,7 @@ def apply_preset_api(request):
         preset_name = data.get('preset_name')
         page = data.get('page', 1)
         limit = min(data.get('limit', 50), 200)
+        count_mode = resolve_count_mode(data.get('count_mode'))
         
         if not preset_name:
             return Response({'error': 'preset_name is required'}, 
@@ -259,21 +346,51 @@ def apply_preset_api(request):
         
         # Create base queryset
         queryset = Lead.objects.select_related('property').all()
+        scope_owner = None
+        scope = FacetEngine.GLOBAL_SCOPE
         if not request.user.profile.has_permission(UserPermission.CAN_VIEW_ALL_MISSIONS):
             queryset = queryset.filter(owner=request.user)
+            scope_owner = request.user
+            scope = FacetEngine.owner_scope(request.user.pk)
         
         # Apply preset
         try:
-            property_filter = FilterPresets.apply_preset(preset_name, queryset)
+            property_filter = FilterPresets.apply_preset(preset_name, queryset, scope=scope)
         except ValueError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get results and paginate
-        results_queryset = property_filter.get_results()
-        summary = property_filter.get_summary()
+        # Serve the page from the preset's materialized lead IDs when possible
+        materialized = MaterializedFilterResults.get_page(
+            request.user, FilterPresets.get_preset(preset_name)['config'], scope_owner, page, limit
+        )
         
-        paginator = Paginator(results_queryset, limit)
-        page_obj = paginator.get_page(page)
+        if materialized is not None:
+            page_obj = materialized['results']
+            summary = {
+                'total_results': materialized['total'],
+                'total_results_display': f"{materialized['total']:,}",
+                'count_mode': 'exact',
+                'filters_applied': property_filter.filters_applied,
+                'sort_criteria': property_filter.sort_criteria,
+            }
+            pagination = {
+                'page': materialized['page'],
+                'pages': materialized['pages'],
+                'total': materialized['total'],
+            }
+        else:
+            results_queryset = property_filter.get_results()
+            summary = property_filter.get_summary(count_mode)
+            
+            paginator = CountStrategyPaginator(results_queryset, limit,
+                                               count_info=property_filter.count_results(count_mode))
+            page_obj = paginator.get_page(page)
+            pagination = {
+                'page': page,
+                'pages': paginator.num_pages,
+                'total': paginator.count,
+                'count_mode': summary['count_mode'],
+            }
         
         # Serialize results (same as advanced_search_api)
         leads_data = []
@@ -305,11 +422,7 @@ def apply_preset_api(request):
             'results': leads_data,
             'summary': summary,
             'preset_used': preset_name,
-            'pagination': {
-                'page': page,
-                'pages': paginator.num_pages,
-                'total': paginator.count,
-            }
+            'pagination': pagination,
         })
     
     except Exception as e:
@@ -395,13 +508,17 @@ def load_saved_filter_api(request):
             return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
         
         # Apply the saved filter (reuse advanced_search logic)
-        filter_config.update({'page': page, 'limit': limit})
+        filter_config.update({'page': page, 'limit': limit, 'materialize': True})
+        if 'cursor' in data:
+            filter_config['cursor'] = data['cursor']
         
         # Create new request with saved config
         from django.http import HttpRequest
         new_request = HttpRequest()
         new_request.user = request.user
         new_request.method = 'POST'
+        # Carry the auth headers over so the inner view authenticates the same user
+        new_request.META = request.META.copy()
         new_request._body = json.dumps(filter_config).encode('utf-8')
         
         # Apply the filter
@@ -431,42 +548,52 @@ def delete_saved_filter_api(request, filter_name):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def filter_options_api(request):
-    """Get available filter options for form building"""
-    # Get unique values for dropdowns
-    from django.db.models import Q
+    """
+    Get available filter options for form building
+    Optional ?filters=<json filter config> returns counts for the filtered lead set
+    """
+    try:
+        applied_filters = json.loads(request.query_params.get('filters') or '{}')
+    except ValueError:
+        return Response({'error': 'filters must be a JSON object'}, 
+                       status=status.HTTP_400_BAD_REQUEST)
+    if not isinstance(applied_filters, dict):
+        return Response({'error': 'filters must be a JSON object'}, 
+                       status=status.HTTP_400_BAD_REQUEST)
     
     # Base queryset for user's accessible data
     queryset = Lead.objects.select_related('property').all()
-    if not request.user.profile.has_permission(UserPermission.CAN_VIEW_ALL_MISSIONS):
+    if request.user.profile.has_permission(UserPermission.CAN_VIEW_ALL_MISSIONS):
+        scope = FacetEngine.GLOBAL_SCOPE
+    else:
         queryset = queryset.filter(owner=request.user)
+        scope = FacetEngine.owner_scope(request.user.pk)
     
-    # Get unique values
-    states = list(queryset.values_list('mailing_state', flat=True).distinct().order_by('mailing_state'))
-    counties = list(queryset.filter(mailing_county__isnull=False).values_list('mailing_county', flat=True).distinct().order_by('mailing_county'))
-    cities = list(queryset.values_list('mailing_city', flat=True).distinct().order_by('mailing_city')[:100])  # Limit cities
-    
-    property_types = []
-    owner_types = []
-    lead_statuses = []
+    # Equivalent filter configs share cached facets through their spec hash
+    try:
+        spec = FilterSpec.from_search_config(applied_filters)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if spec:
+        queryset = spec.apply(queryset)
     
-    if queryset.exists():
-        property_types = list(queryset.filter(property__property_type__isnull=False).values_list('property__property_type', flat=True).distinct())
-        owner_types = list(queryset.filter(owner_type__isnull=False).values_list('owner_type', flat=True).distinct())
-        lead_statuses = list(queryset.values_list('lead_status', flat=True).distinct())
+    # Every facet and its counts in one grouped query (cached per data version)
+    facets = FacetEngine.get_facets(queryset, scope, {'spec': spec.hash})
     
     return Response({
         'geographic_options': {
-            'states': states,
-            'counties': counties,
-            'cities': cities,
+            'states': FacetEngine.values(facets, 'states'),
+            'counties': FacetEngine.values(facets, 'counties'),
+            'cities': FacetEngine.values(facets, 'cities', 100),  # Limit cities
         },
         'property_options': {
-            'property_types': property_types,
+            'property_types': FacetEngine.values(facets, 'property_types'),
         },
         'lead_options': {
-            'owner_types': owner_types,
-            'lead_statuses': lead_statuses,
+            'owner_types': FacetEngine.values(facets, 'owner_types'),
+            'lead_statuses': FacetEngine.values(facets, 'lead_statuses'),
         },
+        'facets': facets,
         'sort_options': [
             {'value': 'score_desc', 'label': 'Score (High to Low)'},
             {'value': 'score_asc', 'label': 'Score (Low to High)'},
@@ -474,6 +601,8 @@ def filter_options_api(request):
             {'value': 'taxes_due_asc', 'label': 'Taxes Due (Low to High)'},
             {'value': 'property_value_desc', 'label': 'Property Value (High to Low)'},
             {'value': 'property_value_asc', 'label': 'Property Value (Low to High)'},
+            {'value': 'ltv_desc', 'label': 'LTV Ratio (High to Low)'},
+            {'value': 'ltv_asc', 'label': 'LTV Ratio (Low to High)'},
             {'value': 'created_desc', 'label': 'Recently Added'},
             {'value': 'created_asc', 'label': 'Oldest First'},
         ]
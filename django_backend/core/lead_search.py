@@ -0,0 +1,225 @@
+"""
+Full-Text Lead Search for DroneStrike v2
+Global search over each lead's denormalized search_document column:
+- PostgreSQL: pg_trgm GIN index, ranked by trigram word similarity
+- SQLite: FTS5 external-content table kept in sync by triggers, prefix
+  matching ranked by bm25
+- Other databases fall back to a substring match on search_document
+"""
+
+import logging
+import re
+from typing import List
+
+from django.db import connections, transaction, DatabaseError
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Lead, Property
+
+logger = logging.getLogger(__name__)
+
+
+LEAD_TABLE = 'core_lead'
+FTS_TABLE = 'core_lead_fts'
+TRIGRAM_INDEX = 'core_lead_search_trgm_idx'
+
+# Tokens that look like phone numbers also match the digits-only phone text
+PHONE_TOKEN_RE = re.compile(r'^[\d()+\-.]+$')
+
+SQLITE_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        search_document, content='{LEAD_TABLE}', content_rowid='id',
+        prefix='2 3', tokenize='unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {LEAD_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, search_document) VALUES (new.id, new.search_document);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {LEAD_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) VALUES ('delete', old.id, old.search_document);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF search_document ON {LEAD_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) VALUES ('delete', old.id, old.search_document);
+        INSERT INTO {FTS_TABLE}(rowid, search_document) VALUES (new.id, new.search_document);
+    END""",
+]
+
+POSTGRES_TRIGRAM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON {LEAD_TABLE} USING gin (search_document gin_trgm_ops)",
+]
+
+# Connection alias -> whether the SQLite FTS5 table exists
+_fts_available = {}
+
+
+def install_search_index(connection) -> bool:
+    """
+    Create the database-specific search index if it is missing
+    Returns True when the index was created (and, on SQLite, rebuilt)
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_indexes WHERE indexname = %s", [TRIGRAM_INDEX])
+            if cursor.fetchone():
+                return False
+            try:
+                with transaction.atomic(using=connection.alias):
+                    for statement in POSTGRES_TRIGRAM_DDL:
+                        cursor.execute(statement)
+            except DatabaseError as e:
+                # e.g. no permission to create the pg_trgm extension
+                logger.warning(f"Trigram index not created, lead search runs unindexed: {str(e)}")
+                return False
+        return True
+
+    if connection.vendor == 'sqlite':
+        expected = {FTS_TABLE, f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au'}
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE name IN (%s)" % ', '.join(['%s'] * len(expected)),
+                list(expected)
+            )
+            if {row[0] for row in cursor.fetchall()} == expected:
+                _fts_available[connection.alias] = True
+                return False
+            try:
+                for statement in SQLITE_FTS_DDL:
+                    cursor.execute(statement)
+                # Triggers may have been dropped by a table rebuild - resync from core_lead
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+            except DatabaseError as e:
+                logger.warning(f"SQLite FTS5 unavailable, lead search falls back to LIKE: {str(e)}")
+                _fts_available[connection.alias] = False
+                return False
+        _fts_available[connection.alias] = True
+        return True
+
+    return False
+
+
+def uninstall_search_index(connection):
+    """Drop the database-specific search index (reverse of install_search_index)"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"DROP INDEX IF EXISTS {TRIGRAM_INDEX}")
+        elif connection.vendor == 'sqlite':
+            for suffix in ('_ai', '_ad', '_au'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    _fts_available.pop(connection.alias, None)
+
+
+def ensure_search_index(sender, using='default', **kwargs):
+    """post_migrate hook - SQLite table rebuilds drop the FTS triggers"""
+    if install_search_index(connections[using]):
+        logger.info(f"Installed lead search index on '{using}'")
+
+
+class LeadSearchBackend:
+    """
+    Global lead search over the search_document column
+    """
+
+    @classmethod
+    def search(cls, queryset, term: str):
+        """
+        Restrict a lead queryset to leads matching every token of term
+        Matching leads get a search_rank usable by order_by_rank
+        """
+        tokens = cls.tokenize(term)
+        if not tokens:
+            return queryset
+
+        connection = connections[queryset.db]
+        if connection.vendor == 'sqlite' and cls._sqlite_fts_ready(connection):
+            return cls._search_sqlite(queryset, tokens)
+        if connection.vendor == 'postgresql':
+            return cls._search_postgres(queryset, tokens, term)
+        return queryset.filter(cls._contains_all(tokens))
+
+    @staticmethod
+    def order_by_rank(queryset):
+        """Best matches first (no-op unless search() ranked the queryset)"""
+        if 'search_rank' in queryset.query.extra_select:
+            # bm25: lower is better
+            return queryset.order_by('search_rank', '-id')
+        if 'search_rank' in queryset.query.annotations:
+            return queryset.order_by('-search_rank', '-id')
+        return queryset
+
+    @staticmethod
+    def tokenize(term: str) -> List[str]:
+        """Lowercased whitespace tokens that contain something searchable"""
+        return [token for token in (term or '').lower().split() if any(ch.isalnum() for ch in token)]
+
+    @classmethod
+    def fts_query(cls, tokens: List[str]) -> str:
+        """FTS5 MATCH expression - every token as a quoted prefix phrase"""
+        clauses = []
+        for token in tokens:
+            phrase = '"%s"*' % token.replace('"', '""')
+            digits = ''.join(ch for ch in token if ch.isdigit())
+            if PHONE_TOKEN_RE.match(token) and digits and digits != token:
+                phrase = '(%s OR "%s"*)' % (phrase, digits)
+            clauses.append(phrase)
+        return ' AND '.join(clauses)
+
+    @classmethod
+    def _search_sqlite(cls, queryset, tokens: List[str]):
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {LEAD_TABLE}.id', f'{FTS_TABLE} MATCH %s'],
+            params=[cls.fts_query(tokens)],
+            select={'search_rank': f'bm25({FTS_TABLE})'},
+        )
+
+    @classmethod
+    def _search_postgres(cls, queryset, tokens: List[str], term: str):
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        # Each LIKE is served by the pg_trgm GIN index
+        return queryset.filter(cls._contains_all(tokens)).annotate(
+            search_rank=TrigramWordSimilarity(term.lower(), 'search_document')
+        )
+
+    @staticmethod
+    def _contains_all(tokens: List[str]) -> Q:
+        """Substring match of every token (phone-like tokens also by digits)"""
+        query = Q()
+        for token in tokens:
+            token_query = Q(search_document__contains=token)
+            digits = ''.join(ch for ch in token if ch.isdigit())
+            if PHONE_TOKEN_RE.match(token) and digits and digits != token:
+                token_query |= Q(search_document__contains=digits)
+            query &= token_query
+        return query
+
+    @staticmethod
+    def _sqlite_fts_ready(connection) -> bool:
+        if connection.alias not in _fts_available:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE name = %s", [FTS_TABLE])
+                _fts_available[connection.alias] = cursor.fetchone() is not None
+        return _fts_available[connection.alias]
+
+
+@receiver(post_save, sender=Property)
+def refresh_property_leads(sender, instance, created=False, raw=False, **kwargs):
+    """Account numbers live on Property - refresh its leads' search documents"""
+    if raw or created:
+        return
+
+    changed = []
+    for lead in Lead.objects.filter(property_id=instance.pk).only(
+        'id', 'first_name', 'last_name', 'email', 'phone_cell',
+        'mailing_address_1', 'mailing_city', 'property_id', 'search_document'
+    ):
+        lead.property = instance
+        document = lead.build_search_document()
+        if document != lead.search_document:
+            lead.search_document = document
+            changed.append(lead)
+    if changed:
+        Lead.objects.bulk_update(changed, ['search_document'])
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from core.models import Property
+
+
+class Command(BaseCommand):
+    help = 'Recalculate the stored Property.ltv_ratio column for existing rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Rows written per bulk update')
+        parser.add_argument('--only-missing', action='store_true',
+                            help='Only fill rows whose ltv_ratio is NULL')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        properties = Property.objects.only('id', 'total_value', 'ple_amount_due', 'ltv_ratio')
+        if options['only_missing']:
+            properties = properties.filter(ltv_ratio__isnull=True)
+
+        self.stdout.write('Backfilling property LTV ratios...')
+
+        scanned = updated = 0
+        batch = []
+        for prop in properties.order_by('id').iterator(chunk_size=batch_size):
+            scanned += 1
+            ltv_ratio = Property.calculate_ltv_ratio(prop.ple_amount_due, prop.total_value)
+            if ltv_ratio != prop.ltv_ratio:
+                prop.ltv_ratio = ltv_ratio
+                batch.append(prop)
+            if len(batch) >= batch_size:
+                Property.objects.bulk_update(batch, ['ltv_ratio'])
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            Property.objects.bulk_update(batch, ['ltv_ratio'])
+            updated += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Updated {updated} of {scanned} properties')
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from core.token_engine import TokenEngine
+
+
+class Command(BaseCommand):
+    help = 'Refund unused tokens held by reservations past their expiry'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Expiring stale token reservations...')
+
+        expired = TokenEngine.expire_reservations()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Expired {expired} token reservations')
+        )
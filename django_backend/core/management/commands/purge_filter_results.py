@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from core.filter_materialization import MaterializedFilterResults
+
+
+class Command(BaseCommand):
+    help = 'Delete materialized filter result sets past their TTL'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Purging expired filter result sets...')
+
+        purged = MaterializedFilterResults.purge_expired()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Purged {purged} filter result sets')
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from core.campaign_rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute campaign and hourly rollups from communications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--campaign', type=int, action='append', dest='campaign_ids',
+                            help='Only rebuild this campaign (repeatable)')
+
+    def handle(self, *args, **options):
+        campaign_ids = options['campaign_ids']
+        self.stdout.write('Rebuilding campaign rollups...')
+
+        scanned = rebuild(campaign_ids)
+
+        scope = f'{len(campaign_ids)} campaigns' if campaign_ids else 'all campaigns'
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt rollups for {scope} from {scanned} communications')
+        )
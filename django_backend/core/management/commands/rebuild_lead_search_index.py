@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from core.lead_search import install_search_index, uninstall_search_index
+from core.models import Lead
+
+
+class Command(BaseCommand):
+    help = 'Rebuild lead search documents and the database search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Leads written per bulk update')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.stdout.write('Rebuilding lead search documents...')
+
+        scanned = updated = 0
+        batch = []
+        leads = Lead.objects.select_related('property').order_by('id')
+        for lead in leads.iterator(chunk_size=batch_size):
+            scanned += 1
+            document = lead.build_search_document()
+            if document != lead.search_document:
+                lead.search_document = document
+                batch.append(lead)
+            if len(batch) >= batch_size:
+                Lead.objects.bulk_update(batch, ['search_document'])
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            Lead.objects.bulk_update(batch, ['search_document'])
+            updated += len(batch)
+
+        # Recreate the index so it matches the documents exactly
+        uninstall_search_index(connection)
+        install_search_index(connection)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Updated {updated} of {scanned} search documents and rebuilt the index')
+        )
@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.campaign_actions import CampaignActionQueue
+
+
+class Command(BaseCommand):
+    help = 'Run due scheduled campaign actions (launches, drip steps, trigger follow-ups)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Run what is due now and exit')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Entries claimed per pass')
+        parser.add_argument('--worker-id', default=None,
+                            help='Name recorded on claimed entries')
+
+    def handle(self, *args, **options):
+        queue = CampaignActionQueue(worker_id=options['worker_id'], batch_size=options['batch_size'])
+        idle_seconds = getattr(settings, 'CAMPAIGN_SCHEDULER_IDLE_SECONDS', 30)
+        self.stdout.write(f'Campaign scheduler worker {queue.worker_id} started')
+
+        while True:
+            released = queue.release_stale()
+            if released:
+                self.stdout.write(f'Released {released} stale claims')
+
+            stats = queue.run_due()
+            if stats['claimed']:
+                self.stdout.write(
+                    f"Ran {stats['claimed']} actions: {stats['done']} done, {stats['retried']} retried, "
+                    f"{stats['failed']} failed, {stats['cancelled']} cancelled, {stats['deferred']} deferred, "
+                    f"{stats['lost']} lost to expired leases"
+                )
+                # More may be due already
+                continue
+
+            if options['once']:
+                break
+
+            # Sleep until the next entry is due (new entries are noticed within idle_seconds)
+            next_due_at = queue.next_due_at()
+            wait = idle_seconds
+            if next_due_at is not None:
+                wait = min(wait, max((next_due_at - timezone.now()).total_seconds(), 0.1))
+            time.sleep(wait)
+
+        self.stdout.write(self.style.SUCCESS('No scheduled campaign actions due'))
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-16 18:21
+
+from django.db import migrations, models
+
+
+def backfill_geohash(apps, schema_editor):
+    """Populate geohash keys for rows that already have coordinates"""
+    from core.spatial_index import encode_geohash
+
+    for model_name in ('Lead', 'Property'):
+        model = apps.get_model('core', model_name)
+        rows = model.objects.filter(latitude__isnull=False, longitude__isnull=False).only('id', 'latitude', 'longitude')
+        batch = []
+        for row in rows.iterator(chunk_size=2000):
+            row.geohash = encode_geohash(row.latitude, row.longitude)
+            batch.append(row)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ['geohash'])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_document_documentfolder_documenttemplate_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='geohash',
+            field=models.CharField(blank=True, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='geohash',
+            field=models.CharField(blank=True, max_length=12, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['geohash'], name='core_lead_geohash_b38e83_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['geohash'], name='core_proper_geohash_e1d483_idx'),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-16 18:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_lead_property_geohash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['owner', 'score_value', 'id'], name='core_lead_owner_i_5eb314_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['owner', 'created_at', 'id'], name='core_lead_owner_i_343cab_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-16 18:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0010_lead_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FilterResultSet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('config_hash', models.CharField(max_length=64)),
+                ('filter_config', models.JSONField(default=dict)),
+                ('sort_ordering', models.CharField(blank=True, max_length=50)),
+                ('lead_ids', models.BinaryField(default=bytes)),
+                ('result_count', models.IntegerField(default=0)),
+                ('is_stale', models.BooleanField(default=False)),
+                ('built_at', models.DateTimeField(auto_now_add=True)),
+                ('last_accessed', models.DateTimeField(blank=True, null=True)),
+                ('scope_owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='filter_result_sets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['scope_owner', 'is_stale'], name='core_filter_scope_o_77b753_idx')],
+                'unique_together': {('user', 'config_hash')},
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-16 18:32
+
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import migrations, models
+
+
+def backfill_ltv_ratio(apps, schema_editor):
+    """Store ple_amount_due / total_value * 100 for existing properties"""
+    Property = apps.get_model('core', 'Property')
+    rows = Property.objects.only('id', 'total_value', 'ple_amount_due')
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        if row.total_value is None or row.total_value <= 0:
+            row.ltv_ratio = Decimal('0.00')
+        elif row.ple_amount_due is None:
+            continue
+        else:
+            row.ltv_ratio = (row.ple_amount_due * 100 / row.total_value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        batch.append(row)
+        if len(batch) >= 2000:
+            Property.objects.bulk_update(batch, ['ltv_ratio'])
+            batch = []
+    if batch:
+        Property.objects.bulk_update(batch, ['ltv_ratio'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_filter_result_set'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='ltv_ratio',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['ltv_ratio'], name='core_proper_ltv_rat_fd196e_idx'),
+        ),
+        migrations.RunPython(backfill_ltv_ratio, migrations.RunPython.noop),
+    ]
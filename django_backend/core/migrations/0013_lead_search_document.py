@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-16 18:34
+
+from django.db import migrations, models
+
+
+def backfill_search_document(apps, schema_editor):
+    """Build search documents for existing leads, then create the search index"""
+    from core.lead_search import install_search_index
+
+    Lead = apps.get_model('core', 'Lead')
+    rows = Lead.objects.select_related('property').only(
+        'id', 'first_name', 'last_name', 'email', 'phone_cell',
+        'mailing_address_1', 'mailing_city', 'property__account_number'
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        phone_digits = ''.join(ch for ch in (row.phone_cell or '') if ch.isdigit())
+        parts = [
+            row.first_name, row.last_name, row.email, row.mailing_address_1, row.mailing_city,
+            row.phone_cell, phone_digits, row.property.account_number if row.property else None,
+        ]
+        row.search_document = ' '.join(str(part) for part in parts if part).lower()
+        batch.append(row)
+        if len(batch) >= 2000:
+            Lead.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        Lead.objects.bulk_update(batch, ['search_document'])
+
+    install_search_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from core.lead_search import uninstall_search_index
+
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_property_ltv_ratio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='search_document',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(backfill_search_document, drop_search_index),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.7 on 2026-10-16 18:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0013_lead_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tlcimportjob',
+            name='checkpoint_batch',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tlcimportjob',
+            name='checkpoint_encoding',
+            field=models.CharField(default='utf-8', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='tlcimportjob',
+            name='checkpoint_offset',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tlcimportjob',
+            name='checkpoint_row',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tlcimportjob',
+            name='checkpointed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tlcimportjob',
+            name='source_file',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.CreateModel(
+            name='CSVImportJob',
+            fields=[
+                ('source_file', models.CharField(blank=True, max_length=500)),
+                ('checkpoint_offset', models.BigIntegerField(default=0)),
+                ('checkpoint_row', models.IntegerField(default=0)),
+                ('checkpoint_batch', models.IntegerField(default=0)),
+                ('checkpoint_encoding', models.CharField(default='utf-8', max_length=20)),
+                ('checkpointed_at', models.DateTimeField(blank=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('batch_id', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='pending', max_length=20)),
+                ('total_rows', models.IntegerField(default=0)),
+                ('processed_rows', models.IntegerField(default=0)),
+                ('successful_rows', models.IntegerField(default=0)),
+                ('failed_rows', models.IntegerField(default=0)),
+                ('duplicate_rows', models.IntegerField(default=0)),
+                ('tokens_used', models.IntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='csv_import_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.7 on 2026-10-16 19:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0014_import_checkpoints'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tokentransaction',
+            name='transaction_type',
+            field=models.CharField(choices=[('purchase', 'Purchase'), ('consumption', 'Consumption'), ('refund', 'Refund'), ('bonus', 'Bonus'), ('subscription', 'Subscription Credit'), ('reservation', 'Reservation Hold'), ('settlement', 'Reservation Settlement')], max_length=15),
+        ),
+        migrations.CreateModel(
+            name='TokenReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token_type', models.CharField(choices=[('regular', 'Regular Token'), ('mail', 'Mail Token')], max_length=10)),
+                ('action_type', models.CharField(blank=True, max_length=25, null=True)),
+                ('status', models.CharField(choices=[('held', 'Held'), ('settled', 'Settled'), ('released', 'Released'), ('expired', 'Expired')], default='held', max_length=10)),
+                ('tokens_reserved', models.IntegerField()),
+                ('tokens_used', models.IntegerField(default=0)),
+                ('description', models.CharField(max_length=255)),
+                ('reference_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('settled_at', models.DateTimeField(blank=True, null=True)),
+                ('hold_transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.tokentransaction')),
+                ('settlement_transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.tokentransaction')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='token_reservations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='csvimportjob',
+            name='token_reservation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.tokenreservation'),
+        ),
+        migrations.AddIndex(
+            model_name='tokenreservation',
+            index=models.Index(fields=['status', 'expires_at'], name='core_tokenr_status_0f88e0_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-16 19:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_campaign_audience_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sent', models.IntegerField(default=0)),
+                ('delivered', models.IntegerField(default=0)),
+                ('opened', models.IntegerField(default=0)),
+                ('clicked', models.IntegerField(default=0)),
+                ('responded', models.IntegerField(default=0)),
+                ('bounced', models.IntegerField(default=0)),
+                ('failed', models.IntegerField(default=0)),
+                ('cost', models.IntegerField(default=0, help_text='Tokens charged for the communications')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('campaign', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rollup', to='core.campaign')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CampaignHourlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sent', models.IntegerField(default=0)),
+                ('delivered', models.IntegerField(default=0)),
+                ('opened', models.IntegerField(default=0)),
+                ('clicked', models.IntegerField(default=0)),
+                ('responded', models.IntegerField(default=0)),
+                ('bounced', models.IntegerField(default=0)),
+                ('failed', models.IntegerField(default=0)),
+                ('cost', models.IntegerField(default=0, help_text='Tokens charged for the communications')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('hour', models.DateTimeField()),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly_rollups', to='core.campaign')),
+            ],
+            options={
+                'ordering': ['hour'],
+                'unique_together': {('campaign', 'hour')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-16 19:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_campaign_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledAction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action_type', models.CharField(choices=[('launch', 'Campaign Launch'), ('drip_step', 'Drip Step'), ('trigger_followup', 'Trigger Follow-up')], max_length=20)),
+                ('step', models.IntegerField(default=0, help_text='Drip sequence step (launch is step 0)')),
+                ('due_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('claimed', 'Claimed'), ('done', 'Done'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='pending', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('claimed_by', models.CharField(blank=True, max_length=64)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_actions', to='core.campaign')),
+                ('lead', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.lead')),
+            ],
+            options={
+                'ordering': ['due_at'],
+                'indexes': [models.Index(fields=['status', 'due_at'], name='core_schedu_status_dbfb98_idx'), models.Index(fields=['campaign', 'action_type', 'status'], name='core_schedu_campaig_46a03d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-16 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_scheduled_actions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['owner', 'id'], name='core_lead_owner_i_52bef3_idx'),
+        ),
+    ]
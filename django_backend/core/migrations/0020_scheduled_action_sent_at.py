@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-16 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_lead_owner_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledaction',
+            name='sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -13,6 +13,8 @@ from decimal import Decimal, ROUND_HALF_UP
 import math
 from datetime import datetime, timedelta
 
+from .spatial_index import encode_geohash
+
 
 class Company(models.Model):
     """Company/Organization model"""
@@ -225,6 +227,39 @@ class County(models.Model):
         return f"{self.name}, {self.state}"
 
 
+# Property fields that feed the derived columns maintained by Property.save()
+LTV_SOURCE_FIELDS = {'improvement_value', 'land_value', 'total_value', 'ple_amount_due'}
+GEOHASH_SOURCE_FIELDS = {'latitude', 'longitude'}
+
+
+def _derived_property_fields(fields):
+    """Derived columns that must be written alongside the given fields"""
+    derived = set()
+    if LTV_SOURCE_FIELDS & set(fields):
+        derived.update({'total_value', 'ltv_ratio'})
+    if GEOHASH_SOURCE_FIELDS & set(fields):
+        derived.add('geohash')
+    return derived
+
+
+class PropertyQuerySet(models.QuerySet):
+    """Keeps derived columns (total_value, ltv_ratio, geohash) current on bulk writes, which skip save()"""
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.compute_derived_fields()
+        return super().bulk_create(objs, *args, **kwargs)
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        derived = _derived_property_fields(fields) - set(fields)
+        if _derived_property_fields(fields):
+            objs = list(objs)
+            for obj in objs:
+                obj.compute_derived_fields()
+        return super().bulk_update(objs, list(fields) + sorted(derived), *args, **kwargs)
+
+
 class Property(models.Model):
     """Property model with Laravel business logic for valuation"""
     PROPERTY_TYPE_CHOICES = [
@@ -264,6 +299,7 @@ class Property(models.Model):
     # Geographic Coordinates
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True)  # Spatial index key (see spatial_index.py)
     place_id = models.CharField(max_length=255, null=True, blank=True)  # Google Places ID
     
     # Property Values (Laravel: improvement_value + land_value = total_value)
@@ -272,6 +308,9 @@ class Property(models.Model):
     total_value = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
     market_value = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     
+    # Derived: ple_amount_due / total_value as a percentage (kept current on save)
+    ltv_ratio = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    
     # Property details
     property_type = models.CharField(max_length=20, choices=PROPERTY_TYPE_CHOICES)
     disposition = models.CharField(max_length=20, choices=DISPOSITION_CHOICES, default='active')
@@ -331,6 +370,8 @@ class Property(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = PropertyQuerySet.as_manager()
+    
     class Meta:
         verbose_name_plural = "Properties"
         indexes = [
@@ -338,11 +379,35 @@ class Property(models.Model):
             models.Index(fields=['account_number']),
             models.Index(fields=['total_value']),
             models.Index(fields=['ple_amount_due']),
+            models.Index(fields=['geohash']),
+            models.Index(fields=['ltv_ratio']),
         ]
     
-    def save(self, *args, **kwargs):
-        """Override save to calculate total_value (Laravel business rule)"""
+    @staticmethod
+    def calculate_ltv_ratio(ple_amount_due, total_value):
+        """
+        Tax-debt-to-value ratio as a percentage, rounded to 2 places
+        0 when the property has no value; None when the amount due is unknown
+        """
+        if total_value is None or Decimal(str(total_value)) <= 0:
+            return Decimal('0.00')
+        if ple_amount_due is None:
+            return None
+        ratio = Decimal(str(ple_amount_due)) * 100 / Decimal(str(total_value))
+        return ratio.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    
+    def compute_derived_fields(self):
+        """Recalculate total_value (Laravel business rule), ltv_ratio and geohash"""
         self.total_value = self.improvement_value + self.land_value
+        self.ltv_ratio = self.calculate_ltv_ratio(self.ple_amount_due, self.total_value)
+        self.geohash = encode_geohash(self.latitude, self.longitude)
+    
+    def save(self, *args, **kwargs):
+        """Override save to keep derived columns current"""
+        self.compute_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | _derived_property_fields(update_fields)
         
         # Set original address on first save
         if not self.pk:
@@ -357,6 +422,39 @@ class Property(models.Model):
         return f"{self.address1}, {self.city}, {self.state}"
 
 
+# Lead fields that feed the derived columns maintained by Lead.save()
+SEARCH_SOURCE_FIELDS = {'first_name', 'last_name', 'email', 'phone_cell', 'mailing_address_1', 'mailing_city', 'property'}
+
+
+def _derived_lead_fields(fields):
+    """Derived columns that must be written alongside the given fields"""
+    fields = {field[:-3] if field.endswith('_id') else field for field in fields}
+    derived = set()
+    if SEARCH_SOURCE_FIELDS & fields:
+        derived.add('search_document')
+    if GEOHASH_SOURCE_FIELDS & fields:
+        derived.add('geohash')
+    return derived
+
+
+class LeadQuerySet(models.QuerySet):
+    """Keeps derived columns (geohash, search_document) current on bulk writes, which skip save()"""
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.compute_derived_fields()
+        return super().bulk_create(objs, *args, **kwargs)
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        derived = _derived_lead_fields(fields) - set(fields)
+        if _derived_lead_fields(fields):
+            objs = list(objs)
+            for obj in objs:
+                obj.compute_derived_fields()
+        return super().bulk_update(objs, list(fields) + sorted(derived), *args, **kwargs)
+
+
 class Lead(models.Model):
     """Lead model with Laravel business logic - feeds to BOTG and creates TLC opportunities"""
     LEAD_STATUS_CHOICES = [
@@ -446,6 +544,7 @@ class Lead(models.Model):
     # Geographic data
     latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True)  # Spatial index key (see spatial_index.py)
     
     # AI scoring and analytics
     score_value = models.IntegerField(
@@ -482,6 +581,9 @@ class Lead(models.Model):
     source_batch = models.CharField(max_length=100, null=True, blank=True)
     imported_from = models.CharField(max_length=100, null=True, blank=True)
     
+    # Denormalized global-search text, indexed per database (see lead_search.py)
+    search_document = models.TextField(blank=True, default='')
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -489,6 +591,8 @@ class Lead(models.Model):
     botg_completed_at = models.DateTimeField(null=True, blank=True)
     tlc_sent_at = models.DateTimeField(null=True, blank=True)
     
+    objects = LeadQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -497,12 +601,81 @@ class Lead(models.Model):
             models.Index(fields=['mailing_city', 'mailing_state']),
             models.Index(fields=['source_batch']),
             models.Index(fields=['workflow_stage']),
+            models.Index(fields=['geohash']),
+            # Keyset pagination: (sort key, id) range scans per owner
+            models.Index(fields=['owner', 'score_value', 'id']),
+            models.Index(fields=['owner', 'created_at', 'id']),
+            # Audience sampling: an owner's id range and random id probes
+            models.Index(fields=['owner', 'id']),
+        ]
+    
+    def build_search_document(self):
+        """
+        Lowercased text matched by the global lead search: name, email,
+        address, city, phone (as entered and digits only) and the property's
+        account number
+        """
+        account_number = None
+        if Lead.property.is_cached(self):
+            # Also covers a property that is not saved yet (bulk loads)
+            account_number = self.property.account_number if self.property else None
+        elif self.property_id:
+            account_number = Property.objects.filter(pk=self.property_id).values_list(
+                'account_number', flat=True
+            ).first()
+        
+        phone_digits = ''.join(ch for ch in (self.phone_cell or '') if ch.isdigit())
+        parts = [
+            self.first_name, self.last_name, self.email, self.mailing_address_1,
+            self.mailing_city, self.phone_cell, phone_digits, account_number,
         ]
+        return ' '.join(str(part) for part in parts if part).lower()
+    
+    def compute_derived_fields(self):
+        """Recalculate the geohash spatial key and the search document"""
+        self.geohash = encode_geohash(self.latitude, self.longitude)
+        self.search_document = self.build_search_document()
+    
+    def save(self, *args, **kwargs):
+        """Override save to keep derived columns in sync"""
+        self.compute_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | _derived_lead_fields(update_fields)
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.mailing_city}, {self.mailing_state}"
 
 
+class FilterResultSet(models.Model):
+    """Materialized lead IDs for a saved filter or preset (see filter_materialization.py)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='filter_result_sets')
+    config_hash = models.CharField(max_length=64)
+    filter_config = models.JSONField(default=dict)
+    sort_ordering = models.CharField(max_length=50, blank=True)
+
+    # Leads visible to the filter: one owner's leads, or every lead when null
+    scope_owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', null=True, blank=True)
+
+    # Packed int64 lead IDs in result order (zlib-compressed)
+    lead_ids = models.BinaryField(default=bytes)
+    result_count = models.IntegerField(default=0)
+    is_stale = models.BooleanField(default=False)
+
+    built_at = models.DateTimeField(auto_now_add=True)
+    last_accessed = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ['user', 'config_hash']
+        indexes = [
+            models.Index(fields=['scope_owner', 'is_stale']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.config_hash[:12]} ({self.result_count} leads)"
+
+
 class Opportunity(models.Model):
     """Investment opportunity model (from Laravel ScheduleService)"""
     OPPORTUNITY_STATUS_CHOICES = [
@@ -591,6 +764,8 @@ class TokenTransaction(models.Model):
         ('refund', 'Refund'),
         ('bonus', 'Bonus'),
         ('subscription', 'Subscription Credit'),
+        ('reservation', 'Reservation Hold'),
+        ('settlement', 'Reservation Settlement'),
     ]
     
     ACTION_TYPE_CHOICES = [
@@ -645,6 +820,52 @@ class TokenTransaction(models.Model):
         return f"{self.user.username}: {sign}{self.tokens_changed} {self.token_type} tokens"
 
 
+class TokenReservation(models.Model):
+    """
+    Tokens held for a bulk job (campaign send, CSV import)
+    The hold is debited from the profile once; the job draws down against
+    it without touching the profile, and settlement refunds what was not used
+    """
+    STATUS_CHOICES = [
+        ('held', 'Held'),
+        ('settled', 'Settled'),
+        ('released', 'Released'),
+        ('expired', 'Expired'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='token_reservations')
+    token_type = models.CharField(max_length=10, choices=TokenTransaction.TOKEN_TYPE_CHOICES)
+    action_type = models.CharField(max_length=25, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='held')
+
+    tokens_reserved = models.IntegerField()
+    tokens_used = models.IntegerField(default=0)
+
+    description = models.CharField(max_length=255)
+    reference_id = models.CharField(max_length=100, null=True, blank=True)
+
+    # Ledger entries for the hold and the settlement
+    hold_transaction = models.ForeignKey(TokenTransaction, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    settlement_transaction = models.ForeignKey(TokenTransaction, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    settled_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    @property
+    def tokens_remaining(self):
+        return self.tokens_reserved - self.tokens_used
+
+    def __str__(self):
+        return f"{self.user.username}: {self.tokens_used}/{self.tokens_reserved} {self.token_type} tokens ({self.status})"
+
+
 class Device(models.Model):
     """Device tracking for mission creation (from Laravel)"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='devices')
@@ -1194,7 +1415,59 @@ class TLCClientNote(models.Model):
         return f"{self.client.client_number} - {self.note_type} - {self.created_at.strftime('%Y-%m-%d')}"
 
 
-class TLCImportJob(models.Model):
+class ImportCheckpoint(models.Model):
+    """
+    Durable progress for resumable CSV imports
+    A checkpoint is written in the same transaction as the batch it covers, so
+    a resumed run restarts after the last committed batch and never re-inserts
+    """
+    source_file = models.CharField(max_length=500, blank=True)  # default_storage path
+    checkpoint_offset = models.BigIntegerField(default=0)  # byte offset just past the last committed row
+    checkpoint_row = models.IntegerField(default=0)  # data rows committed
+    checkpoint_batch = models.IntegerField(default=0)  # last committed batch number
+    checkpoint_encoding = models.CharField(max_length=20, default='utf-8')
+    checkpointed_at = models.DateTimeField(null=True, blank=True)
+
+    RESUMABLE_STATUSES = ['pending', 'failed', 'cancelled']
+
+    class Meta:
+        abstract = True
+
+    def save_checkpoint(self, offset: int, row: int, encoding: str = 'utf-8', fields: list = None):
+        """Record a committed batch - call inside the batch's transaction"""
+        from django.utils import timezone
+
+        self.checkpoint_offset = offset
+        self.checkpoint_row = row
+        self.checkpoint_batch += 1
+        self.checkpoint_encoding = encoding
+        self.checkpointed_at = timezone.now()
+        self.save(update_fields=[
+            'checkpoint_offset', 'checkpoint_row', 'checkpoint_batch',
+            'checkpoint_encoding', 'checkpointed_at'
+        ] + list(fields or []))
+
+    def claim_for_resume(self) -> bool:
+        """
+        Atomically take over a stopped import (failed, cancelled, or processing
+        with no checkpoint within IMPORT_RESUME_STALE_SECONDS)
+        Returns False if it completed or another worker is still running it
+        """
+        from django.utils import timezone
+
+        now = timezone.now()
+        stale = now - timedelta(seconds=getattr(settings, 'IMPORT_RESUME_STALE_SECONDS', 300))
+        claimed = type(self).objects.filter(pk=self.pk).filter(
+            models.Q(status__in=self.RESUMABLE_STATUSES) |
+            models.Q(status='processing', checkpointed_at__lt=stale) |
+            models.Q(status='processing', checkpointed_at__isnull=True, started_at__lt=stale)
+        ).update(status='processing', checkpointed_at=now)
+        if claimed:
+            self.refresh_from_db()
+        return bool(claimed)
+
+
+class TLCImportJob(ImportCheckpoint):
     """CSV import job tracking for TLC clients"""
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -1232,6 +1505,36 @@ class TLCImportJob(models.Model):
         return f"{self.filename} - {self.status}"
 
 
+class CSVImportJob(ImportCheckpoint):
+    """TARRANT-style CSV import job with resumable checkpoints"""
+    STATUS_CHOICES = TLCImportJob.STATUS_CHOICES
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    batch_id = models.CharField(max_length=100)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total_rows = models.IntegerField(default=0)
+    processed_rows = models.IntegerField(default=0)
+    successful_rows = models.IntegerField(default=0)
+    failed_rows = models.IntegerField(default=0)
+    duplicate_rows = models.IntegerField(default=0)
+    tokens_used = models.IntegerField(default=0)
+    token_reservation = models.ForeignKey(TokenReservation, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    errors = models.JSONField(default=list, blank=True)  # first MAX_STORED_ERRORS row errors
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='csv_import_jobs')
+
+    MAX_STORED_ERRORS = 100
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} - {self.status}"
+
+
 class TLCImportError(models.Model):
     """Individual errors from TLC CSV imports"""
     import_job = models.ForeignKey(TLCImportJob, on_delete=models.CASCADE, related_name='errors')
@@ -1620,5 +1923,5 @@ class DocumentComment(models.Model):
 # Import communication models to make them available
 from .communication_models import (
     Communication, CommunicationTemplate, Campaign, 
-    CampaignRecipient, CommunicationAnalytics
+    CampaignRecipient, CampaignRollup, CampaignHourlyRollup, ScheduledAction, CommunicationAnalytics
 )
\ No newline at end of file
@@ -0,0 +1,371 @@
+"""
+Pagination for DroneStrike v2
+- Keyset (cursor) pagination: opaque cursor tokens encode the sort key and row
+  id of the last result, so every page is an index range scan regardless of depth
+- Count strategies: exact, estimated (planner statistics or a sampled count)
+  or capped ("10,000+") totals, so page latency follows the page size rather
+  than the number of matching rows
+"""
+
+import datetime
+import json
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Q, Max, Min
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+CURSOR_SALT = 'dronestrike.keyset_cursor'
+
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATED = 'estimated'
+COUNT_CAPPED = 'capped'
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATED, COUNT_CAPPED)
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token is malformed or does not match the current sort"""
+    pass
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """Encode a cursor payload as an opaque, tamper-proof token"""
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True, serializer=_CursorSerializer)
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """Decode a cursor token produced by encode_cursor"""
+    try:
+        return signing.loads(token, salt=CURSOR_SALT, serializer=_CursorSerializer)
+    except signing.BadSignature:
+        raise InvalidCursor("Invalid pagination cursor")
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """Keeps full microsecond precision so timestamps compare exactly"""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+            return o.isoformat()
+        if isinstance(o, Decimal):
+            return str(o)
+        return super().default(o)
+
+
+class _CursorSerializer(signing.JSONSerializer):
+    """JSON serializer that understands dates and decimals"""
+
+    def dumps(self, obj):
+        return _CursorEncoder(separators=(',', ':')).encode(obj).encode('latin-1')
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by (sort field, id) instead of OFFSET
+    The sort field may span relations (e.g. 'property__ple_amount_due') and may
+    be nullable; NULLs always sort last
+    """
+
+    def __init__(self, queryset, ordering: str, limit: int = 50, sort_key: str = None):
+        self.descending = ordering.startswith('-')
+        self.field = ordering.lstrip('-')
+        self.limit = limit
+        self.sort_key = sort_key or ordering
+        self.nullable = self.field != 'id' and _is_nullable(queryset.model, self.field)
+        self.queryset = queryset.order_by(*self.get_ordering())
+
+    def get_ordering(self) -> List:
+        """Order by the sort field with id as a tiebreaker in the same direction"""
+        if self.field == 'id':
+            return ['-id' if self.descending else 'id']
+
+        if self.nullable:
+            sort_expression = F(self.field).desc(nulls_last=True) if self.descending else F(self.field).asc(nulls_last=True)
+        else:
+            sort_expression = f"-{self.field}" if self.descending else self.field
+        return [sort_expression, '-id' if self.descending else 'id']
+
+    def get_page(self, cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+        """
+        Fetch one page after the given cursor
+        Returns (results, next_cursor) - next_cursor is None on the last page
+        """
+        queryset = self.queryset
+        if cursor:
+            payload = decode_cursor(cursor)
+            if payload.get('s') != self.sort_key:
+                raise InvalidCursor("Cursor does not match the current sort order")
+            queryset = queryset.filter(self._after(payload.get('v'), payload['id']))
+
+        # Fetch one extra row to know whether another page exists
+        results = list(queryset[:self.limit + 1])
+        has_next = len(results) > self.limit
+        results = results[:self.limit]
+
+        next_cursor = None
+        if has_next and results:
+            last = results[-1]
+            next_cursor = encode_cursor({
+                's': self.sort_key,
+                'v': self._value_of(last),
+                'id': last.pk,
+            })
+
+        return results, next_cursor
+
+    def _after(self, value, last_id) -> Q:
+        """Predicate selecting rows strictly after (value, last_id) in sort order"""
+        id_after = Q(id__lt=last_id) if self.descending else Q(id__gt=last_id)
+        if self.field == 'id':
+            return id_after
+
+        if value is None:
+            # Already inside the trailing NULL block
+            return Q(**{f"{self.field}__isnull": True}) & id_after
+
+        past = Q(**{f"{self.field}__lt" if self.descending else f"{self.field}__gt": value})
+        tie = Q(**{self.field: value}) & id_after
+        condition = past | tie
+        if self.nullable:
+            condition |= Q(**{f"{self.field}__isnull": True})
+        return condition
+
+    def _value_of(self, obj):
+        """Read the (possibly related) sort field from a result row"""
+        value = obj
+        for part in self.field.split('__'):
+            value = getattr(value, part, None) if value is not None else None
+        return value
+
+
+def resolve_count_mode(requested: Optional[str] = None) -> str:
+    """Requested count mode if valid, otherwise the SEARCH_COUNT_MODE setting"""
+    if requested in COUNT_MODES:
+        return requested
+    mode = getattr(settings, 'SEARCH_COUNT_MODE', COUNT_EXACT)
+    return mode if mode in COUNT_MODES else COUNT_EXACT
+
+
+def count_queryset(queryset, mode: Optional[str] = None, cap: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Count a queryset with the given strategy
+    - exact: COUNT(*) over every matching row
+    - capped: count at most cap + 1 rows; larger totals are reported as "cap+"
+    - estimated: capped count first (exact when under the cap), otherwise the
+      planner estimate on PostgreSQL or a sampled count elsewhere
+    Returns {'count', 'mode', 'is_exact', 'display'}; mode names the strategy
+    that actually produced the number
+    """
+    mode = resolve_count_mode(mode)
+    if mode == COUNT_EXACT:
+        return _count_result(queryset.count(), COUNT_EXACT)
+
+    cap = cap or getattr(settings, 'SEARCH_COUNT_CAP', 10000)
+    bounded = queryset.order_by().values('pk')[:cap + 1].count()
+    if bounded <= cap:
+        return _count_result(bounded, COUNT_EXACT)
+
+    if mode == COUNT_CAPPED:
+        return _count_result(cap, COUNT_CAPPED, display=f"{cap:,}+")
+
+    estimate = planner_estimate(queryset)
+    if estimate is None:
+        estimate = sampled_estimate(queryset)
+    return _count_result(max(estimate or 0, cap + 1), COUNT_ESTIMATED)
+
+
+def planner_estimate(queryset) -> Optional[int]:
+    """Row estimate from the PostgreSQL planner statistics (None elsewhere)"""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    try:
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+    except Exception:
+        return None
+
+
+def sampled_estimate(queryset, sample_size: Optional[int] = None) -> Optional[int]:
+    """
+    Estimate matches from the newest sample_size primary keys of the table:
+    the match rate inside that id window is scaled to the whole id range
+    Both the window bound and the id range are primary-key index lookups
+    """
+    sample_size = sample_size or getattr(settings, 'SEARCH_COUNT_SAMPLE_SIZE', 5000)
+    table = queryset.model._default_manager.using(queryset.db)
+    bounds = table.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return 0
+
+    window_start = table.order_by('-pk').values_list('pk', flat=True)[sample_size - 1:sample_size].first()
+    if window_start is None:
+        # Table is smaller than the sample - nothing to extrapolate
+        return queryset.count()
+
+    matched = queryset.order_by().filter(pk__gte=window_start).count()
+    id_span = bounds['high'] - bounds['low'] + 1
+    window_span = bounds['high'] - window_start + 1
+    return int(matched * id_span / window_span)
+
+
+def _count_result(count: int, mode: str, display: Optional[str] = None) -> Dict[str, Any]:
+    if display is None:
+        display = f"~{count:,}" if mode == COUNT_ESTIMATED else f"{count:,}"
+    return {
+        'count': count,
+        'mode': mode,
+        'is_exact': mode == COUNT_EXACT,
+        'display': display,
+    }
+
+
+class CountStrategyPaginator(Paginator):
+    """
+    Django paginator that counts with a count strategy
+    Unless the count is exact, pages are not validated against the total and
+    has_next is decided by fetching one extra row
+    """
+
+    def __init__(self, object_list, per_page, count_mode: Optional[str] = None,
+                 count_info: Optional[Dict[str, Any]] = None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_mode = count_mode
+        if count_info is not None:
+            self.count_info = count_info
+
+    @cached_property
+    def count_info(self) -> Dict[str, Any]:
+        if hasattr(self.object_list, 'query'):
+            return count_queryset(self.object_list, self.count_mode)
+        return _count_result(len(self.object_list), COUNT_EXACT)
+
+    @cached_property
+    def count(self):
+        return self.count_info['count']
+
+    def validate_number(self, number):
+        if self.count_info['is_exact']:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        if self.count_info['is_exact']:
+            return super().page(number)
+
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+        return ProbedPage(rows[:self.per_page], number, self, has_more=len(rows) > self.per_page)
+
+
+class ProbedPage(Page):
+    """Page whose has_next comes from an extra fetched row instead of the total"""
+
+    def __init__(self, object_list, number, paginator, has_more: bool):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def has_next(self):
+        return self.has_more
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1 if self.object_list else 0
+
+
+class CountedPageNumberPagination(PageNumberPagination):
+    """
+    Page-number pagination using the configured count strategy
+    ?count_mode=exact|estimated|capped overrides SEARCH_COUNT_MODE per request
+    """
+    count_mode_query_param = 'count_mode'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = resolve_count_mode(request.query_params.get(self.count_mode_query_param))
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page, **kwargs):
+        return CountStrategyPaginator(object_list, per_page, count_mode=self.count_mode, **kwargs)
+
+    def get_paginated_response(self, data):
+        count_info = self.page.paginator.count_info
+        return Response({
+            'count': count_info['count'],
+            'count_mode': count_info['mode'],
+            'count_display': count_info['display'],
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class LeadPagination(CountedPageNumberPagination):
+    """
+    Page-number pagination by default; switches to keyset pagination when the
+    client sends ?cursor= (an empty cursor requests the first page)
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_mode = self.cursor_query_param in request.query_params
+        if not self.keyset_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        ordering = queryset.query.order_by or queryset.model._meta.ordering or ['-id']
+        ordering = ordering[0] if isinstance(ordering[0], str) else '-id'
+
+        self.request = request
+        self.keyset = KeysetPaginator(queryset, ordering, self.get_page_size(request))
+        try:
+            results, self.next_cursor = self.keyset.get_page(request.query_params.get(self.cursor_query_param))
+        except InvalidCursor as e:
+            raise ValidationError({'cursor': str(e)})
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.keyset_mode:
+            return super().get_paginated_response(data)
+
+        next_url = None
+        if self.next_cursor:
+            next_url = replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+        return Response({
+            'next': next_url,
+            'next_cursor': self.next_cursor,
+            'pagination_mode': 'cursor',
+            'results': data,
+        })
+
+
+def _is_nullable(model, path: str) -> bool:
+    """Whether a (possibly related) field path can produce NULL"""
+    for part in path.split('__'):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return True
+        if field.null:
+            return True
+        if field.is_relation:
+            model = field.related_model
+    return False
@@ -577,7 +577,8 @@ class TLCImportJobSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'filename', 'file_size', 'total_rows', 'processed_rows',
             'successful_rows', 'failed_rows', 'status', 'progress_percentage',
-            'started_at', 'completed_at', 'created_at', 'errors', 'validation_summary'
+            'started_at', 'completed_at', 'created_at', 'errors', 'validation_summary',
+            'checkpoint_row', 'checkpoint_batch', 'checkpointed_at'
         ]
         read_only_fields = ['id', 'created_at']
     
@@ -0,0 +1,235 @@
+"""
+Geohash Spatial Index for DroneStrike v2
+Persisted grid-cell keys for Lead/Property coordinates so radius searches
+can use a B-tree index range scan instead of scanning every row
+"""
+
+import math
+from decimal import Decimal
+from typing import List, Optional, Tuple
+from django.db.models import Q
+
+
+# Geohash base32 alphabet - ascending in ASCII, so string order matches cell order
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # ~4.8m x 4.8m cells
+EARTH_RADIUS_KM = 6371
+
+# Upper bound on cells used for a single radius prefilter
+MAX_COVER_CELLS = 32
+
+# Small margin (degrees) so rounding never drops a row from the prefilter
+BOUNDS_EPSILON = 1e-6
+
+
+def encode_geohash(latitude, longitude, precision: int = GEOHASH_PRECISION) -> Optional[str]:
+    """
+    Encode a coordinate pair into a geohash string
+    Returns None when either coordinate is missing
+    """
+    if latitude is None or longitude is None:
+        return None
+
+    lat = float(latitude)
+    lng = float(longitude)
+    if not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
+        return None
+
+    lat_bits, lng_bits = _bits_for_precision(precision)
+    lat_index = _cell_index(lat, -90.0, 180.0, lat_bits)
+    lng_index = _cell_index(lng, -180.0, 360.0, lng_bits)
+    return _encode_cell(lat_index, lng_index, precision)
+
+
+def radius_bounding_box(center_lat: float, center_lng: float,
+                        radius_km: float) -> Tuple[float, float, List[Tuple[float, float]]]:
+    """
+    Bounding box for every point PropertyFilter's Haversine expression keeps
+    Returns (lat_min, lat_max, [(lng_min, lng_max), ...]) - longitude is split
+    into two ranges when the box crosses the antimeridian
+    """
+    center_lat = float(center_lat)
+    center_lng = float(center_lng)
+
+    # The filter compares 2R * sqrt(hav) (i.e. 2R * sin(d / 2R)) against the radius,
+    # which accepts points slightly beyond the true great-circle radius
+    angular = 2 * math.asin(min(1.0, radius_km / (2 * EARTH_RADIUS_KM)))
+    delta_lat = math.degrees(angular) + BOUNDS_EPSILON
+
+    lat_min = max(-90.0, center_lat - delta_lat)
+    lat_max = min(90.0, center_lat + delta_lat)
+
+    # Maximum longitude extent of the circle, widened to the full globe near the poles
+    cos_lat = math.cos(math.radians(center_lat))
+    if lat_min <= -90.0 or lat_max >= 90.0 or cos_lat <= 0 or math.sin(angular) >= cos_lat:
+        return lat_min, lat_max, [(-180.0, 180.0)]
+
+    delta_lng = math.degrees(math.asin(math.sin(angular) / cos_lat)) + BOUNDS_EPSILON
+    lng_min = center_lng - delta_lng
+    lng_max = center_lng + delta_lng
+
+    if lng_max - lng_min >= 360:
+        return lat_min, lat_max, [(-180.0, 180.0)]
+    if lng_min < -180:
+        return lat_min, lat_max, [(lng_min + 360, 180.0), (-180.0, lng_max)]
+    if lng_max > 180:
+        return lat_min, lat_max, [(lng_min, 180.0), (-180.0, lng_max - 360)]
+    return lat_min, lat_max, [(lng_min, lng_max)]
+
+
+def geohash_cell_ranges(lat_min: float, lat_max: float,
+                        lng_ranges: List[Tuple[float, float]],
+                        max_cells: int = MAX_COVER_CELLS) -> List[Tuple[str, Optional[str]]]:
+    """
+    Cover a bounding box with geohash cells and merge neighbours into key ranges
+    Returns [(low, high), ...] where matching keys satisfy low <= key < high
+    (high is None for a range that runs to the end of the key space)
+    """
+    precision = _cover_precision(lat_min, lat_max, lng_ranges, max_cells)
+    if precision is None:
+        return []
+
+    lat_bits, lng_bits = _bits_for_precision(precision)
+    lat_lo = _cell_index(lat_min, -90.0, 180.0, lat_bits)
+    lat_hi = _cell_index(lat_max, -90.0, 180.0, lat_bits)
+
+    # Collect Z-order positions of every covering cell
+    positions = set()
+    for lng_min, lng_max in lng_ranges:
+        lng_lo = _cell_index(lng_min, -180.0, 360.0, lng_bits)
+        lng_hi = _cell_index(lng_max, -180.0, 360.0, lng_bits)
+        for lat_index in range(lat_lo, lat_hi + 1):
+            for lng_index in range(lng_lo, lng_hi + 1):
+                positions.add(_interleave(lat_index, lng_index, precision))
+
+    # Merge consecutive cells into contiguous key ranges
+    total_cells = 1 << (5 * precision)
+    ranges = []
+    run_start = run_end = None
+    for position in sorted(positions):
+        if run_start is None:
+            run_start = run_end = position
+        elif position == run_end + 1:
+            run_end = position
+        else:
+            ranges.append((run_start, run_end))
+            run_start = run_end = position
+    if run_start is not None:
+        ranges.append((run_start, run_end))
+
+    return [
+        (
+            _position_to_geohash(start, precision),
+            _position_to_geohash(end + 1, precision) if end + 1 < total_cells else None,
+        )
+        for start, end in ranges
+    ]
+
+
+def radius_prefilter(center_lat: float, center_lng: float, radius_km: float,
+                     field_prefix: str = '') -> Q:
+    """
+    Index-friendly prefilter for a radius search
+    Combines the latitude/longitude bounding box with geohash key ranges; every
+    row within the radius is kept, so the exact distance check can run on the
+    survivors only
+    """
+    lat_min, lat_max, lng_ranges = radius_bounding_box(center_lat, center_lng, radius_km)
+
+    latitude = f'{field_prefix}latitude'
+    longitude = f'{field_prefix}longitude'
+    geohash = f'{field_prefix}geohash'
+
+    query = Q(**{
+        f'{latitude}__gte': Decimal(str(round(lat_min, 6))) - Decimal('0.000001'),
+        f'{latitude}__lte': Decimal(str(round(lat_max, 6))) + Decimal('0.000001'),
+    })
+
+    lng_query = Q()
+    for lng_min, lng_max in lng_ranges:
+        if lng_min <= -180 and lng_max >= 180:
+            continue
+        lng_query |= Q(**{
+            f'{longitude}__gte': Decimal(str(round(lng_min, 6))) - Decimal('0.000001'),
+            f'{longitude}__lte': Decimal(str(round(lng_max, 6))) + Decimal('0.000001'),
+        })
+    if lng_query:
+        query &= lng_query
+
+    cell_query = Q()
+    for low, high in geohash_cell_ranges(lat_min, lat_max, lng_ranges):
+        if high is None:
+            cell_query |= Q(**{f'{geohash}__gte': low})
+        else:
+            cell_query |= Q(**{f'{geohash}__gte': low, f'{geohash}__lt': high})
+    if cell_query:
+        query &= cell_query
+
+    return query
+
+
+def _bits_for_precision(precision: int) -> Tuple[int, int]:
+    """Latitude and longitude bit counts for a geohash precision"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return lat_bits, lng_bits
+
+
+def _cell_index(value: float, origin: float, span: float, bits: int) -> int:
+    """Grid cell index of a coordinate along one axis"""
+    cells = 1 << bits
+    index = int((value - origin) / span * cells)
+    return min(max(index, 0), cells - 1)
+
+
+def _interleave(lat_index: int, lng_index: int, precision: int) -> int:
+    """Interleave axis indices into a Z-order position (longitude bit first)"""
+    lat_bits, lng_bits = _bits_for_precision(precision)
+    position = 0
+    lat_shift = lat_bits - 1
+    lng_shift = lng_bits - 1
+    for bit in range(5 * precision):
+        if bit % 2 == 0:
+            position = (position << 1) | ((lng_index >> lng_shift) & 1)
+            lng_shift -= 1
+        else:
+            position = (position << 1) | ((lat_index >> lat_shift) & 1)
+            lat_shift -= 1
+    return position
+
+
+def _position_to_geohash(position: int, precision: int) -> str:
+    """Render a Z-order position as a geohash string"""
+    chars = []
+    for _ in range(precision):
+        chars.append(GEOHASH_ALPHABET[position & 31])
+        position >>= 5
+    return ''.join(reversed(chars))
+
+
+def _encode_cell(lat_index: int, lng_index: int, precision: int) -> str:
+    """Geohash string for a grid cell"""
+    return _position_to_geohash(_interleave(lat_index, lng_index, precision), precision)
+
+
+def _cover_precision(lat_min: float, lat_max: float,
+                     lng_ranges: List[Tuple[float, float]], max_cells: int) -> Optional[int]:
+    """
+    Finest geohash precision whose cover of the box stays within max_cells
+    Returns None when even single-character cells would exceed the limit
+    """
+    best = None
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        lat_bits, lng_bits = _bits_for_precision(precision)
+        lat_cells = (_cell_index(lat_max, -90.0, 180.0, lat_bits)
+                     - _cell_index(lat_min, -90.0, 180.0, lat_bits) + 1)
+        lng_cells = sum(
+            _cell_index(lng_max, -180.0, 360.0, lng_bits)
+            - _cell_index(lng_min, -180.0, 360.0, lng_bits) + 1
+            for lng_min, lng_max in lng_ranges
+        )
+        if lat_cells * lng_cells > max_cells:
+            break
+        best = precision
+    return best
@@ -0,0 +1,109 @@
+"""
+Template Engine for DroneStrike v2
+Communication templates are parsed once into literal and slot segments and
+cached by template id and version (updated_at); rendering fills the slots
+and joins once per recipient. Unknown {placeholders} are left as written
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+PLACEHOLDER_RE = re.compile(r'\{(\w+)\}')
+
+CACHE_SIZE = 512
+
+
+class CompiledTemplate:
+    """
+    Template text split into segments
+    parts holds literal text with each slot's raw '{name}' in place, so a
+    render copies parts, overwrites the slots it has values for and joins
+    """
+
+    __slots__ = ('source', 'parts', 'slots')
+
+    def __init__(self, source: str):
+        self.source = source
+        self.parts: List[str] = []
+        self.slots: List[tuple] = []  # (index into parts, variable name)
+        position = 0
+        for match in PLACEHOLDER_RE.finditer(source):
+            if match.start() > position:
+                self.parts.append(source[position:match.start()])
+            self.slots.append((len(self.parts), match.group(1)))
+            self.parts.append(match.group(0))
+            position = match.end()
+        if position < len(source) or not self.parts:
+            self.parts.append(source[position:])
+
+    @property
+    def variables(self) -> set:
+        return {name for _, name in self.slots}
+
+    def render(self, context: Dict[str, Any]) -> str:
+        """Fill slots from a context dict (values converted with str())"""
+        if not self.slots:
+            return self.source
+        filled = self.parts[:]
+        for index, name in self.slots:
+            if name in context:
+                filled[index] = str(context[name])
+        return ''.join(filled)
+
+    def render_batch(self, objects: Iterable, variables: Dict[str, Callable[[Any], Optional[str]]]) -> List[str]:
+        """
+        Render once per object; only the variables this template uses are
+        resolved - variables[name](obj) returns the text, or None to leave
+        the placeholder as written
+        """
+        # Each variable is resolved once per object, however often it appears
+        positions: Dict[str, List[int]] = {}
+        for index, name in self.slots:
+            if name in variables:
+                positions.setdefault(name, []).append(index)
+        if not positions:
+            return [self.source for _ in objects]
+        getters = [(variables[name], indices) for name, indices in positions.items()]
+
+        parts = self.parts
+        rendered = []
+        for obj in objects:
+            filled = parts[:]
+            for getter, indices in getters:
+                value = getter(obj)
+                if value is not None:
+                    for index in indices:
+                        filled[index] = value
+            rendered.append(''.join(filled))
+        return rendered
+
+
+_cache: 'OrderedDict[tuple, CompiledTemplate]' = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def compiled_field(template, field_name: str) -> CompiledTemplate:
+    """
+    Compiled text of template.<field_name>, cached by template id and
+    version (an in-memory edit with the same version recompiles)
+    """
+    source = getattr(template, field_name) or ''
+    if template.pk is None:
+        return CompiledTemplate(source)
+
+    key = (template._meta.label, template.pk, template.updated_at, field_name)
+    with _cache_lock:
+        compiled = _cache.get(key)
+        if compiled is not None and compiled.source == source:
+            _cache.move_to_end(key)
+            return compiled
+
+    compiled = CompiledTemplate(source)
+    with _cache_lock:
+        _cache[key] = compiled
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return compiled
@@ -9,10 +9,10 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.db.models import Q, Count, Sum, Avg
 from django.db import transaction
+from django.core.files.storage import default_storage
 from decimal import Decimal
 from datetime import datetime, timedelta
-import csv
-import io
+import itertools
 import uuid
 
 from .models import (
@@ -23,6 +23,7 @@ from .serializers import (
     TLCClientSerializer, TLCClientCreateSerializer, TLCImportJobSerializer,
     TLCClientNoteSerializer
 )
+from .csv_streaming import StreamingCSVReader
 
 
 class TLCClientViewSet(viewsets.ModelViewSet):
@@ -217,6 +218,9 @@ class TLCCSVUploadView(generics.CreateAPIView):
     """TLC CSV file upload and processing endpoint"""
     permission_classes = [permissions.IsAuthenticated]
     
+    # Rows committed per checkpoint
+    CHECKPOINT_ROWS = 500
+    
     def create(self, request, *args, **kwargs):
         try:
             # Check if file was uploaded
@@ -241,8 +245,14 @@ class TLCCSVUploadView(generics.CreateAPIView):
                 status='pending'
             )
             
+            # Keep the upload so an interrupted import can be resumed
+            import_job.source_file = default_storage.save(f"tlc_imports/{import_job.pk}.csv", file)
+            import_job.save(update_fields=['source_file'])
+            
             # Process CSV file
-            self._process_csv_file(file, import_job)
+            with default_storage.open(import_job.source_file, 'rb') as source:
+                self._process_csv_file(source, import_job)
+            _discard_source_file(import_job)
             
             return Response(
                 TLCImportJobSerializer(import_job).data,
@@ -255,52 +265,47 @@ class TLCCSVUploadView(generics.CreateAPIView):
             }, status=status.HTTP_400_BAD_REQUEST)
     
     def _process_csv_file(self, file, import_job):
-        """Process TLC CSV file"""
+        """
+        Process TLC CSV file
+        Rows commit in batches of CHECKPOINT_ROWS, each together with the job's
+        counters and checkpoint, so a resumed job continues after the last
+        committed batch without re-inserting clients
+        """
         try:
             import_job.status = 'processing'
-            import_job.started_at = datetime.now()
+            if not import_job.started_at:
+                import_job.started_at = datetime.now()
             import_job.save()
             
-            # Read CSV file with encoding detection
-            try:
-                file_data = file.read().decode('utf-8')
-            except UnicodeDecodeError:
-                file.seek(0)  # Reset file pointer
-                try:
-                    file_data = file.read().decode('latin-1')
-                except UnicodeDecodeError:
-                    file.seek(0)  # Reset file pointer
-                    file_data = file.read().decode('cp1252', errors='ignore')
-            csv_reader = csv.DictReader(io.StringIO(file_data))
+            # Stream the CSV file in chunks (encoding detected as it is read)
+            csv_reader = StreamingCSVReader(file)
             
-            # Count total rows
-            rows = list(csv_reader)
-            import_job.total_rows = len(rows)
-            import_job.save()
+            # Count total rows in a streaming pass
+            if not import_job.total_rows:
+                import_job.total_rows = csv_reader.count_rows()
+                import_job.save()
+            
+            if import_job.checkpoint_row:
+                csv_reader.seek(import_job.checkpoint_offset, import_job.checkpoint_encoding)
+            rows = enumerate(csv_reader, start=import_job.checkpoint_row + 2)
             
-            # Process each row
-            for row_num, row in enumerate(rows, start=2):
-                try:
-                    with transaction.atomic():
-                        self._process_csv_row(row, import_job, row_num)
-                        import_job.successful_rows += 1
-                        
-                except Exception as e:
-                    import_job.failed_rows += 1
-                    TLCImportError.objects.create(
-                        import_job=import_job,
-                        row_number=row_num,
-                        column='general',
-                        error_message=str(e),
-                        raw_data=str(row)[:500]
+            # Process rows in checkpointed batches
+            while True:
+                batch = list(itertools.islice(rows, self.CHECKPOINT_ROWS))
+                if not batch:
+                    break
+                with transaction.atomic():
+                    for row_num, row in batch:
+                        self._import_row(row, import_job, row_num)
+                    
+                    # Update progress (by byte offset into the upload)
+                    import_job.processed_rows = row_num - 1
+                    import_job.progress_percentage = round(csv_reader.progress_percentage, 2)
+                    import_job.save_checkpoint(
+                        csv_reader.row_offset, row_num - 1, csv_reader.encoding,
+                        fields=['processed_rows', 'progress_percentage', 'successful_rows',
+                                'failed_rows', 'duplicate_clients']
                     )
-                
-                # Update progress
-                import_job.processed_rows = row_num - 1
-                import_job.progress_percentage = (import_job.processed_rows / import_job.total_rows) * 100
-                
-                if row_num % 100 == 0:  # Save progress every 100 rows
-                    import_job.save()
             
             # Finalize import
             import_job.status = 'completed'
@@ -309,6 +314,7 @@ class TLCCSVUploadView(generics.CreateAPIView):
             import_job.save()
             
         except Exception as e:
+            import_job.refresh_from_db()
             import_job.status = 'failed'
             import_job.completed_at = datetime.now()
             import_job.save()
@@ -321,6 +327,23 @@ class TLCCSVUploadView(generics.CreateAPIView):
                 raw_data=''
             )
     
+    def _import_row(self, row, import_job, row_num):
+        """Import one row in its own savepoint, recording a row error on failure"""
+        try:
+            with transaction.atomic():
+                self._process_csv_row(row, import_job, row_num)
+                import_job.successful_rows += 1
+                
+        except Exception as e:
+            import_job.failed_rows += 1
+            TLCImportError.objects.create(
+                import_job=import_job,
+                row_number=row_num,
+                column='general',
+                error_message=str(e),
+                raw_data=str(row)[:500]
+            )
+    
     def _process_csv_row(self, row, import_job, row_num):
         """Process a single CSV row"""
         # Extract and validate data from CSV row
@@ -465,6 +488,18 @@ class TLCCSVUploadView(generics.CreateAPIView):
         }
 
 
+def _discard_source_file(import_job):
+    """Delete a finished or failed job's stored upload (interrupted jobs keep it for resume)"""
+    if import_job.status not in ('completed', 'failed') or not import_job.source_file:
+        return
+    try:
+        default_storage.delete(import_job.source_file)
+    except Exception:
+        pass  # Ignore cleanup errors
+    import_job.source_file = ''
+    import_job.save(update_fields=['source_file'])
+
+
 class TLCImportJobViewSet(viewsets.ReadOnlyModelViewSet):
     """TLC import job monitoring"""
     queryset = TLCImportJob.objects.all()
@@ -474,4 +509,29 @@ class TLCImportJobViewSet(viewsets.ReadOnlyModelViewSet):
     
     def get_queryset(self):
         # Users can only see their own import jobs
-        return super().get_queryset().filter(created_by=self.request.user)
\ No newline at end of file
+        return super().get_queryset().filter(created_by=self.request.user)
+    
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        """Resume an interrupted import after its last committed batch"""
+        import_job = self.get_object()
+        
+        if import_job.status == 'completed':
+            return Response({'error': 'Import job already completed'}, status=status.HTTP_409_CONFLICT)
+        if not import_job.source_file:
+            return Response({'error': 'Import job has no stored source file'}, status=status.HTTP_400_BAD_REQUEST)
+        if not import_job.claim_for_resume():
+            return Response({'error': 'Import job is still running'}, status=status.HTTP_409_CONFLICT)
+        
+        try:
+            source = default_storage.open(import_job.source_file, 'rb')
+        except Exception:
+            import_job.status = 'failed'
+            import_job.save(update_fields=['status'])
+            return Response({'error': 'Import source file not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        with source:
+            TLCCSVUploadView()._process_csv_file(source, import_job)
+        _discard_source_file(import_job)
+        
+        return Response(TLCImportJobSerializer(import_job).data)
\ No newline at end of file
@@ -8,8 +8,9 @@ from decimal import Decimal
 from datetime import datetime, timedelta
 from django.utils import timezone
 from django.db import transaction
+from django.conf import settings
 from django.db.models import Sum, Count, F, Q
-from .models import TokenTransaction, UserProfile
+from .models import TokenTransaction, TokenReservation, UserProfile
 from .user_roles import UserPermission
 
 logger = logging.getLogger(__name__)
@@ -191,6 +192,200 @@ class TokenEngine:
             'cost_breakdown': cost_breakdown
         }
     
+    @classmethod
+    def action_cost(cls, action_type: str, quantity: int = 1, duration_minutes: int = 0) -> tuple[str, int]:
+        """(token_type, whole tokens) charged for quantity units of an action"""
+        if action_type not in cls.ACTION_COSTS:
+            raise ValueError(f"Unknown action type: {action_type}")
+        
+        action_config = cls.ACTION_COSTS[action_type]
+        if action_config.get('per_minute') and duration_minutes > 0:
+            total_cost = action_config['tokens'] * duration_minutes
+        else:
+            total_cost = action_config['tokens'] * quantity
+        
+        total_cost = int(total_cost) if total_cost == int(total_cost) else int(total_cost) + 1
+        return action_config['token_type'], total_cost
+    
+    @classmethod
+    @transaction.atomic
+    def reserve_tokens(cls, user, action_type: str, quantity: int = 1,
+                       duration_minutes: int = 0, description: str = "",
+                       reference_id: str = "", ttl_seconds: int = None) -> TokenReservation:
+        """
+        Hold tokens for a bulk job
+        The profile row is locked and debited once, with one 'reservation'
+        ledger entry; draw_reserved_tokens then spends from the hold
+        """
+        token_type, amount = cls.action_cost(action_type, quantity, duration_minutes)
+        
+        profile = UserProfile.objects.select_for_update().get(user=user)
+        balance_field = 'mail_tokens' if token_type == 'mail' else 'tokens'
+        tokens_before = getattr(profile, balance_field)
+        if tokens_before < amount:
+            raise ValueError(
+                f"Insufficient {token_type} tokens. Need {amount}, have {tokens_before}, "
+                f"deficit: {amount - tokens_before}"
+            )
+        
+        setattr(profile, balance_field, tokens_before - amount)
+        profile.save(update_fields=[balance_field])
+        user.profile = profile
+        
+        description = description or f"{action_type} - {quantity} unit(s)"
+        hold = TokenTransaction.objects.create(
+            user=user,
+            token_type=token_type,
+            transaction_type='reservation',
+            action_type=action_type,
+            tokens_before=tokens_before,
+            tokens_changed=-amount,
+            tokens_after=tokens_before - amount,
+            description=f"Hold: {description}"[:255],
+            reference_id=reference_id
+        )
+        
+        if ttl_seconds is None:
+            ttl_seconds = getattr(settings, 'TOKEN_RESERVATION_TTL_SECONDS', 86400)
+        reservation = TokenReservation.objects.create(
+            user=user,
+            token_type=token_type,
+            action_type=action_type,
+            tokens_reserved=amount,
+            description=description[:255],
+            reference_id=reference_id,
+            hold_transaction=hold,
+            expires_at=timezone.now() + timedelta(seconds=ttl_seconds) if ttl_seconds else None
+        )
+        
+        logger.info(f"Reserved {amount} {token_type} tokens for {action_type}: {user.username}")
+        return reservation
+    
+    @classmethod
+    def draw_reserved_tokens(cls, reservation: TokenReservation, amount: int) -> int:
+        """
+        Spend tokens from a held reservation - one conditional UPDATE of the
+        reservation row, the profile is not touched
+        Returns the tokens still available in the hold
+        """
+        if amount <= 0:
+            return reservation.tokens_remaining
+        
+        updated = TokenReservation.objects.filter(
+            pk=reservation.pk,
+            status='held',
+            tokens_used__lte=F('tokens_reserved') - amount
+        ).update(tokens_used=F('tokens_used') + amount)
+        
+        if not updated:
+            reservation.refresh_from_db(fields=['status', 'tokens_used', 'tokens_reserved'])
+            if reservation.status != 'held':
+                raise ValueError(f"Token reservation {reservation.pk} is {reservation.status}")
+            raise ValueError(
+                f"Token reservation exhausted. Need {amount}, have {reservation.tokens_remaining}"
+            )
+        
+        reservation.tokens_used += amount
+        return reservation.tokens_remaining
+    
+    @classmethod
+    def return_reserved_tokens(cls, reservation: TokenReservation, amount: int) -> int:
+        """
+        Give drawn tokens back to a held reservation (work paid for but not
+        done); they are refunded when the reservation settles
+        Returns the tokens available in the hold
+        """
+        if amount <= 0:
+            return reservation.tokens_remaining
+        
+        updated = TokenReservation.objects.filter(
+            pk=reservation.pk,
+            status='held',
+            tokens_used__gte=amount
+        ).update(tokens_used=F('tokens_used') - amount)
+        
+        if not updated:
+            reservation.refresh_from_db(fields=['status', 'tokens_used', 'tokens_reserved'])
+            if reservation.status != 'held':
+                raise ValueError(f"Token reservation {reservation.pk} is {reservation.status}")
+            raise ValueError(
+                f"Cannot return {amount} tokens, only {reservation.tokens_used} drawn"
+            )
+        
+        reservation.tokens_used -= amount
+        return reservation.tokens_remaining
+    
+    @classmethod
+    @transaction.atomic
+    def settle_reservation(cls, reservation: TokenReservation, tokens_used: int = None,
+                           status: str = 'settled') -> dict:
+        """
+        Close a reservation and refund what was not used, with one
+        'settlement' ledger entry
+        tokens_used overrides the drawn amount (capped at the hold); status is
+        'settled', 'released' (job cancelled) or 'expired'
+        """
+        reservation = TokenReservation.objects.select_for_update().get(pk=reservation.pk)
+        if reservation.status != 'held':
+            return {
+                'reservation_id': reservation.pk,
+                'status': reservation.status,
+                'tokens_used': reservation.tokens_used,
+                'tokens_refunded': 0
+            }
+        
+        if tokens_used is not None:
+            reservation.tokens_used = max(0, min(tokens_used, reservation.tokens_reserved))
+        refund = reservation.tokens_remaining
+        
+        profile = UserProfile.objects.select_for_update().get(user_id=reservation.user_id)
+        balance_field = 'mail_tokens' if reservation.token_type == 'mail' else 'tokens'
+        tokens_before = getattr(profile, balance_field)
+        if refund:
+            setattr(profile, balance_field, tokens_before + refund)
+            profile.save(update_fields=[balance_field])
+        
+        reservation.settlement_transaction = TokenTransaction.objects.create(
+            user_id=reservation.user_id,
+            token_type=reservation.token_type,
+            transaction_type='settlement',
+            action_type=reservation.action_type,
+            tokens_before=tokens_before,
+            tokens_changed=refund,
+            tokens_after=tokens_before + refund,
+            description=f"Settle: {reservation.description} "
+                        f"({reservation.tokens_used} of {reservation.tokens_reserved} used)"[:255],
+            reference_id=reservation.reference_id
+        )
+        reservation.status = status
+        reservation.settled_at = timezone.now()
+        reservation.save(update_fields=['tokens_used', 'status', 'settled_at', 'settlement_transaction'])
+        
+        logger.info(f"Settled reservation {reservation.pk}: {reservation.tokens_used} used, {refund} refunded")
+        
+        return {
+            'reservation_id': reservation.pk,
+            'status': status,
+            'tokens_used': reservation.tokens_used,
+            'tokens_refunded': refund
+        }
+    
+    @classmethod
+    def release_reservation(cls, reservation: TokenReservation) -> dict:
+        """Cancel a reservation: tokens already drawn stay spent, the rest is refunded"""
+        return cls.settle_reservation(reservation, status='released')
+    
+    @classmethod
+    def expire_reservations(cls, now=None) -> int:
+        """Settle holds whose job never finished; returns the number expired"""
+        now = now or timezone.now()
+        expired = 0
+        stale = TokenReservation.objects.filter(status='held', expires_at__lt=now).only('pk')
+        for reservation in stale.iterator():
+            if cls.settle_reservation(reservation, status='expired')['status'] == 'expired':
+                expired += 1
+        return expired
+    
     @classmethod
     @transaction.atomic
     def add_tokens(cls, user, token_type: str, amount: int, 
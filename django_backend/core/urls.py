@@ -59,6 +59,7 @@ urlpatterns = [
     path('api/csv/upload/', csv_import_views.upload_csv_file_api, name='csv_upload'),
     path('api/csv/analyze/', csv_import_views.analyze_csv_structure_api, name='csv_analyze'),
     path('api/csv/import/', csv_import_views.import_csv_api, name='csv_import'),
+    path('api/csv/import/<uuid:job_id>/resume/', csv_import_views.resume_import_api, name='csv_import_resume'),
     path('api/csv/templates/', csv_import_views.csv_template_api, name='csv_templates'),
     path('api/csv/validate/', csv_import_views.validate_csv_data_api, name='csv_validate'),
     path('api/csv/import-history/', csv_import_views.import_history_api, name='csv_import_history'),
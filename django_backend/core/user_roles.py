@@ -96,6 +96,9 @@ class UserPermission:
     CAN_EXPORT_LEADS = 'export_leads'
     CAN_IMPORT_LEADS = 'import_leads'
     
+    # Communication permissions
+    CAN_SEND_COMMUNICATIONS = 'send_communications'
+    
     # User management permissions
     CAN_MANAGE_USERS = 'manage_users'
     CAN_VIEW_USER_ANALYTICS = 'view_user_analytics'
@@ -125,7 +128,7 @@ class UserPermission:
             CAN_VIEW_ALL_MISSIONS, CAN_ASSIGN_MISSIONS, CAN_VIEW_LEADS,
             CAN_CREATE_LEADS, CAN_EDIT_LEADS, CAN_EXPORT_LEADS,
             CAN_VIEW_USER_ANALYTICS, CAN_VIEW_FINANCIAL_DATA,
-            CAN_VIEW_TOKEN_ANALYTICS
+            CAN_VIEW_TOKEN_ANALYTICS, CAN_SEND_COMMUNICATIONS
         ],
         UserRole.DISPATCHER: [
             CAN_CREATE_MISSIONS, CAN_ASSIGN_MISSIONS, CAN_VIEW_ALL_MISSIONS,
@@ -136,7 +139,7 @@ class UserPermission:
             CAN_CREATE_MISSIONS, CAN_ACCEPT_MISSIONS, CAN_DECLINE_MISSIONS,
             CAN_ASSIGN_MISSIONS, CAN_VIEW_ALL_MISSIONS, CAN_DELETE_MISSIONS,
             CAN_VIEW_LEADS, CAN_CREATE_LEADS, CAN_EDIT_LEADS, CAN_DELETE_LEADS,
-            CAN_EXPORT_LEADS, CAN_IMPORT_LEADS, CAN_MANAGE_USERS,
+            CAN_EXPORT_LEADS, CAN_IMPORT_LEADS, CAN_SEND_COMMUNICATIONS, CAN_MANAGE_USERS,
             CAN_VIEW_USER_ANALYTICS, CAN_SUSPEND_USERS, CAN_VIEW_FINANCIAL_DATA,
             CAN_PROCESS_PAYMENTS, CAN_VIEW_TOKEN_ANALYTICS, CAN_ACCESS_ADMIN,
             CAN_MANAGE_SETTINGS, CAN_VIEW_AUDIT_LOGS
@@ -31,6 +31,10 @@ from .serializers import (
 from .services import (
     FinancialCalculationService, TokenService, PropertyScoringService, WorkflowService
 )
+from .pagination import LeadPagination
+from .filter_materialization import deferred_invalidation
+from .facet_engine import FacetEngine
+from .lead_search import LeadSearchBackend
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -244,9 +248,10 @@ class LeadViewSet(viewsets.ModelViewSet):
     queryset = Lead.objects.select_related('owner', 'property__county').prefetch_related('property__leads')
     permission_classes = [permissions.IsAuthenticated]
     filterset_fields = ['lead_status', 'workflow_stage', 'owner_type', 'mailing_state', 'owner']
-    search_fields = ['first_name', 'last_name', 'email', 'mailing_city', 'phone_cell', 'mailing_address_1', 'account_number']
+    # ?search= is served by the full-text index in apply_advanced_filters (see lead_search.py)
     ordering_fields = ['score_value', 'created_at', 'last_contact', 'first_name', 'last_name', 'mailing_city', 'mailing_county']
     ordering = ['-created_at']
+    pagination_class = LeadPagination
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -270,18 +275,10 @@ class LeadViewSet(viewsets.ModelViewSet):
         """Apply all Laravel-compatible filters for prospects/targets"""
         params = self.request.query_params
         
-        # Global search (searches across multiple fields like Laravel)
+        # Global search (name, email, address, phone, account number like Laravel)
         search = params.get('search', '').strip()
         if search:
-            from django.db.models import Q
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(email__icontains=search) |
-                Q(mailing_address_1__icontains=search) |
-                Q(account_number__icontains=search) |
-                Q(phone_cell__icontains=search)
-            )
+            queryset = LeadSearchBackend.search(queryset, search)
         
         # Specific search fields (Laravel compatibility)
         search_name = params.get('search_name', '').strip()
@@ -413,24 +410,39 @@ class LeadViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        
+        # Rank search matches unless the client picked an ordering or pages by cursor
+        params = self.request.query_params
+        if params.get('search', '').strip() and not params.get('ordering') and 'cursor' not in params:
+            queryset = LeadSearchBackend.order_by_rank(queryset)
+        return queryset
+    
     @action(detail=False, methods=['get'])
     def filter_options(self, request):
-        """Get available filter options for dropdowns"""
-        queryset = self.get_queryset()
+        """Get available filter options for dropdowns, with lead counts per option"""
+        queryset = self.filter_queryset(self.get_queryset())
         
-        # Get unique values for filter dropdowns (using available fields)
-        counties = queryset.values_list('mailing_county', flat=True).distinct().exclude(mailing_county__isnull=True).exclude(mailing_county='').order_by('mailing_county')
-        states = queryset.values_list('mailing_state', flat=True).distinct().exclude(mailing_state='').order_by('mailing_state')
-        cities = queryset.values_list('mailing_city', flat=True).distinct().exclude(mailing_city='').order_by('mailing_city')
-        zip_codes = queryset.values_list('mailing_zip5', flat=True).distinct().exclude(mailing_zip5='').order_by('mailing_zip5')
-        statuses = queryset.values_list('lead_status', flat=True).distinct().exclude(lead_status='').order_by('lead_status')
+        # Facets are cached per visible lead scope and the filters currently applied
+        if request.user.profile.role in ['admin', 'manager']:
+            scope = FacetEngine.company_scope(request.user.profile.company_id)
+        else:
+            scope = FacetEngine.owner_scope(request.user.pk)
+        applied_filters = {
+            key: values for key, values in request.query_params.lists()
+            if key not in ['page', 'page_size', 'cursor', 'ordering']
+        }
+        facets = FacetEngine.get_facets(queryset, scope, applied_filters)
+        statuses = FacetEngine.values(facets, 'lead_statuses')
         
         return Response({
-            'counties': list(counties),
-            'states': list(states),
-            'cities': list(cities)[:100],
-            'zip_codes': list(zip_codes)[:50],
-            'lead_statuses': list(statuses),
+            'counties': FacetEngine.values(facets, 'counties'),
+            'states': FacetEngine.values(facets, 'states'),
+            'cities': FacetEngine.values(facets, 'cities', 100),
+            'zip_codes': FacetEngine.values(facets, 'zip_codes', 50),
+            'lead_statuses': statuses,
+            'facets': facets,
             'search_types': [
                 {'value': 'all', 'label': 'All Fields'},
                 {'value': 'name', 'label': 'Name'},
@@ -449,7 +461,7 @@ class LeadViewSet(viewsets.ModelViewSet):
                 {'value': 'commercial', 'label': 'Commercial'},
                 {'value': 'mixed', 'label': 'Mixed Use'}
             ],
-            'status_options': list(statuses),
+            'status_options': statuses,
             'score_ranges': [
                 {'value': '0-25', 'label': 'Low (0-25)'},
                 {'value': '26-50', 'label': 'Fair (26-50)'},
@@ -705,7 +717,8 @@ class CSVUploadView(generics.CreateAPIView):
             
             # Process based on data type
             if data_type == 'leads':
-                created_count, errors = self._process_leads_csv(csv_reader, request.user)
+                with deferred_invalidation(request.user.pk):
+                    created_count, errors = self._process_leads_csv(csv_reader, request.user)
             elif data_type == 'properties':
                 created_count, errors = self._process_properties_csv(csv_reader, request.user)
             else:
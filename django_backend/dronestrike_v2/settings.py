@@ -243,7 +243,7 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.CountedPageNumberPagination',
     'PAGE_SIZE': 50,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -282,6 +282,50 @@ CACHES = {
     }
 }
 
+# Advanced search profiling - log SQL, query plan and stage timings for slow searches
+SEARCH_SLOW_QUERY_LOGGING = config('SEARCH_SLOW_QUERY_LOGGING', default=False, cast=bool)
+SEARCH_SLOW_QUERY_THRESHOLD_MS = config('SEARCH_SLOW_QUERY_THRESHOLD_MS', default=1000, cast=int)
+
+# Result counts for search summaries and paginated lists: exact, estimated or capped
+SEARCH_COUNT_MODE = config('SEARCH_COUNT_MODE', default='exact')
+SEARCH_COUNT_CAP = config('SEARCH_COUNT_CAP', default=10000, cast=int)
+SEARCH_COUNT_SAMPLE_SIZE = config('SEARCH_COUNT_SAMPLE_SIZE', default=5000, cast=int)
+
+# Campaign audience estimates: random lead sample per owner, redrawn after lead
+# changes once it is older than the max age (seconds)
+AUDIENCE_SAMPLE_SIZE = config('AUDIENCE_SAMPLE_SIZE', default=5000, cast=int)
+AUDIENCE_SAMPLE_MAX_AGE = config('AUDIENCE_SAMPLE_MAX_AGE', default=300, cast=int)
+
+# CSV import row cleaning: worker processes (0 = one per CPU core, 1 = in-process)
+# and the file size (rows) at which the process pool is used
+CSV_IMPORT_WORKERS = config('CSV_IMPORT_WORKERS', default=1, cast=int)
+CSV_IMPORT_PARALLEL_MIN_ROWS = config('CSV_IMPORT_PARALLEL_MIN_ROWS', default=20000, cast=int)
+
+# A processing import with no checkpoint for this long may be resumed by another worker
+IMPORT_RESUME_STALE_SECONDS = config('IMPORT_RESUME_STALE_SECONDS', default=300, cast=int)
+
+# Token reservations for bulk jobs are settled (unused tokens refunded) after this long
+TOKEN_RESERVATION_TTL_SECONDS = config('TOKEN_RESERVATION_TTL_SECONDS', default=86400, cast=int)
+
+# Campaign delivery: recipients rendered and written per batch
+CAMPAIGN_DELIVERY_BATCH_SIZE = config('CAMPAIGN_DELIVERY_BATCH_SIZE', default=1000, cast=int)
+
+# Campaign delivery: concurrent provider requests and sustained sends per second, per channel
+CAMPAIGN_EMAIL_MAX_IN_FLIGHT = config('CAMPAIGN_EMAIL_MAX_IN_FLIGHT', default=10, cast=int)
+CAMPAIGN_EMAIL_RATE_PER_SECOND = config('CAMPAIGN_EMAIL_RATE_PER_SECOND', default=50.0, cast=float)
+CAMPAIGN_SMS_MAX_IN_FLIGHT = config('CAMPAIGN_SMS_MAX_IN_FLIGHT', default=4, cast=int)
+CAMPAIGN_SMS_RATE_PER_SECOND = config('CAMPAIGN_SMS_RATE_PER_SECOND', default=1.0, cast=float)
+# Attempts after a 429/5xx or connection failure before a message is recorded as failed
+CAMPAIGN_DELIVERY_MAX_RETRIES = config('CAMPAIGN_DELIVERY_MAX_RETRIES', default=5, cast=int)
+
+# Scheduled campaign actions (launches, drip steps, trigger follow-ups): entries claimed
+# per worker pass, seconds before an unfinished claim is handed to another worker,
+# attempts before an entry fails, and the longest a worker sleeps with nothing due
+CAMPAIGN_SCHEDULER_BATCH_SIZE = config('CAMPAIGN_SCHEDULER_BATCH_SIZE', default=500, cast=int)
+CAMPAIGN_SCHEDULER_LEASE_SECONDS = config('CAMPAIGN_SCHEDULER_LEASE_SECONDS', default=900, cast=int)
+CAMPAIGN_SCHEDULER_MAX_ATTEMPTS = config('CAMPAIGN_SCHEDULER_MAX_ATTEMPTS', default=5, cast=int)
+CAMPAIGN_SCHEDULER_IDLE_SECONDS = config('CAMPAIGN_SCHEDULER_IDLE_SECONDS', default=30, cast=int)
+
 # Email configuration (from dronestrike-new working config)
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
 
@@ -303,6 +347,9 @@ MAILGUN_API_KEY = config('MAILGUN_API_KEY', default='')
 MAILGUN_DOMAIN = config('MAILGUN_DOMAIN', default='')
 MAILGUN_AUTHORIZED_EMAILS = config('MAILGUN_AUTHORIZED_EMAILS', default='', cast=Csv())
 VOIP_BEARER_TOKEN = config('VOIP_BEARER_TOKEN', default='')
+VOIP_API_USERNAME = config('VOIP_API_USERNAME', default='')
+VOIP_API_PASSWORD = config('VOIP_API_PASSWORD', default='')
+VOIP_SMS_DID = config('VOIP_SMS_DID', default='')
 
 # Document services (from dronestrike-new working config)
 HIPAATIZER_API = config('HIPAATIZER_API', default='')
@@ -6,11 +6,142 @@ Enhanced to handle both Tarrant County tax data and general CSV formats
 import csv
 import io
 import os
-from typing import List, Dict, Any, Optional
+import sys
+from bisect import bisect_left
+from collections import defaultdict
+from typing import List, Dict, Any, Callable, Optional
 from decimal import Decimal, InvalidOperation
 from datetime import datetime
 import re
 
+import numpy as np
+
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Tarrant property fields backed by numeric columns: field -> (header, kind)
+TARRANT_NUMERIC_FIELDS = {
+    'assessed_value': ('ValueAss', 'currency'),
+    'land_value': ('ValueLand', 'currency'),
+    'improvement_value': ('ValueImp', 'currency'),
+    'total_due': ('TOTAL DUE', 'currency'),
+    'current_due': ('CurrentDue', 'currency'),
+    'tax_amount': ('Tax', 'currency'),
+    'fees': ('Fees', 'currency'),
+    'prior_due': ('PriorDue', 'currency'),
+    'estimated_purchase_price': ('ESTIMATED MAX PURCHASE PRICE', 'currency'),
+    'cash_to_customer': ('CASH TO CUSTOMER', 'currency'),
+    'tax_loan_amount': ('tax loan amount', 'currency'),
+    'payment_24_months': ('pmt 24 mts', 'currency'),
+    'interest_rate': ('RATE', 'percentage'),
+    'apr': ('APR', 'percentage'),
+}
+
+
+class CSVColumns:
+    """
+    Column-oriented view of the loaded rows, built once per load
+    Numeric columns are float64 NumPy arrays; text columns are lists of
+    interned strings (repeated cities, states, statuses share one object)
+    """
+    
+    def __init__(self, rows: List[Dict[str, str]], clean_currency: Callable, clean_percentage: Callable):
+        self.rows = rows
+        self.size = len(rows)
+        self._clean = {'currency': clean_currency, 'percentage': clean_percentage}
+        self._text = {}
+        self._numbers = {}
+        self._flags = {}
+        self._derived = {}
+    
+    def text(self, header: str, default: str = '') -> List[str]:
+        """Values of row.get(header, default) for every row"""
+        key = (header, default)
+        if key not in self._text:
+            self._text[key] = [
+                sys.intern(value) if isinstance(value, str) else value
+                for value in (row.get(header, default) for row in self.rows)
+            ]
+        return self._text[key]
+    
+    def numbers(self, header: str, kind: str = 'currency') -> np.ndarray:
+        """Cleaned currency/percentage column (blank or invalid -> 0.0)"""
+        key = (header, kind)
+        if key not in self._numbers:
+            clean = self._clean[kind]
+            self._numbers[key] = np.fromiter(
+                (clean(value) for value in self.text(header, '0')), dtype=np.float64, count=self.size
+            )
+        return self._numbers[key]
+    
+    def derived(self, key, build: Callable[[], Any]):
+        """Cache any other per-load column under key"""
+        if key not in self._derived:
+            self._derived[key] = build()
+        return self._derived[key]
+    
+    def flags(self, header: str, predicate: Callable[[str], bool]) -> np.ndarray:
+        """Boolean column of predicate(value) - cached per (header, predicate)"""
+        key = (header, predicate)
+        if key not in self._flags:
+            self._flags[key] = np.fromiter(
+                (bool(predicate(value or '')) for value in self.text(header)), dtype=bool, count=self.size
+            )
+        return self._flags[key]
+
+
+class TokenIndex:
+    """
+    Inverted index from lowercase word tokens to row numbers
+    Candidates are a superset of the rows whose text contains the query as a
+    substring; callers confirm each candidate against the text
+    """
+    
+    def __init__(self, texts: List[str]):
+        postings = defaultdict(list)
+        for row, text in enumerate(texts):
+            for token in set(TOKEN_RE.findall(text)):
+                postings[token].append(row)
+        self.texts = texts
+        self.vocabulary = sorted(postings)
+        self.postings = {token: np.array(rows, dtype=np.int64) for token, rows in postings.items()}
+    
+    def candidates(self, query_lower: str) -> Optional[np.ndarray]:
+        """Sorted candidate rows, or None if the query has no word tokens"""
+        tokens = TOKEN_RE.findall(query_lower)
+        if not tokens:
+            return None
+        
+        result = None
+        for position, token in enumerate(tokens):
+            if position == 0:
+                # The first query token may start mid-word in the text
+                matched = [word for word in self.vocabulary if token in word]
+            else:
+                # Later tokens follow a non-word character, so they start a word
+                start = bisect_left(self.vocabulary, token)
+                end = bisect_left(self.vocabulary, token + '\U0010ffff')
+                matched = self.vocabulary[start:end]
+            if not matched:
+                return np.empty(0, dtype=np.int64)
+            rows = np.unique(np.concatenate([self.postings[word] for word in matched]))
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+            if not result.size:
+                break
+        return result
+    
+    def search(self, query: str, limit: int) -> List[int]:
+        """First rows (in file order) whose text contains query"""
+        query_lower = query.lower()
+        rows = self.candidates(query_lower)
+        matches = []
+        for row in (range(len(self.texts)) if rows is None else rows.tolist()):
+            if query_lower in self.texts[row]:
+                matches.append(row)
+            if len(matches) >= limit:
+                break
+        return matches
+
 
 class CSVDataService:
     """Service for processing any CSV data and converting to application entities"""
@@ -22,6 +153,14 @@ class CSVDataService:
         self.data_cache = None
         self.last_loaded = None
         self.csv_type = self._detect_csv_type()
+        self._reset_derived()
+    
+    def _reset_derived(self):
+        """Drop everything computed from the loaded rows (reload or new field mapping)"""
+        self._columns = None
+        self._records = {}
+        self._search_indexes = {}
+        self._metrics = None
     
     def _detect_csv_type(self) -> str:
         """Detect if this is a Tarrant CSV or general CSV"""
@@ -122,6 +261,7 @@ class CSVDataService:
     def set_field_mapping(self, mapping: Dict[str, str]):
         """Set custom field mapping for general CSV processing"""
         self.field_mapping = mapping
+        self._reset_derived()
     
     def _clean_currency(self, value: str) -> float:
         """Convert currency string to float"""
@@ -159,40 +299,68 @@ class CSVDataService:
         except ValueError:
             return None
     
-    def _calculate_lead_score(self, row: Dict[str, str]) -> int:
-        """Calculate lead score based on property characteristics"""
-        score = 50  # Base score
+    def _calculate_lead_scores(self, columns: CSVColumns) -> np.ndarray:
+        """Lead score for every row based on property characteristics"""
+        score = np.full(columns.size, 50, dtype=np.int64)  # Base score
         
         # High total due increases score
-        total_due = self._clean_currency(row.get('TOTAL DUE', '0'))
-        if total_due > 5000:
-            score += 20
-        elif total_due > 2000:
-            score += 10
+        total_due = columns.numbers('TOTAL DUE')
+        score += np.where(total_due > 5000, 20, np.where(total_due > 2000, 10, 0))
         
         # Lawsuit status
-        lawsuit = row.get('law suit active', '').upper()
-        if 'ACTIVE' in lawsuit:
-            score += 15
+        score += 15 * columns.flags('law suit active', _mentions_active)
         
         # High property value increases score
-        value_ass = self._clean_currency(row.get('ValueAss', '0'))
-        if value_ass > 100000:
-            score += 15
-        elif value_ass > 50000:
-            score += 10
+        value_ass = columns.numbers('ValueAss')
+        score += np.where(value_ass > 100000, 15, np.where(value_ass > 50000, 10, 0))
         
         # LTV ratio considerations
-        ltv = self._clean_percentage(row.get('LTV', '0'))
-        if 0.5 <= ltv <= 0.8:  # Sweet spot for investment
-            score += 10
+        ltv = columns.numbers('LTV', 'percentage')
+        score += 10 * ((ltv >= 0.5) & (ltv <= 0.8))  # Sweet spot for investment
         
         # Homestead exemption (owner-occupied)
-        exemptions = row.get('Exemptions', '').lower()
-        if 'homestead' in exemptions:
-            score += 5
+        score += 5 * columns.flags('Exemptions', _mentions_homestead)
         
-        return min(max(score, 0), 100)  # Clamp between 0-100
+        return np.clip(score, 0, 100)  # Clamp between 0-100
+    
+    def _general_lead_scores(self, columns: CSVColumns) -> np.ndarray:
+        """Mapped lead score column (50 when unmapped, blank or invalid)"""
+        score = np.full(columns.size, 50, dtype=np.int64)
+        for csv_header, mapped_field in self.field_mapping.items():
+            if mapped_field != 'lead_score':
+                continue
+            for row, value in enumerate(columns.text(csv_header)):
+                if value and value.strip():
+                    try:
+                        score[row] = int(float(value.strip()))
+                    except ValueError:
+                        score[row] = 50
+        return score
+    
+    def _general_numbers(self, columns: CSVColumns, field: str) -> np.ndarray:
+        """Currency column for a mapped general-CSV field (0.0 when unmapped)"""
+        values = np.zeros(columns.size, dtype=np.float64)
+        for csv_header, mapped_field in self.field_mapping.items():
+            if mapped_field == field:
+                column = columns.numbers(csv_header)
+                present = np.fromiter((bool(v and v.strip()) for v in columns.text(csv_header)),
+                                      dtype=bool, count=columns.size)
+                values = np.where(present, column, values)
+        return values
+    
+    @property
+    def columns(self) -> CSVColumns:
+        """Columnar view of the loaded data (rebuilt after a reload)"""
+        raw_data = self.load_data()
+        if self._columns is None:
+            self._columns = CSVColumns(raw_data, self._clean_currency, self._clean_percentage)
+        return self._columns
+    
+    def _lead_scores(self) -> np.ndarray:
+        columns = self.columns
+        if self.csv_type == 'tarrant':
+            return columns.derived('lead_score', lambda: self._calculate_lead_scores(columns))
+        return columns.derived('lead_score', lambda: self._general_lead_scores(columns))
     
     def _generate_tags(self, row: Dict[str, str]) -> List[str]:
         """Generate tags based on property characteristics"""
@@ -261,20 +429,31 @@ class CSVDataService:
         
         self.data_cache = data
         self.last_loaded = datetime.now()
+        self._reset_derived()
         return data
     
     def get_properties(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Convert CSV data to property objects"""
+        """Convert CSV data to property objects (converted once per load)"""
         raw_data = self.load_data()
         
-        if self.csv_type == 'tarrant':
-            return self._get_tarrant_properties(raw_data, limit)
-        else:
-            return self._get_general_properties(raw_data, limit)
+        if 'properties' not in self._records:
+            if self.csv_type == 'tarrant':
+                self._records['properties'] = self._get_tarrant_properties(raw_data)
+            else:
+                self._records['properties'] = self._get_general_properties(raw_data)
+        properties = self._records['properties']
+        return properties[:limit] if limit else list(properties)
     
     def _get_tarrant_properties(self, raw_data: List[Dict], limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """Process Tarrant County specific CSV format"""
         properties = []
+        columns = self.columns
+        numbers = {
+            field: columns.numbers(header, kind).tolist()
+            for field, (header, kind) in TARRANT_NUMERIC_FIELDS.items()
+        }
+        ltv_ratio = (columns.numbers('LTV', 'percentage') / 100).tolist()
+        lead_scores = self._lead_scores().tolist()
         
         for i, row in enumerate(raw_data):
             if limit and i >= limit:
@@ -300,23 +479,23 @@ class CSVDataService:
                 'exemptions': row.get('Exemptions', ''),
                 
                 # Financial Data
-                'assessed_value': self._clean_currency(row.get('ValueAss', '0')),
-                'land_value': self._clean_currency(row.get('ValueLand', '0')),
-                'improvement_value': self._clean_currency(row.get('ValueImp', '0')),
-                'total_due': self._clean_currency(row.get('TOTAL DUE', '0')),
-                'current_due': self._clean_currency(row.get('CurrentDue', '0')),
-                'tax_amount': self._clean_currency(row.get('Tax', '0')),
-                'fees': self._clean_currency(row.get('Fees', '0')),
-                'prior_due': self._clean_currency(row.get('PriorDue', '0')),
+                'assessed_value': numbers['assessed_value'][i],
+                'land_value': numbers['land_value'][i],
+                'improvement_value': numbers['improvement_value'][i],
+                'total_due': numbers['total_due'][i],
+                'current_due': numbers['current_due'][i],
+                'tax_amount': numbers['tax_amount'][i],
+                'fees': numbers['fees'][i],
+                'prior_due': numbers['prior_due'][i],
                 
                 # Loan Calculations
-                'ltv_ratio': self._clean_percentage(row.get('LTV', '0')) / 100,
-                'estimated_purchase_price': self._clean_currency(row.get('ESTIMATED MAX PURCHASE PRICE', '0')),
-                'cash_to_customer': self._clean_currency(row.get('CASH TO CUSTOMER', '0')),
-                'tax_loan_amount': self._clean_currency(row.get('tax loan amount', '0')),
-                'payment_24_months': self._clean_currency(row.get('pmt 24 mts', '0')),
-                'interest_rate': self._clean_percentage(row.get('RATE', '0')),
-                'apr': self._clean_percentage(row.get('APR', '0')),
+                'ltv_ratio': ltv_ratio[i],
+                'estimated_purchase_price': numbers['estimated_purchase_price'][i],
+                'cash_to_customer': numbers['cash_to_customer'][i],
+                'tax_loan_amount': numbers['tax_loan_amount'][i],
+                'payment_24_months': numbers['payment_24_months'][i],
+                'interest_rate': numbers['interest_rate'][i],
+                'apr': numbers['apr'][i],
                 
                 # Status
                 'lawsuit_active': row.get('law suit active', '').upper() == 'LAWSUIT ACTIVE',
@@ -328,7 +507,7 @@ class CSVDataService:
                 'last_run': self._parse_date(row.get('LastRun', '')),
                 
                 # Generated fields
-                'lead_score': self._calculate_lead_score(row),
+                'lead_score': lead_scores[i],
                 'tags': self._generate_tags(row),
                 'data_source': 'tarrant_county_csv',
                 'created_at': datetime.now().isoformat(),
@@ -406,17 +585,24 @@ class CSVDataService:
         return properties
     
     def get_leads(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Convert CSV data to lead objects"""
+        """Convert CSV data to lead objects (converted once per load)"""
         raw_data = self.load_data()
         
-        if self.csv_type == 'tarrant':
-            return self._get_tarrant_leads(raw_data, limit)
-        else:
-            return self._get_general_leads(raw_data, limit)
+        if 'leads' not in self._records:
+            if self.csv_type == 'tarrant':
+                self._records['leads'] = self._get_tarrant_leads(raw_data)
+            else:
+                self._records['leads'] = self._get_general_leads(raw_data)
+        leads = self._records['leads']
+        return leads[:limit] if limit else list(leads)
     
     def _get_tarrant_leads(self, raw_data: List[Dict], limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """Process Tarrant County specific lead format"""
         leads = []
+        columns = self.columns
+        property_values = columns.numbers('ValueAss').tolist()
+        total_due = columns.numbers('TOTAL DUE').tolist()
+        lead_scores = self._lead_scores().tolist()
         
         for i, row in enumerate(raw_data):
             if limit and i >= limit:
@@ -442,12 +628,12 @@ class CSVDataService:
                 
                 # Lead Status
                 'status': 'new',
-                'lead_score': self._calculate_lead_score(row),
-                'priority': 'high' if self._calculate_lead_score(row) > 80 else 'medium' if self._calculate_lead_score(row) > 60 else 'low',
+                'lead_score': lead_scores[i],
+                'priority': 'high' if lead_scores[i] > 80 else 'medium' if lead_scores[i] > 60 else 'low',
                 
                 # Property Context
-                'property_value': self._clean_currency(row.get('ValueAss', '0')),
-                'total_due': self._clean_currency(row.get('TOTAL DUE', '0')),
+                'property_value': property_values[i],
+                'total_due': total_due[i],
                 'lawsuit_active': row.get('law suit active', '').upper() == 'LAWSUIT ACTIVE',
                 
                 # Generated fields
@@ -539,78 +725,71 @@ class CSVDataService:
         return leads
     
     def get_dashboard_metrics(self) -> Dict[str, Any]:
-        """Generate dashboard metrics from CSV data"""
-        properties = self.get_properties()
-        leads = self.get_leads()
+        """Generate dashboard metrics from CSV data (cached until the data reloads)"""
+        columns = self.columns
+        if self._metrics is not None:
+            return dict(self._metrics)
         
-        total_properties = len(properties)
-        total_leads = len(leads)
+        total_properties = columns.size
+        total_leads = columns.size
         
         # Calculate financial metrics
-        total_assessed_value = sum(p['assessed_value'] for p in properties)
-        total_due_amount = sum(p['total_due'] for p in properties)
+        if self.csv_type == 'tarrant':
+            assessed_value = columns.numbers('ValueAss')
+            due_amount = columns.numbers('TOTAL DUE')
+            lawsuit_active = columns.flags('law suit active', _is_lawsuit_active)
+        else:
+            assessed_value = self._general_numbers(columns, 'assessed_value')
+            due_amount = self._general_numbers(columns, 'total_due')
+            lawsuit_active = np.array([bool(p.get('lawsuit_active')) for p in self.get_properties()], dtype=bool)
+        total_assessed_value = float(assessed_value.sum())
+        total_due_amount = float(due_amount.sum())
         avg_property_value = total_assessed_value / total_properties if total_properties > 0 else 0
         
-        # Lead scoring metrics
-        high_score_leads = [l for l in leads if l['lead_score'] > 80]
-        lawsuit_active = [p for p in properties if p['lawsuit_active']]
-        
-        return {
+        self._metrics = {
             'total_properties': total_properties,
             'total_leads': total_leads,
-            'high_priority_leads': len(high_score_leads),
-            'lawsuit_properties': len(lawsuit_active),
+            'high_priority_leads': int((self._lead_scores() > 80).sum()),
+            'lawsuit_properties': int(lawsuit_active.sum()),
             'total_assessed_value': total_assessed_value,
             'total_due_amount': total_due_amount,
             'avg_property_value': avg_property_value,
             'data_source': 'tarrant_county_csv',
             'last_updated': self.last_loaded.isoformat() if self.last_loaded else None,
         }
+        return dict(self._metrics)
+    
+    def _search_index(self, kind: str, fields: List[str]) -> TokenIndex:
+        """Token index over the lowercased searchable text of properties or leads"""
+        if kind not in self._search_indexes:
+            records = self.get_properties() if kind == 'properties' else self.get_leads()
+            texts = [' '.join([record.get(field, '') for field in fields]).lower() for record in records]
+            self._search_indexes[kind] = TokenIndex(texts)
+        return self._search_indexes[kind]
     
     def search_properties(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Search properties by address, owner name, or tax ID"""
         properties = self.get_properties()
-        query_lower = query.lower()
-        
-        filtered = []
-        for prop in properties:
-            # Search in multiple fields
-            searchable_text = ' '.join([
-                prop.get('full_address', ''),
-                prop.get('description', ''),
-                prop.get('tax_id', ''),
-                prop.get('external_id', ''),
-            ]).lower()
-            
-            if query_lower in searchable_text:
-                filtered.append(prop)
-            
-            if len(filtered) >= limit:
-                break
-        
-        return filtered
+        index = self._search_index('properties', ['full_address', 'description', 'tax_id', 'external_id'])
+        return [properties[row] for row in index.search(query, limit)]
     
     def search_leads(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Search leads by name or address"""
         leads = self.get_leads()
-        query_lower = query.lower()
-        
-        filtered = []
-        for lead in leads:
-            # Search in multiple fields
-            searchable_text = ' '.join([
-                lead.get('full_name', ''),
-                lead.get('full_address', ''),
-                lead.get('external_id', ''),
-            ]).lower()
-            
-            if query_lower in searchable_text:
-                filtered.append(lead)
-            
-            if len(filtered) >= limit:
-                break
-        
-        return filtered
+        index = self._search_index('leads', ['full_name', 'full_address', 'external_id'])
+        return [leads[row] for row in index.search(query, limit)]
+
+
+def _mentions_active(value: str) -> bool:
+    return 'ACTIVE' in value.upper()
+
+
+def _is_lawsuit_active(value: str) -> bool:
+    return value.upper() == 'LAWSUIT ACTIVE'
+
+
+def _mentions_homestead(value: str) -> bool:
+    return 'homestead' in value.lower()
 
 
 # Global service instance